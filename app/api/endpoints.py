@@ -1,26 +1,280 @@
+import hashlib
 import os
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+import pandas as pd
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 
-from app.core.database import engine, get_db
-from app.core.security import verify_api_key
+from app.columnar import (
+    ColumnarValidationError,
+    parse_columnar,
+    parse_columnar_msgpack,
+)
+from app.core.cache import (
+    CachedResponse,
+    matches_etag,
+    prediction_cache,
+    prediction_list_cache,
+)
+from app.core.config import settings
+from app.core.database import (
+    engine,
+    get_db,
+    get_pool_status,
+    get_read_db,
+    wrote_recently,
+)
+from app.core.idempotency import (
+    Claim,
+    IdempotencyInProgress,
+    IdempotencyKeyReused,
+    idempotency_store,
+)
+from app.core.security import (
+    acquire_inference_slot,
+    get_usage,
+    limiters,
+    verify_api_key,
+)
+from app.core.tracing import span
+from app.core.wire import MSGPACK, MsgpackRequest, NegotiatedRoute
+from app.enums import Departement, Poste
+from app.jobs import create_job, get_job, resolve_input_file
+from app.leaderboard import get_top, leaderboard
+from app.ml.drift import get_drift_monitor
+from app.ml.inference import deadline_from_timeout, inference_queue
+from app.ml.registry import MODEL_NAME_PATTERN, model_registry
 from app.schemas import (
+    BatchPredictionResponse,
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    JobResponse,
+    LeaderboardEntry,
     PredictionFullResponse,
     PredictionInputCreate,
     PredictionInputResponse,
+    PredictionMode,
+    WhatIfRequest,
+    WhatIfResponse,
 )
 from app.services import (
     create_prediction_full_service,
     delete_prediction_input,
-    get_prediction_input_by_id,
-    get_prediction_inputs,
+    delete_prediction_inputs,
+    get_prediction_input_json,
+    get_prediction_inputs_json,
+    score_batch_service,
+    what_if_service,
 )
+from app.streaming import serve_prediction_stream
+from app.warmup import warmup_state
+
+# Corps de POST /predictions/batch, lu hors de FastAPI (format colonnes)
+COLUMNAR_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "additionalProperties": {"type": "array", "items": {}},
+                },
+                "example": {"age": [35, 42], "genre": ["M", "F"], "...": []},
+            },
+            MSGPACK: {
+                "schema": {
+                    "type": "object",
+                    "additionalProperties": {"type": "array", "items": {}},
+                }
+            },
+        },
+    }
+}
+# Corps de POST /predictions, également accepté en MessagePack
+PREDICTION_MSGPACK_BODY = {
+    "requestBody": {
+        "content": {
+            MSGPACK: {"schema": {"$ref": "#/components/schemas/PredictionInputCreate"}}
+        }
+    }
+}
+# Réponse également disponible en MessagePack (header Accept)
+MSGPACK_RESPONSE = {"content": {MSGPACK: {}}}
+
+
+def prediction_mode(
+    mode: PredictionMode = Query(
+        default="exact",
+        description=(
+            "`exact` : tous les arbres sont évalués. `decision` : l'évaluation "
+            "s'arrête dès que la décision au seuil est acquise ; la probabilité "
+            "est alors estimée sur les arbres utilisés (`trees_used`)."
+        ),
+    ),
+) -> PredictionMode:
+    return mode
+
+
+def header_model(
+    x_model: str | None = Header(
+        default=None,
+        alias="X-Model",
+        pattern=MODEL_NAME_PATTERN,
+        description="Modèle nommé à utiliser (par défaut : modèle principal)",
+    ),
+) -> str | None:
+    return x_model
+
+
+def request_deadline(
+    x_request_timeout: float | None = Header(
+        default=None,
+        alias="X-Request-Timeout",
+        gt=0,
+        description="Délai maximal (en secondes) accordé à la requête",
+    ),
+) -> float | None:
+    """Échéance absolue de la requête, calculée dès sa réception."""
+    return deadline_from_timeout(x_request_timeout)
+
+
+def path_model(
+    model_name: str = Path(
+        ...,
+        pattern=MODEL_NAME_PATTERN,
+        description="Nom du modèle (fichier `<nom>.pkl` de MODELS_DIR)",
+    ),
+) -> str:
+    return model_name
+
+
+@dataclass
+class PredictionRequest:
+    """Corps d'une prédiction unitaire et sa réservation d'idempotence."""
+
+    payload: PredictionInputCreate
+    mode: PredictionMode
+    model_name: str | None
+    claim: Claim | None
+
+
+def idempotent_prediction(model_dependency: Callable) -> Callable:
+    """
+    Dépendance qui valide le corps et réserve son Idempotency-Key. Placée avant
+    le créneau de concurrence de la clé API et la session de base : un doublon
+    qui attend la fin de la requête d'origine n'occupe ni l'un ni l'autre.
+    """
+
+    def claim_prediction(
+        payload: PredictionInputCreate,
+        api_key: str = Depends(verify_api_key),
+        idempotency_key: str | None = Header(
+            default=None, alias="Idempotency-Key", max_length=255
+        ),
+        mode: PredictionMode = Depends(prediction_mode),
+        model_name: str | None = Depends(model_dependency),
+    ) -> PredictionRequest:
+        if idempotency_key is None:
+            return PredictionRequest(payload, mode, model_name, None)
+        # La clé est propre à chaque client ; le contenu est comparé par empreinte
+        key = f"{api_key}:{idempotency_key}"
+        fingerprint = hashlib.sha256(
+            f"{model_name}:{mode}:{payload.model_dump_json()}".encode()
+        ).hexdigest()
+        try:
+            # Peut attendre la fin d'un doublon en cours
+            with span("idempotency_claim"):
+                claim = idempotency_store.claim(key, fingerprint)
+        except IdempotencyKeyReused:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key déjà utilisée avec un contenu différent.",
+            )
+        except IdempotencyInProgress:
+            raise HTTPException(
+                status_code=409,
+                detail="Une requête avec cette Idempotency-Key est toujours en cours.",
+            )
+        return PredictionRequest(payload, mode, model_name, claim)
+
+    return claim_prediction
+
+
+def cached_json_response(
+    request: Request, cached: CachedResponse, max_age: int
+) -> Response:
+    """
+    Réponse JSON avec ETag fort et Cache-Control ; 304 sans corps si le
+    client (ou un proxy) détient déjà cette version.
+    """
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": (
+            f"max-age={max_age}, must-revalidate" if max_age > 0 else "no-cache"
+        ),
+        # Les réponses dépendent de la clé API : un proxy les distingue par clé
+        "Vary": "X-API-Key",
+    }
+    if matches_etag(request.headers.get("If-None-Match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+async def _columnar_body(request: Request, max_rows: int) -> pd.DataFrame:
+    """Corps au format colonnes, décodé et validé hors de la boucle d'événements."""
+    body = await request.body()
+    parse = (
+        parse_columnar_msgpack
+        if isinstance(request, MsgpackRequest)
+        else parse_columnar
+    )
+    try:
+        with span("validation", bytes=len(body)):
+            return await run_in_threadpool(parse, body, max_rows)
+    except ColumnarValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+
+
+async def columnar_batch(request: Request) -> pd.DataFrame:
+    return await _columnar_body(request, settings.BATCH_MAX_ROWS)
+
+
+async def job_batch(
+    request: Request,
+    file: str | None = Query(
+        default=None,
+        description=(
+            "Fichier CSV ou Parquet de JOBS_INPUT_DIR à scorer, à la place d'un "
+            "lot dans le corps"
+        ),
+    ),
+) -> pd.DataFrame | None:
+    """Lot d'une tâche (jusqu'à JOBS_MAX_ROWS lignes) ; None si un fichier est référencé."""
+    if file is not None:
+        return None
+    return await _columnar_body(request, settings.JOBS_MAX_ROWS)
+
 
 api_router = APIRouter(
     prefix="",
+    # Corps et réponses en JSON ou MessagePack (app/core/wire.py)
+    route_class=NegotiatedRoute,
     responses={404: {"description": "Ressource non trouvée"}},
 )
 
@@ -51,6 +305,123 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now()}
 
 
+@api_router.get(
+    "/ready",
+    tags=["Général"],
+    summary="Disponibilité du service (préchauffage terminé)",
+    description=(
+        "Renvoie 200 une fois le préchauffage terminé (modèle, file d’inférence et "
+        "connexions de base ouvertes), 503 sinon. Indique la durée du préchauffage "
+        "et de chacune de ses étapes."
+    ),
+    response_description="État et durée du préchauffage",
+    responses={503: {"description": "Préchauffage en cours ou en échec"}},
+)
+async def readiness(response: Response):
+    if not warmup_state.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return warmup_state.as_dict()
+
+
+@api_router.get(
+    "/metrics/pool",
+    tags=["Monitoring"],
+    summary="Métriques du pool de connexions",
+    description=(
+        "Renvoie l’état du pool SQLAlchemy (connexions utilisées, débordement, saturation) "
+        "ainsi que la distribution du temps d’attente au checkout, pour dimensionner le pool."
+    ),
+    response_description="État et métriques du pool par moteur",
+)
+def pool_metrics(_: str = Depends(verify_api_key)):
+    return get_pool_status()
+
+
+@api_router.get(
+    "/metrics/api-keys",
+    tags=["Monitoring"],
+    summary="Consommation par clé API",
+    description=(
+        "Renvoie, pour chaque clé API configurée (identifiée par son nom), les requêtes "
+        "acceptées, les rejets pour débit ou concurrence et les inférences en cours."
+    ),
+    response_description="Compteurs d’utilisation par clé API",
+)
+def api_key_usage(_: str = Depends(verify_api_key)):
+    return get_usage()
+
+
+@api_router.get(
+    "/metrics/inference",
+    tags=["Monitoring"],
+    summary="État de la file d’inférence",
+    description=(
+        "Renvoie la profondeur courante de la file d’inférence et les compteurs de "
+        "tâches soumises, rejetées (file pleine), expirées (échéance dépassée) et terminées."
+    ),
+    response_description="Compteurs de la file d’inférence",
+)
+def inference_metrics(_: str = Depends(verify_api_key)):
+    return inference_queue.stats()
+
+
+@api_router.get(
+    "/metrics/models",
+    tags=["Monitoring"],
+    summary="Registre des modèles nommés",
+    description=(
+        "Renvoie les modèles nommés disponibles et chargés (version, mémoire, "
+        "requêtes en cours), le budget mémoire et les compteurs de chargements, "
+        "d’attentes, de succès de cache et d’évictions."
+    ),
+    response_description="État du registre de modèles",
+)
+def model_registry_metrics(_: str = Depends(verify_api_key)):
+    return model_registry.stats()
+
+
+@api_router.get(
+    "/metrics/cache",
+    tags=["Monitoring"],
+    summary="Caches de lecture des prédictions",
+    description=(
+        "Renvoie, pour le cache par id et le cache des pages de liste, le nombre "
+        "d’entrées, la borne, le TTL et les compteurs de succès, d’échecs et "
+        "d’invalidations, ainsi que l’état du classement des risques (propres au "
+        "worker qui répond)."
+    ),
+    response_description="Compteurs des caches de lecture",
+)
+def cache_metrics(_: str = Depends(verify_api_key)):
+    return {
+        "predictions": prediction_cache.stats(),
+        "lists": prediction_list_cache.stats(),
+        "leaderboard": leaderboard.stats(),
+    }
+
+
+@api_router.get(
+    "/metrics/drift",
+    tags=["Monitoring"],
+    summary="Dérive des entrées et des probabilités",
+    description=(
+        "Compare les entrées reçues depuis le démarrage du suivi au profil de référence "
+        "du modèle : PSI et divergence KL par variable et pour les probabilités "
+        "prédites, moyennes et écarts-types, comptes des modalités. Les variables "
+        "dont le PSI dépasse le seuil de dérive significative sont listées."
+    ),
+    response_description="Indicateurs de dérive par variable",
+)
+def drift_metrics(_: str = Depends(verify_api_key)):
+    monitor = get_drift_monitor()
+    if monitor is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Surveillance de la dérive inactive (profil de référence absent).",
+        )
+    return monitor.report()
+
+
 @api_router.get(
     "/erd",
     tags=["Documentation"],
@@ -95,30 +466,243 @@ def get_erd_mermaid():
     description=(
         "Crée une nouvelle entrée de données, applique le modèle de Machine Learning et "
         "retourne la prédiction correspondante.\n\n"
-        "L'entrée est enregistrée dans la base avec sa sortie associée (probabilité, seuil, résultat binaire)."
+        "L'entrée est enregistrée dans la base avec sa sortie associée (probabilité, seuil, résultat binaire).\n\n"
+        "Avec un header `Idempotency-Key`, une requête rejouée renvoie la réponse d'origine "
+        "sans nouvelle inférence ni nouvelle écriture.\n\n"
+        "Le header `X-Request-Timeout` (secondes) fixe une échéance : une requête "
+        "expirée est abandonnée avant l'inférence.\n\n"
+        "Avec `mode=decision`, l'évaluation de la forêt s'arrête dès que la décision "
+        "ne peut plus changer ; la réponse indique le nombre d'arbres utilisés.\n\n"
+        "Le header `X-Model` (ou la route `/models/{model_name}/predictions`) "
+        "choisit un modèle nommé, chargé à la demande.\n\n"
+        "Corps et réponse en JSON ou en MessagePack (`Content-Type` / `Accept: "
+        "application/msgpack`)."
     ),
     response_model=PredictionFullResponse,
     response_description="Objet combiné contenant l'entrée enregistrée et le résultat du modèle.",
     status_code=status.HTTP_201_CREATED,
+    responses={
+        201: MSGPACK_RESPONSE,
+        404: {"description": "Modèle nommé inconnu"},
+        409: {"description": "Matricule déjà existant ou requête identique en cours"},
+        422: {"description": "Clé d'idempotence réutilisée avec un contenu différent"},
+        429: {
+            "description": "Limite de débit ou de concurrence de la clé API atteinte"
+        },
+    },
+    openapi_extra=PREDICTION_MSGPACK_BODY,
 )
 def create_prediction(
-    payload: PredictionInputCreate,
+    response: Response,
+    deadline: float | None = Depends(request_deadline),
+    # Idempotence résolue avant le créneau de concurrence et la session
+    prediction: PredictionRequest = Depends(idempotent_prediction(header_model)),
+    # Authentification et limites avant toute ouverture de session
+    _: str = Depends(acquire_inference_slot),
     db: Session = Depends(get_db),
-    _: str = Depends(verify_api_key),
 ):
-    return create_prediction_full_service(db, payload)
+    claim = prediction.claim
+    if claim is not None and claim.replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+        return claim.response
+
+    try:
+        result = create_prediction_full_service(
+            db,
+            prediction.payload,
+            deadline=deadline,
+            mode=prediction.mode,
+            model_name=prediction.model_name,
+        )
+    except BaseException:
+        if claim is not None:
+            idempotency_store.release(claim.key)
+        raise
+    if claim is not None:
+        idempotency_store.complete(claim.key, result)
+    return result
+
+
+@api_router.post(
+    "/predictions/batch",
+    tags=["Prédictions"],
+    summary="Scorer un lot au format colonnes",
+    description=(
+        "Applique le modèle à un lot transmis au format colonnes "
+        "`{champ: [valeurs...]}`, avec les noms de champs d'une prédiction unitaire "
+        "(`matricule` est facultatif et ignoré).\n\n"
+        "Le lot est validé colonne par colonne (enums, bornes, cohérence) sans "
+        "construire d'objet par ligne. Les résultats ne sont pas enregistrés en base.\n\n"
+        "`mode=decision` active l'arrêt anticipé de la forêt (voir POST /predictions). "
+        "Le header `X-Model` choisit un modèle nommé.\n\n"
+        "Corps et réponse en JSON ou en MessagePack (`Content-Type` / `Accept: "
+        "application/msgpack`)."
+    ),
+    response_model=BatchPredictionResponse,
+    response_description="Prédictions et probabilités, dans l'ordre des lignes reçues.",
+    responses={
+        200: MSGPACK_RESPONSE,
+        404: {"description": "Modèle nommé inconnu"},
+        422: {"description": "Lot invalide (erreurs par colonne et lignes fautives)"},
+        429: {
+            "description": "Limite de débit ou de concurrence de la clé API atteinte"
+        },
+    },
+    openapi_extra=COLUMNAR_BODY,
+)
+def score_batch(
+    # Authentification et limites avant la lecture du corps
+    _: str = Depends(acquire_inference_slot),
+    X: pd.DataFrame = Depends(columnar_batch),
+    deadline: float | None = Depends(request_deadline),
+    mode: PredictionMode = Depends(prediction_mode),
+    model_name: str | None = Depends(header_model),
+):
+    return score_batch_service(X, deadline=deadline, mode=mode, model_name=model_name)
+
+
+@api_router.post(
+    "/predictions/what-if",
+    tags=["Prédictions"],
+    summary="Simuler l'effet d'une ou deux caractéristiques",
+    description=(
+        "Fait varier une ou deux caractéristiques d'un profil de base et renvoie la "
+        "probabilité de départ pour chaque valeur (ou chaque combinaison de deux "
+        "valeurs), avec l'écart au profil de base.\n\n"
+        "Toute la grille est scorée en un seul appel au modèle, dans la limite de "
+        "`WHATIF_MAX_POINTS` points. Rien n'est enregistré en base.\n\n"
+        "Le header `X-Model` choisit un modèle nommé. Corps et réponse en JSON ou "
+        "en MessagePack."
+    ),
+    response_model=WhatIfResponse,
+    response_description="Valeurs de la grille et probabilités, point par point.",
+    responses={
+        200: MSGPACK_RESPONSE,
+        404: {"description": "Modèle nommé inconnu"},
+        422: {"description": "Grille invalide ou trop grande"},
+        429: {
+            "description": "Limite de débit ou de concurrence de la clé API atteinte"
+        },
+    },
+)
+def what_if(
+    payload: WhatIfRequest,
+    _: str = Depends(acquire_inference_slot),
+    deadline: float | None = Depends(request_deadline),
+    model_name: str | None = Depends(header_model),
+):
+    return what_if_service(payload, deadline=deadline, model_name=model_name)
+
+
+@api_router.websocket("/ws/predictions")
+async def predictions_stream(
+    websocket: WebSocket,
+    mode: PredictionMode = Depends(prediction_mode),
+    model_name: str | None = Depends(header_model),
+    api_key: str | None = Query(
+        default=None,
+        description="Clé API, si le client ne peut pas envoyer le header X-API-Key",
+    ),
+):
+    """
+    Canal de scoring continu : messages `{"id": ..., "input": {...}}`, un
+    résultat `{"id": ..., "prediction", "probability", "threshold"}` (ou
+    `{"id": ..., "error": {...}}`) par message, sans enregistrement en base.
+    La clé API est vérifiée à l'ouverture ; la connexion occupe un créneau
+    d'inférence concurrente de la clé (fermeture 1008 ou 1013 sinon).
+    """
+    key = websocket.headers.get("X-API-Key") or api_key
+    try:
+        await verify_api_key(key)
+    except HTTPException as e:
+        code = status.WS_1008_POLICY_VIOLATION
+        if e.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            code = status.WS_1013_TRY_AGAIN_LATER
+        await websocket.close(code=code, reason=e.detail)
+        return
+    if model_name is not None and model_name not in model_registry.available():
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"Modèle inconnu : {model_name}",
+        )
+        return
+    limiter = limiters[key]
+    if not limiter.acquire_slot():
+        await websocket.close(
+            code=status.WS_1013_TRY_AGAIN_LATER,
+            reason="Too many concurrent inferences for this API key.",
+        )
+        return
+    try:
+        await websocket.accept()
+        await serve_prediction_stream(websocket, mode, model_name)
+    finally:
+        limiter.release_slot()
+
+
+@api_router.post(
+    "/models/{model_name}/predictions",
+    tags=["Prédictions"],
+    summary="Créer une prédiction avec un modèle nommé",
+    description=(
+        "Identique à POST /predictions avec le header `X-Model` : le modèle "
+        "`model_name` est chargé à la demande puis gardé en mémoire tant que le "
+        "budget le permet."
+    ),
+    response_model=PredictionFullResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={201: MSGPACK_RESPONSE, 404: {"description": "Modèle nommé inconnu"}},
+    openapi_extra=PREDICTION_MSGPACK_BODY,
+)
+def create_prediction_with_model(
+    response: Response,
+    deadline: float | None = Depends(request_deadline),
+    prediction: PredictionRequest = Depends(idempotent_prediction(path_model)),
+    _: str = Depends(acquire_inference_slot),
+    db: Session = Depends(get_db),
+):
+    return create_prediction(response, deadline, prediction, _, db)
+
+
+@api_router.post(
+    "/models/{model_name}/predictions/batch",
+    tags=["Prédictions"],
+    summary="Scorer un lot avec un modèle nommé",
+    description="Identique à POST /predictions/batch avec le header `X-Model`.",
+    response_model=BatchPredictionResponse,
+    responses={
+        200: MSGPACK_RESPONSE,
+        404: {"description": "Modèle nommé inconnu"},
+        422: {"description": "Lot invalide (erreurs par colonne et lignes fautives)"},
+    },
+    openapi_extra=COLUMNAR_BODY,
+)
+def score_batch_with_model(
+    model_name: str = Depends(path_model),
+    _: str = Depends(acquire_inference_slot),
+    X: pd.DataFrame = Depends(columnar_batch),
+    deadline: float | None = Depends(request_deadline),
+    mode: PredictionMode = Depends(prediction_mode),
+):
+    return score_batch_service(X, deadline=deadline, mode=mode, model_name=model_name)
 
 
 @api_router.get(
     "/predictions",
     tags=["Prédictions"],
     summary="Lister les entrées de prédiction",
-    description="Renvoie la liste paginée des entrées enregistrées dans la base de données. Permet de filtrer par matricule.",
+    description=(
+        "Renvoie la liste paginée des entrées enregistrées dans la base de données. "
+        "Permet de filtrer par matricule. Les pages sont mises en cache quelques "
+        "secondes ; la réponse porte un ETag (304 si `If-None-Match` correspond)."
+    ),
     response_model=list[PredictionInputResponse],
     response_description="Liste des entrées enregistrées, avec leur horodatage de création.",
+    responses={304: {"description": "Page inchangée"}},
 )
 def list_predictions(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 10,
     matricule: str | None = None,
@@ -127,30 +711,72 @@ def list_predictions(
     """
     Liste les entrées de prédiction stockées, avec option de filtrage par matricule.
     """
-    return get_prediction_inputs(db, skip, limit, matricule)
+    cached = get_prediction_inputs_json(
+        db, skip, limit, matricule, use_cache=not wrote_recently(request)
+    )
+    return cached_json_response(
+        request, cached, settings.PREDICTION_LIST_HTTP_MAX_AGE_SECONDS
+    )
+
+
+@api_router.get(
+    "/predictions/top",
+    tags=["Prédictions"],
+    summary="Employés les plus à risque",
+    description=(
+        "Renvoie les `k` prédictions enregistrées de plus forte probabilité de "
+        "départ, éventuellement pour un département et/ou un poste.\n\n"
+        "Le classement est tenu en mémoire par segment et mis à jour à chaque "
+        "prédiction enregistrée ou supprimée : la réponse ne dépend pas de la "
+        "taille de la table. Il est reconstruit depuis la base au premier accès "
+        "et toutes les `LEADERBOARD_TTL_SECONDS` secondes."
+    ),
+    response_model=list[LeaderboardEntry],
+    response_description="Entrées par probabilité décroissante.",
+)
+def top_predictions(
+    db: Session = Depends(get_read_db),
+    k: int = Query(default=10, ge=1, le=settings.LEADERBOARD_DEPTH),
+    departement: Departement | None = None,
+    poste: Poste | None = None,
+    _: str = Depends(verify_api_key),
+):
+    return get_top(db, k, departement, poste)
 
 
 @api_router.get(
     "/predictions/{prediction_id}",
     tags=["Prédictions"],
     summary="Obtenir une prédiction par ID",
-    description="Récupère une entrée de prédiction précise grâce à son identifiant unique.",
+    description=(
+        "Récupère une entrée de prédiction précise grâce à son identifiant unique. "
+        "La réponse porte un ETag fort et un Cache-Control : un client peut la "
+        "revalider avec `If-None-Match` (304 si inchangée)."
+    ),
     response_model=PredictionInputResponse,
     response_description="Objet contenant les informations de l'entrée demandée.",
-    responses={404: {"description": "Prédiction introuvable"}},
+    responses={
+        304: {"description": "Prédiction inchangée"},
+        404: {"description": "Prédiction introuvable"},
+    },
 )
 def get_prediction(
     prediction_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     _: str = Depends(verify_api_key),
 ):
     """
     Récupère une entrée de prédiction par son ID.
     """
-    prediction = get_prediction_input_by_id(db, prediction_id)
-    if not prediction:
+    cached = get_prediction_input_json(
+        db, prediction_id, use_cache=not wrote_recently(request)
+    )
+    if cached is None:
         raise HTTPException(status_code=404, detail="Prediction not found")
-    return prediction
+    return cached_json_response(
+        request, cached, settings.PREDICTION_HTTP_MAX_AGE_SECONDS
+    )
 
 
 @api_router.delete(
@@ -179,3 +805,103 @@ def delete_prediction(
     if not success:
         raise HTTPException(status_code=404, detail="Prediction not found")
     return Response(status_code=204)
+
+
+@api_router.post(
+    "/predictions/delete",
+    tags=["Prédictions"],
+    summary="Supprimer des prédictions en masse",
+    description=(
+        "Supprime définitivement les entrées (et leurs sorties) vérifiant tous les "
+        "critères fournis : liste d’identifiants, liste de matricules, période de "
+        "création. Au moins un critère est requis. La suppression s’effectue par lots "
+        "d’au plus `BULK_DELETE_BATCH_SIZE` entrées, une transaction par lot, ce qui "
+        "convient aux purges volumineuses (demandes RGPD). Cette action est irréversible."
+    ),
+    response_model=BulkDeleteResponse,
+    response_description="Nombre d’entrées et de sorties supprimées, nombre de lots.",
+)
+def bulk_delete_predictions(
+    criteria: BulkDeleteRequest,
+    db: Session = Depends(get_db),
+    _: str = Depends(verify_api_key),
+):
+    """
+    Supprime en masse les entrées de prédiction vérifiant les critères.
+    """
+    return delete_prediction_inputs(db, criteria)
+
+
+@api_router.post(
+    "/jobs",
+    tags=["Tâches"],
+    summary="Créer une tâche de scoring asynchrone",
+    description=(
+        "Enregistre un lot à scorer en arrière-plan et renvoie aussitôt l’id de la "
+        "tâche (202, header `Location`). Le lot est transmis au format colonnes "
+        "(voir POST /predictions/batch, jusqu’à `JOBS_MAX_ROWS` lignes) ou référencé "
+        "par `file` : fichier CSV ou Parquet du répertoire partagé `JOBS_INPUT_DIR`.\n\n"
+        "La tâche est découpée en blocs de `JOBS_CHUNK_SIZE` lignes, répartis entre "
+        "les workers de tous les processus API via la file PostgreSQL. Suivre la "
+        "progression avec GET /jobs/{job_id}."
+    ),
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        404: {"description": "Modèle nommé inconnu"},
+        422: {"description": "Lot invalide ou fichier introuvable"},
+    },
+    openapi_extra={"requestBody": {**COLUMNAR_BODY["requestBody"], "required": False}},
+)
+def create_job_endpoint(
+    request: Request,
+    response: Response,
+    _: str = Depends(verify_api_key),
+    X: pd.DataFrame | None = Depends(job_batch),
+    file: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+    mode: PredictionMode = Depends(prediction_mode),
+    model_name: str | None = Depends(header_model),
+):
+    if model_name is not None and model_name not in model_registry.available():
+        raise HTTPException(status_code=404, detail=f"Modèle inconnu : {model_name}")
+    if file is not None:
+        try:
+            resolve_input_file(file)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=422, detail=[{"loc": ["query", "file"], "msg": str(e)}]
+            )
+    job = create_job(db, X, source_file=file, mode=mode, model_name=model_name)
+    response.headers["Location"] = str(
+        request.url_for("get_job_endpoint", job_id=job.id)
+    )
+    return get_job(db, job.id)
+
+
+@api_router.get(
+    "/jobs/{job_id}",
+    tags=["Tâches"],
+    summary="Suivre une tâche de scoring asynchrone",
+    description=(
+        "Renvoie l’état de la tâche, sa progression (lignes et blocs scorés) et les "
+        "blocs en échec. Une fois la tâche terminée, la réponse contient une page de "
+        "résultats dans l’ordre des lignes (`offset`, `limit` ≤ `JOBS_RESULTS_PAGE_MAX`) ; "
+        "les lignes d’un bloc en échec valent null."
+    ),
+    response_model=JobResponse,
+    responses={404: {"description": "Tâche inconnue"}},
+)
+def get_job_endpoint(
+    job_id: int,
+    offset: int = Query(default=0, ge=0, description="Première ligne de résultats"),
+    limit: int | None = Query(
+        default=None, ge=1, description="Lignes de résultats (défaut : maximum)"
+    ),
+    db: Session = Depends(get_db),
+    _: str = Depends(verify_api_key),
+):
+    job = get_job(db, job_id, offset, limit)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,295 @@
+# app/archive.py
+"""
+Rétention des tables de prédiction partitionnées : les partitions mensuelles
+froides sont exportées en Parquet compressé (lecture en flux, partition par
+partition) puis détachées et supprimées. Les archives restent interrogeables
+via `read_archive` (commande `read`, export CSV).
+
+Les entrées archivées sont retirées du magasin de caractéristiques. Le cache
+des réponses et le classement des workers de l'API sont en mémoire : ils
+peuvent servir les lignes archivées jusqu'à expiration
+(PREDICTION_CACHE_TTL_SECONDS, LEADERBOARD_TTL_SECONDS).
+
+Usage :
+    python -m app.archive run [--retention-months N] [--dry-run]
+    python -m app.archive list
+    python -m app.archive read TABLE [--start AAAA-MM-JJ] [--end AAAA-MM-JJ]
+        [--columns COL ...] [--output FICHIER.csv]
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import UTC, date, datetime, time
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import DateTime, Float, Integer, MetaData, func, select, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.core.partitioning import (
+    PARTITIONED_TABLES,
+    add_months,
+    create_month_partition,
+    default_months,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    partition_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _to_arrow_value(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def _arrow_schema(table) -> pa.Schema:
+    """Schéma Parquet fixe déduit des types SQLAlchemy (stable d'un bloc à l'autre)."""
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, (Integer, Float)):
+            kind = pa.int64() if isinstance(column.type, Integer) else pa.float64()
+        elif isinstance(column.type, DateTime):
+            kind = pa.timestamp("us", tz="UTC")
+        else:
+            kind = pa.string()
+        fields.append(pa.field(column.name, kind, nullable=column.nullable))
+    return pa.schema(fields)
+
+
+def archive_partition(
+    db_engine: Engine,
+    table: str,
+    partition: str,
+    month: date,
+    archive_dir: Path,
+    chunk_size: int,
+) -> tuple[Path | None, np.ndarray]:
+    """
+    Exporte une partition vers
+    `archive_dir/<table>/<YYYY-MM>_<id min>-<id max>.parquet` par blocs de
+    `chunk_size` lignes (curseur côté serveur). Retourne le chemin du fichier
+    (None si la partition est vide) et les ids exportés.
+
+    Le nom dépend du contenu : une partition réexportée après une interruption
+    (fichier écrit, partition pas encore supprimée) remplace son propre
+    fichier, et les lignes d'un mois déjà archivé arrivées ensuite par la
+    partition par défaut vont dans un fichier distinct.
+    """
+    # Copie de la table ORM sous le nom de la partition : conserve les types
+    # (les enums sont relus comme valeurs métier, pas comme noms SQL)
+    source = Base.metadata.tables[table].to_metadata(MetaData(), name=partition)
+    with db_engine.connect() as connection:
+        low, high = connection.execute(
+            select(func.min(source.c.id), func.max(source.c.id))
+        ).one()
+    if low is None:
+        return None, np.empty(0, dtype=np.int64)
+    target = archive_dir / table / f"{month:%Y-%m}_{low}-{high}.parquet"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix(".parquet.tmp")
+
+    schema = _arrow_schema(source)
+    ids = []
+    with db_engine.connect() as connection, pq.ParquetWriter(
+        tmp_path, schema, compression="zstd"
+    ) as writer:
+        result = connection.execution_options(
+            stream_results=True, yield_per=chunk_size
+        ).execute(select(source).order_by(source.c.id))
+        for rows in result.partitions():
+            data = {
+                name: [_to_arrow_value(v) for v in values]
+                for name, values in zip(schema.names, zip(*rows))
+            }
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            ids.append(np.asarray(data["id"], dtype=np.int64))
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    tmp_path.replace(target)
+    return target, np.concatenate(ids)
+
+
+def drop_partition(db_engine: Engine, table: str, partition: str) -> None:
+    """Détache puis supprime une partition."""
+    with db_engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+        connection.execute(text(f"DROP TABLE {partition}"))
+
+
+def run_retention(
+    db_engine: Engine = engine,
+    retention_months: int | None = None,
+    archive_dir: Path | None = None,
+    today: date | None = None,
+    dry_run: bool = False,
+) -> list[dict]:
+    """
+    Archive et supprime les partitions antérieures à la fenêtre de rétention,
+    puis crée les partitions des prochains mois. Les lignes de la partition
+    par défaut sont d'abord rangées dans la partition de leur mois.
+    """
+    retention_months = (
+        settings.ARCHIVE_RETENTION_MONTHS
+        if retention_months is None
+        else retention_months
+    )
+    archive_dir = Path(archive_dir or settings.ARCHIVE_DIR)
+    today = today or date.today()
+    cutoff = add_months(month_start(today), -retention_months)
+
+    report = []
+    with db_engine.begin() as connection:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(connection, table):
+                raise RuntimeError(
+                    f"La table {table} n'est pas partitionnée (DB_PARTITIONING)."
+                )
+        # Lignes tombées dans la partition par défaut (mois sans partition) :
+        # rangées dans leur partition mensuelle, archivée ensuite si froide
+        stranded = [
+            (table, month)
+            for table in PARTITIONED_TABLES
+            for month in default_months(connection, table)
+        ]
+        if not dry_run:
+            for table, month in stranded:
+                create_month_partition(connection, table, month)
+        cold = [
+            (table, name, month)
+            for table in PARTITIONED_TABLES
+            for name, month in list_partitions(connection, table)
+            if month < cutoff
+        ]
+        if dry_run:
+            cold += [
+                (table, partition_name(table, month), month)
+                for table, month in stranded
+                if month < cutoff
+            ]
+
+    archived_inputs = []
+    for table, partition, month in cold:
+        if dry_run:
+            report.append({"table": table, "partition": partition, "rows": None})
+            continue
+        path, ids = archive_partition(
+            db_engine, table, partition, month, archive_dir, settings.ARCHIVE_CHUNK_SIZE
+        )
+        drop_partition(db_engine, table, partition)
+        if table == "prediction_inputs":
+            archived_inputs.append(ids)
+        logger.info(f"🗄️ Partition {partition} archivée ({len(ids)} lignes) → {path}")
+        report.append(
+            {
+                "table": table,
+                "partition": partition,
+                "rows": len(ids),
+                "path": str(path) if path else None,
+            }
+        )
+
+    if not dry_run:
+        with db_engine.begin() as connection:
+            ensure_partitions(connection, today, settings.DB_PARTITIONS_AHEAD)
+        if archived_inputs:
+            discard_archived_features(np.concatenate(archived_inputs))
+    return report
+
+
+def discard_archived_features(prediction_input_ids: np.ndarray) -> None:
+    """Retire du magasin de caractéristiques les entrées archivées."""
+    store_dir = Path(settings.FEATURE_STORE_DIR)
+    if not settings.FEATURE_STORE_ENABLED or not store_dir.exists():
+        return
+    # Import différé : le magasin charge le modèle servi
+    from app.ml.features import FeatureStore
+
+    store = FeatureStore(store_dir)
+    if store.meta() is not None and len(prediction_input_ids):
+        store.delete(prediction_input_ids)
+
+
+def read_archive(
+    table: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: list[str] | None = None,
+    archive_dir: Path | None = None,
+) -> pd.DataFrame:
+    """
+    Lit les données archivées d'une table, filtrées sur created_at
+    (intervalle [start, end[). Seuls les fichiers concernés sont lus.
+    """
+    directory = Path(archive_dir or settings.ARCHIVE_DIR) / table
+    files = sorted(directory.glob("*.parquet"))
+    if not files:
+        return pd.DataFrame(columns=columns)
+    # Schéma courant : les colonnes ajoutées depuis un archivage sont lues à null
+    schema = _arrow_schema(Base.metadata.tables[table])
+    dataset = ds.dataset(files, format="parquet", schema=schema)
+    condition = None
+    if start is not None:
+        condition = ds.field("created_at") >= pa.scalar(start)
+    if end is not None:
+        upper = ds.field("created_at") < pa.scalar(end)
+        condition = upper if condition is None else condition & upper
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def _utc_date(value: str) -> datetime:
+    return datetime.combine(date.fromisoformat(value), time(), tzinfo=UTC)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Archivage des partitions froides")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Archive puis supprime les partitions froides")
+    run.add_argument("--retention-months", type=int, default=None)
+    run.add_argument("--dry-run", action="store_true")
+    sub.add_parser("list", help="Liste les partitions existantes")
+    read = sub.add_parser("read", help="Exporte en CSV des données archivées")
+    read.add_argument("table", choices=PARTITIONED_TABLES)
+    read.add_argument("--start", type=_utc_date, default=None)
+    read.add_argument("--end", type=_utc_date, default=None)
+    read.add_argument("--columns", nargs="+", default=None)
+    read.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    if args.command == "run":
+        for item in run_retention(
+            retention_months=args.retention_months, dry_run=args.dry_run
+        ):
+            print(item)
+        if not args.dry_run:
+            # Caches en mémoire des workers de l'API : pas d'invalidation
+            # entre processus, seule leur durée de vie borne le délai
+            print(
+                "Les workers de l'API peuvent servir les lignes archivées encore "
+                f"{settings.PREDICTION_CACHE_TTL_SECONDS:g} s (cache des réponses) "
+                f"et {settings.LEADERBOARD_TTL_SECONDS:g} s (classement)."
+            )
+    elif args.command == "read":
+        frame = read_archive(args.table, args.start, args.end, args.columns)
+        frame.to_csv(args.output or sys.stdout, index=False)
+    else:
+        with engine.connect() as connection:
+            for table in PARTITIONED_TABLES:
+                for name, month in list_partitions(connection, table):
+                    print(f"{table}\t{name}\t{month:%Y-%m}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# app/columnar.py
+"""
+Format colonnes pour le scoring par lot : `{"<champ>": [valeurs...]}`, avec
+les noms de champs de `PredictionInputBase`.
+
+La validation est faite colonne par colonne, directement sur des tableaux
+numpy : types, ensembles de valeurs des enums (`app/enums.py`), bornes des
+champs et règles de cohérence de `PredictionInputCreate` (`app/schemas.py`).
+Aucun objet Pydantic ni dictionnaire n'est créé par ligne.
+"""
+
+from dataclasses import dataclass
+from enum import Enum, IntEnum
+from typing import Any
+
+import msgpack
+import numpy as np
+import orjson
+import pandas as pd
+
+from app.schemas import PredictionInputBase
+
+# Nombre maximal de lignes fautives citées par erreur
+_MAX_REPORTED_ROWS = 5
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    name: str
+    kind: str  # "int", "float" ou "category"
+    allowed: np.ndarray | None = None
+    ge: float | None = None
+    le: float | None = None
+
+
+class ColumnarValidationError(Exception):
+    """Corps invalide ; `errors` suit le format des erreurs 422 de FastAPI."""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _spec(name: str, field) -> ColumnSpec:
+    annotation = field.annotation
+    bounds = {}
+    for constraint in field.metadata:
+        for attr in ("ge", "le"):
+            if getattr(constraint, attr, None) is not None:
+                bounds[attr] = getattr(constraint, attr)
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        values = [member.value for member in annotation]
+        kind = "int" if issubclass(annotation, IntEnum) else "category"
+        return ColumnSpec(name, kind, allowed=np.array(values), **bounds)
+    kind = "int" if annotation is int else "float"
+    return ColumnSpec(name, kind, **bounds)
+
+
+# Colonnes du modèle (le matricule est accepté mais ignoré)
+COLUMN_SPECS = {
+    name: _spec(name, field)
+    for name, field in PredictionInputBase.model_fields.items()
+    if name != "matricule"
+}
+OPTIONAL_COLUMNS = {"matricule"}
+
+
+def _error(field: str | None, msg: str, rows: np.ndarray | None = None) -> dict:
+    error = {"loc": ["body"] + ([field] if field else []), "msg": msg}
+    if rows is not None:
+        error["rows"] = rows[:_MAX_REPORTED_ROWS].tolist()
+        error["count"] = int(len(rows))
+    return error
+
+
+def _convert(spec: ColumnSpec, values: list) -> tuple[np.ndarray | None, list]:
+    """Convertit une liste JSON en tableau numpy typé et valide ses valeurs."""
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        return None, [_error(spec.name, "Valeurs scalaires attendues.")]
+    if array.ndim != 1:
+        return None, [_error(spec.name, "Valeurs scalaires attendues.")]
+
+    if spec.kind == "category":
+        if array.dtype.kind != "U":
+            return None, [_error(spec.name, "Chaînes de caractères attendues.")]
+    else:
+        if array.dtype.kind not in "iuf":
+            return None, [_error(spec.name, "Nombres attendus.")]
+        if spec.kind == "int":
+            if array.dtype.kind == "f":
+                fractional = np.flatnonzero(array != np.floor(array))
+                if len(fractional):
+                    return None, [_error(spec.name, "Entiers attendus.", fractional)]
+            array = array.astype(np.int64)
+        else:
+            array = array.astype(np.float64)
+
+    errors = []
+    if spec.allowed is not None:
+        invalid = np.flatnonzero(~np.isin(array, spec.allowed))
+        if len(invalid):
+            allowed = ", ".join(str(v) for v in spec.allowed.tolist())
+            errors.append(
+                _error(spec.name, f"Valeurs autorisées : {allowed}.", invalid)
+            )
+    if spec.ge is not None:
+        invalid = np.flatnonzero(array < spec.ge)
+        if len(invalid):
+            errors.append(_error(spec.name, f"Doit être ≥ {spec.ge}.", invalid))
+    if spec.le is not None:
+        invalid = np.flatnonzero(array > spec.le)
+        if len(invalid):
+            errors.append(_error(spec.name, f"Doit être ≤ {spec.le}.", invalid))
+    return array, errors
+
+
+def _check_coherence(columns: dict[str, np.ndarray]) -> list[dict]:
+    """Version vectorisée de PredictionInputCreate.check_coherence_globale."""
+    total = columns["annee_experience_totale"]
+    rules = [
+        (
+            "annees_dans_le_poste_actuel",
+            columns["annees_dans_le_poste_actuel"] > total,
+            "Le nombre d’années dans le poste actuel ne peut pas dépasser l’expérience totale.",
+        ),
+        (
+            "annees_dans_l_entreprise",
+            columns["annees_dans_l_entreprise"] > total,
+            "L’ancienneté dans l’entreprise ne peut pas dépasser l’expérience totale.",
+        ),
+        (
+            "mobilite_interne_ratio",
+            (columns["mobilite_interne_ratio"] < 0)
+            | (columns["mobilite_interne_ratio"] > 1),
+            "Le ratio de mobilité interne doit être compris entre 0 et 1.",
+        ),
+        (
+            "ratio_anciennete",
+            (columns["ratio_anciennete"] < 0) | (columns["ratio_anciennete"] > 1),
+            "Le ratio d’ancienneté doit être compris entre 0 et 1.",
+        ),
+        (
+            "delta_evaluation",
+            (columns["delta_evaluation"] < -5) | (columns["delta_evaluation"] > 5),
+            "L’écart d’évaluation doit être compris entre -5 et 5.",
+        ),
+    ]
+    errors = []
+    for field, invalid, msg in rules:
+        rows = np.flatnonzero(invalid)
+        if len(rows):
+            errors.append(_error(field, msg, rows))
+    return errors
+
+
+def parse_columnar(body: bytes, max_rows: int) -> pd.DataFrame:
+    """
+    Décode et valide un corps au format colonnes.
+    Retourne un DataFrame prêt pour le pipeline (colonnes dans l'ordre du schéma).
+    Lève ColumnarValidationError avec l'ensemble des erreurs détectées.
+    """
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise ColumnarValidationError([_error(None, f"JSON invalide : {e}")])
+    return validate_columns(data, max_rows)
+
+
+def parse_columnar_msgpack(body: bytes, max_rows: int) -> pd.DataFrame:
+    """Comme parse_columnar, pour un corps MessagePack."""
+    try:
+        data = msgpack.unpackb(body, raw=False)
+    except (ValueError, TypeError, msgpack.UnpackException) as e:
+        raise ColumnarValidationError([_error(None, f"MessagePack invalide : {e}")])
+    return validate_columns(data, max_rows)
+
+
+def validate_columns(data: Any, max_rows: int) -> pd.DataFrame:
+    """Valide des colonnes déjà décodées `{champ: [valeurs...]}` (voir parse_columnar)."""
+    if not isinstance(data, dict):
+        raise ColumnarValidationError(
+            [_error(None, "Objet {champ: [valeurs...]} attendu.")]
+        )
+
+    errors = [
+        _error(name, "Champ inconnu.")
+        for name in data
+        if name not in COLUMN_SPECS and name not in OPTIONAL_COLUMNS
+    ]
+    errors += [
+        _error(name, "Champ obligatoire.") for name in COLUMN_SPECS if name not in data
+    ]
+    errors += [
+        _error(name, "Liste de valeurs attendue.")
+        for name, values in data.items()
+        if not isinstance(values, list)
+    ]
+    if errors:
+        raise ColumnarValidationError(errors)
+
+    lengths = {len(values) for values in data.values()}
+    if len(lengths) != 1:
+        raise ColumnarValidationError(
+            [_error(None, "Toutes les colonnes doivent avoir la même longueur.")]
+        )
+    rows = lengths.pop()
+    if rows == 0 or rows > max_rows:
+        raise ColumnarValidationError(
+            [_error(None, f"Le lot doit contenir entre 1 et {max_rows} lignes.")]
+        )
+
+    columns = {}
+    for name, spec in COLUMN_SPECS.items():
+        array, column_errors = _convert(spec, data[name])
+        errors += column_errors
+        if array is not None:
+            columns[name] = array
+    if not errors:
+        errors = _check_coherence(columns)
+    if errors:
+        raise ColumnarValidationError(errors)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,117 @@
+# app/core/cache.py
+"""
+Caches de lecture en mémoire (propres au processus) pour les prédictions
+enregistrées : réponses JSON déjà sérialisées et leur ETag fort.
+
+- Cache par id : borné en nombre d'entrées (LRU) ; le TTL limite la durée
+  pendant laquelle un autre worker ou un recalcul hors processus peut
+  laisser une entrée périmée.
+- Cache des pages de liste : TTL court.
+- Une invalidation (suppression) pendant un chargement empêche d'enregistrer
+  le résultat de ce chargement, qui pourrait contenir l'entrée supprimée.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, body: bytes) -> "CachedResponse":
+        """ETag fort : empreinte du corps exact de la réponse."""
+        return cls(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, CachedResponse]] = (
+            OrderedDict()
+        )
+        # Incrémenté à chaque invalidation
+        self._generation = 0
+        self._counters = dict.fromkeys(("hits", "misses", "invalidations"), 0)
+
+    def get_or_load(
+        self, key: Hashable, load: Callable[[], bytes | None]
+    ) -> CachedResponse | None:
+        """
+        Retourne la réponse en cache, sinon la charge avec `load` et la met en
+        cache. Un résultat absent (`None`) n'est pas mis en cache.
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return cached[1]
+            self._counters["misses"] += 1
+            generation = self._generation
+
+        body = load()
+        if body is None:
+            return None
+        response = CachedResponse.of(body)
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return response
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, response)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return response
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self._counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                **self._counters,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def matches_etag(if_none_match: str | None, etag: str) -> bool:
+    """Comparaison faible de If-None-Match (RFC 9110), « * » compris."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+
+prediction_cache = ResponseCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl=settings.PREDICTION_CACHE_TTL_SECONDS,
+)
+prediction_list_cache = ResponseCache(
+    max_entries=settings.PREDICTION_LIST_CACHE_MAX_ENTRIES,
+    ttl=settings.PREDICTION_LIST_CACHE_TTL_SECONDS,
+)
@@ -1,9 +1,183 @@
+from typing import Literal
+
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class ApiKeyPolicy(BaseModel):
+    """Limites propres à une clé API."""
+
+    name: str
+    rate_per_second: float = 10.0  # débit moyen autorisé (token bucket)
+    burst: int = 20  # nombre de requêtes acceptées en rafale
+    max_concurrency: int = 4  # inférences simultanées maximum
+
+
+class InferenceProfile(BaseModel):
+    """Parallélisme appliqué autour de chaque appel au modèle."""
+
+    n_jobs: int | None = None  # n_jobs des estimateurs (joblib), -1 = tous les cœurs
+    native_threads: int | None = None  # threads BLAS/OpenMP, None = pas de limite
+
+
 class Settings(BaseSettings):
     DATABASE_URL: str = "default_database_url"
     DATABASE_URL_TEST: str = "default_test_database_url"
+    # Réplica en lecture seule optionnel pour les endpoints GET
+    DATABASE_READ_URL: str | None = None
+    # Durée pendant laquelle un client qui vient d'écrire relit sur le primaire
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Pool de connexions SQLAlchemy (à dimensionner selon workers × threads)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = -1  # secondes, -1 = jamais recyclée
+    DB_POOL_TIMEOUT: float = 30.0  # attente max d'une connexion libre (s)
+    # always : ping à chaque checkout / idle : ping seulement après inactivité
+    # never : aucun ping (s'appuie sur pool_recycle et la détection des coupures)
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "always"
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 30.0
+    # Mode compatible PgBouncer (transaction pooling) : pas de requêtes préparées
+    DB_PGBOUNCER: bool = False
+
+    # Partitionnement mensuel des tables de prédiction (PostgreSQL uniquement)
+    DB_PARTITIONING: bool = False
+    DB_PARTITIONS_AHEAD: int = 3  # partitions mensuelles créées à l'avance
+
+    # Archivage Parquet des partitions froides
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_RETENTION_MONTHS: int = 6
+    ARCHIVE_CHUNK_SIZE: int = 10_000
+
+    # Clés API supplémentaires, au format JSON :
+    # {"<clé>": {"name": "batch", "rate_per_second": 5, "burst": 10, "max_concurrency": 2}}
+    API_KEYS: dict[str, ApiKeyPolicy] = {}
+    # Limites appliquées à la clé historique API_KEY
+    RATE_LIMIT_PER_SECOND: float = 10.0
+    RATE_LIMIT_BURST: int = 20
+    MAX_CONCURRENT_INFERENCES: int = 4
+
+    # Clés d'idempotence (POST /predictions)
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 3600
+    IDEMPOTENCY_MAX_ENTRIES: int = 10_000
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0  # attente max d'un doublon en cours
+
+    # Caches de lecture des prédictions (0 entrée ou TTL nul = désactivé)
+    PREDICTION_CACHE_MAX_ENTRIES: int = 10_000
+    PREDICTION_CACHE_TTL_SECONDS: float = 300.0
+    PREDICTION_LIST_CACHE_MAX_ENTRIES: int = 256
+    PREDICTION_LIST_CACHE_TTL_SECONDS: float = 5.0
+    # Cache-Control des réponses : durée de fraîcheur côté client et proxy
+    PREDICTION_HTTP_MAX_AGE_SECONDS: int = 60
+    PREDICTION_LIST_HTTP_MAX_AGE_SECONDS: int = 0
+
+    # Suppression en masse : entrées supprimées par transaction
+    BULK_DELETE_BATCH_SIZE: int = 1000
+
+    # File d'inférence bornée (délestage au-delà de la profondeur)
+    INFERENCE_QUEUE_SIZE: int = 64
+    INFERENCE_WORKERS: int = 2
+    # Délai appliqué sans header X-Request-Timeout (0 = pas d'échéance)
+    INFERENCE_DEFAULT_TIMEOUT_SECONDS: float = 0
+    INFERENCE_MAX_TIMEOUT_SECONDS: float = 60.0
+
+    # Exécution du modèle : dans le thread du worker de la file, ou dans un
+    # pool de processus (contourne le GIL ; 0 processus = un par cœur).
+    # En mode process, la file a au moins un worker par processus.
+    INFERENCE_BACKEND: Literal["thread", "process"] = "thread"
+    INFERENCE_PROCESSES: int = 0
+
+    # Profils d'inférence, au format JSON :
+    # {"<nom>": {"n_jobs": 1, "native_threads": 1}}
+    INFERENCE_PROFILES: dict[str, InferenceProfile] = {
+        "latency": InferenceProfile(n_jobs=1, native_threads=1),
+        "throughput": InferenceProfile(n_jobs=-1, native_threads=None),
+    }
+    # Profil des prédictions unitaires et des traitements par lot
+    INFERENCE_PROFILE: str = "latency"
+    BATCH_INFERENCE_PROFILE: str = "throughput"
+    # Variante compacte servie à la place du modèle (python -m app.ml.compact)
+    MODEL_VARIANT: str = ""
+    # Version enregistrée avec chaque prédiction (vide = empreinte du fichier modèle)
+    MODEL_VERSION: str = ""
+    # Modèles nommés (<nom>.pkl, vide = app/ml/models), chargés à la demande
+    MODELS_DIR: str = ""
+    MODELS_MEMORY_BUDGET_MB: int = 1024
+
+    # Nombre maximal de lignes par lot (POST /predictions/batch)
+    BATCH_MAX_ROWS: int = 10_000
+
+    # Préchauffage au démarrage (GET /ready renvoie 503 tant qu'il n'est pas fini)
+    WARMUP_ENABLED: bool = True
+    WARMUP_BATCH_SIZES: list[int] = [1, 8, 64]
+    WARMUP_DB_CONNECTIONS: int = 2  # connexions ouvertes d'avance par pool
+    WARMUP_RETRY_SECONDS: float = 5.0
+
+    # Surveillance de la dérive : statistiques partagées entre workers (fichier mmap)
+    DRIFT_ENABLED: bool = True
+    DRIFT_STATE_PATH: str = "/tmp/futurisys_drift.bin"
+    # Compteurs du processus fusionnés dans le fichier partagé (secondes)
+    DRIFT_FLUSH_SECONDS: float = 1.0
+    # Données d'entraînement du profil de référence (python -m app.ml.drift reference)
+    DRIFT_TRAINING_DATA_PATH: str = "data/donnees_entrainement.csv"
+
+    # Magasin des caractéristiques encodées (python -m app.ml.features rebuild),
+    # partagé par les workers d'un même hôte
+    FEATURE_STORE_ENABLED: bool = True
+    FEATURE_STORE_DIR: str = "feature_store"
+    FEATURE_STORE_CHUNK_SIZE: int = 5_000  # lignes lues par bloc à la construction
+    # File des écritures (thread dédié) ; au-delà, les écritures sont abandonnées
+    FEATURE_STORE_QUEUE_SIZE: int = 10_000
+
+    # Recalcul des prédictions enregistrées (python -m app.rescore)
+    RESCORE_CHUNK_SIZE: int = 2_000
+    RESCORE_MAX_ROWS_PER_SECOND: float = 5_000  # 0 = pas de limite
+    RESCORE_CHECKPOINT_PATH: str = "rescore_checkpoint.json"
+
+    # Journalisation : file d'écriture asynchrone, ligne JSON par requête
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_QUEUE_SIZE: int = 10_000  # au-delà, les enregistrements sont abandonnés
+    LOG_REQUESTS: bool = True
+    # Part des requêtes journalisées (0–1), globale et par route, au format JSON :
+    # {"/v1/predictions/batch": 0.01}
+    LOG_REQUEST_SAMPLE_RATE: float = 1.0
+    LOG_REQUEST_SAMPLE_RATES: dict[str, float] = {}
+    # Requêtes toujours journalisées au-delà de cette durée (ainsi que les 5xx)
+    LOG_SLOW_REQUEST_MS: float = 1000.0
+
+    # Traces par requête (spans exportés par lots au format OTLP/JSON)
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0  # sans traceparent entrant
+    TRACING_EXPORT_PATH: str = "traces.jsonl"
+    # Récepteur OTLP/HTTP (ex. http://collector:4318/v1/traces), prioritaire sur le fichier
+    TRACING_ENDPOINT: str = ""
+    TRACING_BATCH_SIZE: int = 512
+    TRACING_FLUSH_SECONDS: float = 5.0
+    TRACING_QUEUE_SIZE: int = 8192  # au-delà, les spans sont abandonnés
+    TRACING_SERVICE_NAME: str = "futurisys-api"
+
+    # Tâches de scoring asynchrones (POST /jobs), file en base partagée par
+    # tous les processus API
+    JOBS_WORKERS: int = 1  # threads par processus (0 = ne traite pas de tâches)
+    JOBS_CHUNK_SIZE: int = 1_000  # lignes par bloc réclamé
+    JOBS_MAX_ROWS: int = 1_000_000
+    JOBS_MAX_ATTEMPTS: int = 3  # par bloc, avant de le marquer en échec
+    JOBS_POLL_SECONDS: float = 1.0  # attente quand la file est vide
+    # Répertoire (partagé entre les nœuds) des fichiers CSV/Parquet référencés
+    JOBS_INPUT_DIR: str = "jobs"
+    JOBS_RESULTS_PAGE_MAX: int = 10_000  # lignes de résultats par réponse
+
+    # Classement des risques de départ (GET /predictions/top), par processus
+    LEADERBOARD_DEPTH: int = 1_000  # entrées gardées par segment (k maximal)
+    LEADERBOARD_TTL_SECONDS: float = 60.0  # reconstruction depuis la base
+
+    # Simulation what-if (POST /predictions/what-if) : points de grille au plus
+    WHATIF_MAX_POINTS: int = 2_500
+
+    # Canal WebSocket de scoring continu (/ws/predictions), par connexion
+    WS_MAX_PENDING: int = 256  # messages lus en attente ; au-delà, lecture suspendue
+    WS_MAX_BATCH: int = 64  # messages en attente scorés ensemble au plus
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
@@ -1,34 +1,322 @@
 # app/core/database.py
-from sqlalchemy import create_engine
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, exc, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
 
-# Gère les options de connexion spécifiques (ex. SSL pour PostgreSQL sur certains hébergeurs)
-connect_args = {}
-if "sslmode=require" in settings.DATABASE_URL:
-    connect_args["sslmode"] = "require"
+# Bornes (en secondes) de l'histogramme des temps d'attente au checkout
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """
+    Compteurs d'utilisation d'un pool : nombre de checkouts, timeouts
+    et distribution du temps d'attente pour obtenir une connexion.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(POOL_WAIT_BUCKETS) + 1)
+
+    def observe(self, wait: float, timed_out: bool = False) -> None:
+        index = len(POOL_WAIT_BUCKETS)
+        for i, bound in enumerate(POOL_WAIT_BUCKETS):
+            if wait <= bound:
+                index = i
+                break
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.wait_buckets[index] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            observed = self.checkouts + self.timeouts
+            bounds = [str(b) for b in POOL_WAIT_BUCKETS] + ["+Inf"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": (
+                    round(self.wait_total / observed * 1000, 3) if observed else 0.0
+                ),
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_histogram": dict(zip(bounds, self.wait_buckets)),
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool qui mesure le temps d'attente de chaque checkout."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return connection
+
+    def status_dict(self) -> dict:
+        """État courant du pool et taux de saturation."""
+        capacity = (
+            None if self._max_overflow == -1 else self.size() + self._max_overflow
+        )
+        checked_out = self.checkedout()
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": checked_out,
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 3) if capacity else None,
+            **self.metrics.snapshot(),
+        }
+
+
+def _install_idle_pre_ping(engine: Engine, idle_seconds: float) -> None:
+    """
+    Ping une connexion seulement si elle est restée inactive plus de
+    `idle_seconds` : évite l'aller-retour systématique de pool_pre_ping.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            # Le pool invalide la connexion et en ouvre une nouvelle
+            raise exc.DisconnectionError() from e
+        finally:
+            cursor.close()
+
+
+def build_engine(url: str) -> Engine:
+    """
+    Crée un moteur SQLAlchemy configuré à partir des paramètres DB_POOL_*.
+    """
+    # Gère les options de connexion spécifiques (ex. SSL pour PostgreSQL sur certains hébergeurs)
+    connect_args = {}
+    if "sslmode=require" in url:
+        connect_args["sslmode"] = "require"
+    if settings.DB_PGBOUNCER:
+        # PgBouncer en transaction pooling ne supporte pas les requêtes préparées
+        connect_args["prepare_threshold"] = None
+
+    new_engine = create_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING == "always",
+        connect_args=connect_args,
+    )
+    if settings.DB_POOL_PRE_PING == "idle":
+        _install_idle_pre_ping(new_engine, settings.DB_POOL_PRE_PING_IDLE_SECONDS)
+    return new_engine
+
+
+class RecentWrites:
+    """
+    Mémorise, par client, l'instant de sa dernière écriture pour lui garantir
+    de relire ses propres écritures sur le primaire pendant `window` secondes
+    (le temps que le réplica rattrape son retard). Mémoire propre au processus.
+    """
+
+    def __init__(self, window: float, max_clients: int = 10_000):
+        self.window = window
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._last_write: dict[str, float] = {}
+
+    def record(self, client: str | None) -> None:
+        if client is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[client] = now
+            if len(self._last_write) > self.max_clients:
+                self._last_write = {
+                    k: t for k, t in self._last_write.items() if now - t < self.window
+                }
+
+    def is_recent(self, client: str | None) -> bool:
+        if client is None:
+            return False
+        with self._lock:
+            last = self._last_write.get(client)
+        return last is not None and time.monotonic() - last < self.window
+
 
 # Crée le moteur SQLAlchemy (connexion à ta base)
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # vérifie la connexion avant chaque requête
-    connect_args=connect_args,
+engine = build_engine(settings.DATABASE_URL)
+
+# Moteur de lecture optionnel (réplica) ; à défaut, les lectures vont au primaire
+read_engine = (
+    build_engine(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else engine
 )
 
-# Fabrique de sessions pour interagir avec la base
+# Fabriques de sessions pour interagir avec la base
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+recent_writes = RecentWrites(settings.DB_READ_YOUR_WRITES_SECONDS)
 
 # Base pour déclarer les modèles ORM
 Base = declarative_base()
 
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
 
-def get_db():
+
+def _client_id(request: Request) -> str | None:
+    return request.headers.get("X-API-Key")
+
+
+def wrote_recently(request: Request) -> bool:
+    """Le client de la requête a écrit dans la fenêtre read-your-writes."""
+    return recent_writes.is_recent(_client_id(request))
+
+
+def get_db(request: Request):
     """
     Fournit une session de base de données à utiliser dans les routes FastAPI.
+    Les requêtes d'écriture sont mémorisées pour le routage read-your-writes.
     """
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+        if request.method not in READ_METHODS:
+            recent_writes.record(_client_id(request))
+
+
+def get_read_db(request: Request):
+    """
+    Fournit une session de lecture : réplica si configuré, sauf pour un client
+    ayant écrit récemment, qui relit sur le primaire.
+    """
+    factory = SessionLocal if wrote_recently(request) else ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_pool_status() -> dict:
+    """
+    Retourne l'état et les métriques du pool de chaque moteur.
+    """
+    status = {"primary": engine.pool.status_dict()}
+    if read_engine is not engine:
+        status["replica"] = read_engine.pool.status_dict()
+    return status
+
+
+def add_missing_columns(db_engine: Engine) -> list[str]:
+    """
+    Ajoute aux tables existantes les colonnes nullables déclarées depuis leur
+    création (`create_all` ne modifie pas une table existante).
+    Retourne les colonnes ajoutées (`table.colonne`).
+    """
+    inspector = inspect(db_engine)
+    added = []
+    with db_engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=db_engine.dialect)
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {table.name} "
+                        f"ADD COLUMN IF NOT EXISTS {column.name} {column_type}"
+                    )
+                )
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+# Version d'un modèle nommé : `<nom>-<empreinte sur 12 caractères>` (app.ml.registry)
+NAMED_MODEL_VERSION = r"^([A-Za-z0-9][A-Za-z0-9_-]{0,63})-[0-9a-f]{12}$"
+
+
+def backfill_model_names(db_engine: Engine) -> int:
+    """
+    Renseigne `model_name` des sorties de modèles nommés enregistrées avant
+    l'ajout de la colonne, d'après leur version. Retourne leur nombre.
+    """
+    with db_engine.begin() as connection:
+        return connection.execute(
+            text(
+                "UPDATE prediction_outputs "
+                "SET model_name = substring(model_version FROM :pattern) "
+                "WHERE model_name IS NULL AND model_version ~ :pattern"
+            ),
+            {"pattern": NAMED_MODEL_VERSION},
+        ).rowcount
+
+
+def drop_indexes(db_engine: Engine, names: tuple[str, ...]) -> list[str]:
+    """Supprime ceux des index `names` qui existent encore. Retourne leurs noms."""
+    dropped = []
+    with db_engine.begin() as connection:
+        for name in names:
+            if connection.execute(
+                text("SELECT to_regclass(:name)"), {"name": name}
+            ).scalar():
+                connection.execute(text(f"DROP INDEX {name}"))
+                dropped.append(name)
+    return dropped
+
+
+def add_missing_indexes(db_engine: Engine) -> list[str]:
+    """
+    Crée sur les tables existantes les index déclarés depuis leur création.
+    Retourne les index créés.
+    """
+    inspector = inspect(db_engine)
+    added = []
+    with db_engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    index.create(bind=connection)
+                    added.append(index.name)
+    return added
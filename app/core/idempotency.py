@@ -0,0 +1,111 @@
+# app/core/idempotency.py
+"""
+Stockage borné (TTL + nombre d'entrées) des réponses associées à une clé
+d'idempotence. Une requête rejouée renvoie la réponse mémorisée ; un doublon
+concurrent attend la fin de la première exécution au lieu de la répéter.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+
+
+class IdempotencyKeyReused(Exception):
+    """La clé a déjà servi pour une requête au contenu différent."""
+
+
+class IdempotencyInProgress(Exception):
+    """La requête d'origine est toujours en cours après le délai d'attente."""
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    done: threading.Event = field(default_factory=threading.Event)
+    response: Any = None
+    expires_at: float = float("inf")
+
+
+@dataclass
+class Claim:
+    """Résultat d'une réservation : soit à exécuter, soit une réponse à rejouer."""
+
+    key: str
+    replayed: bool = False
+    response: Any = None
+
+
+class IdempotencyStore:
+    def __init__(self, ttl: float, max_entries: int, wait_timeout: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def _purge(self, now: float) -> None:
+        # Les entrées terminées sont rangées par ordre d'expiration (TTL fixe)
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if entry.done.is_set() and entry.expires_at <= now:
+                del self._entries[key]
+            elif entry.done.is_set():
+                break
+
+    def claim(self, key: str, fingerprint: str) -> Claim:
+        """
+        Réserve la clé pour exécution, ou retourne la réponse déjà enregistrée.
+        Attend si une requête identique est en cours.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                self._purge(time.monotonic())
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = _Entry(fingerprint)
+                    return Claim(key)
+                if entry.fingerprint != fingerprint:
+                    raise IdempotencyKeyReused(key)
+                if entry.done.is_set():
+                    return Claim(key, replayed=True, response=entry.response)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not entry.done.wait(remaining):
+                raise IdempotencyInProgress(key)
+            # Terminée (réponse à rejouer) ou abandonnée (clé libérée) : on réessaie
+
+    def complete(self, key: str, response: Any) -> None:
+        """Enregistre la réponse et réveille les requêtes en attente."""
+        with self._lock:
+            entry = self._entries.pop(key)
+            entry.response = response
+            entry.expires_at = time.monotonic() + self.ttl
+            self._entries[key] = entry
+            entry.done.set()
+            # Éviction des plus anciennes réponses terminées au-delà de la borne
+            for old_key in list(self._entries):
+                if len(self._entries) <= self.max_entries:
+                    break
+                if self._entries[old_key].done.is_set():
+                    del self._entries[old_key]
+
+    def release(self, key: str) -> None:
+        """Libère la clé après un échec : un doublon en attente pourra s'exécuter."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+idempotency_store = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS,
+)
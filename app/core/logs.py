@@ -0,0 +1,213 @@
+# app/core/logs.py
+"""
+Journalisation de l'application, configurée une fois au démarrage.
+
+- Les enregistrements sont déposés dans une file bornée (QueueHandler) et
+  écrits par un thread dédié (QueueListener) : un appel de journalisation ne
+  fait jamais d'entrée/sortie sur le chemin d'une requête. File pleine : les
+  enregistrements sont abandonnés et comptés.
+- Format JSON (une ligne par enregistrement) ou texte.
+- Chaque requête HTTP produit une ligne JSON : id, méthode, route, statut,
+  durée totale et durée des étapes mesurées avec `stage`. Les lignes sont
+  échantillonnées (par route si besoin) ; les erreurs 5xx et les requêtes
+  lentes sont toujours journalisées.
+"""
+
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import settings
+from app.core.tracing import current_span
+
+request_logger = logging.getLogger("app.requests")
+
+# Id et durées des étapes de la requête en cours
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+_stages: ContextVar[dict[str, float] | None] = ContextVar("stages", default=None)
+
+# Attributs standard d'un LogRecord, exclus des champs JSON additionnels
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement, avec les champs passés en `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler qui abandonne l'enregistrement si la file est pleine, et
+    rattache les enregistrements émis pendant une requête à son id.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        request_id = _request_id.get()
+        if request_id is not None and not hasattr(record, "request_id"):
+            record.request_id = request_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
+_queue_handler: DroppingQueueHandler | None = None
+
+
+def configure_logging(
+    level: str = settings.LOG_LEVEL,
+    fmt: str = settings.LOG_FORMAT,
+    stream=None,
+) -> None:
+    """
+    Remplace les handlers de la racine par la file d'écriture asynchrone.
+    Sans effet si la journalisation est déjà configurée.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(
+        JsonFormatter()
+        if fmt == "json"
+        else logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    )
+    _queue_handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    _listener = QueueListener(_queue_handler.queue, handler)
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(level)
+    # Les journaux d'uvicorn passent par la même file ; la ligne par requête
+    # remplace son journal d'accès
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    logging.getLogger("uvicorn.access").disabled = settings.LOG_REQUESTS
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Écrit les enregistrements en attente et arrête le thread d'écriture."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = _queue_handler = None
+
+
+def current_request_id() -> str | None:
+    return _request_id.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Ajoute la durée du bloc à l'étape `name` de la requête en cours."""
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        stages[name] = stages.get(name, 0.0) + elapsed
+
+
+def should_log(route: str, status: int, duration_ms: float) -> bool:
+    if status >= 500 or duration_ms >= settings.LOG_SLOW_REQUEST_MS:
+        return True
+    rate = settings.LOG_REQUEST_SAMPLE_RATES.get(
+        route, settings.LOG_REQUEST_SAMPLE_RATE
+    )
+    return rate >= 1 or random.random() < rate
+
+
+class RequestLogMiddleware:
+    """
+    Middleware ASGI : attribue un id à chaque requête (header X-Request-ID
+    repris s'il est fourni, renvoyé dans la réponse) et journalise une ligne
+    par requête à la fin de la réponse.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.LOG_REQUESTS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = (
+            headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        )
+        stages: dict[str, float] = {}
+        id_token = _request_id.set(request_id)
+        stages_token = _stages.set(stages)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            route = getattr(scope.get("route"), "path", scope["path"])
+            if should_log(route, status, duration_ms):
+                trace = current_span()
+                request_logger.info(
+                    "request",
+                    extra={
+                        "request_id": request_id,
+                        "trace_id": trace.trace_id if trace else None,
+                        "method": scope["method"],
+                        "route": route,
+                        "status": status,
+                        "duration_ms": round(duration_ms, 3),
+                        "stages_ms": {k: round(v, 3) for k, v in stages.items()},
+                    },
+                )
+            _request_id.reset(id_token)
+            _stages.reset(stages_token)
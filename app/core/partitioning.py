@@ -0,0 +1,223 @@
+# app/core/partitioning.py
+"""
+Partitionnement mensuel (PostgreSQL, RANGE sur created_at) des tables de
+prédiction.
+
+PostgreSQL impose que la clé primaire et les contraintes d'unicité d'une table
+partitionnée contiennent la clé de partition, et qu'une clé étrangère vise une
+contrainte unique. En mode partitionné :
+- la clé primaire physique devient (id, created_at) ;
+- l'unicité du matricule n'est garantie que par le service (déjà vérifiée) ;
+- la clé étrangère outputs → inputs est remplacée par un simple index.
+Les modèles ORM restent inchangés : `id` reste unique grâce à sa séquence.
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import Column, Index, MetaData, Table, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.database import Base
+from app.models import (  # enregistre aussi les tables
+    LEADERBOARD_INDEX,
+    LEADERBOARD_WHERE,
+)
+
+PARTITIONED_TABLES = ("prediction_inputs", "prediction_outputs")
+PARTITION_KEY = "created_at"
+
+# Colonnes qui ne sont plus uniques à elles seules une fois partitionnées
+_UNIQUE_TO_INDEX = {
+    "prediction_inputs": "matricule",
+    "prediction_outputs": "prediction_input_id",
+}
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def partitioned_metadata() -> MetaData:
+    """
+    Construit une copie des tables de prédiction adaptée au partitionnement
+    (clé primaire composite, pas de contrainte unique ni de clé étrangère).
+    """
+    metadata = MetaData()
+    for name in PARTITIONED_TABLES:
+        source = Base.metadata.tables[name]
+        columns = [
+            Column(
+                column.name,
+                column.type,
+                primary_key=column.name in ("id", PARTITION_KEY),
+                autoincrement=column.name == "id",
+                nullable=column.nullable,
+                server_default=(
+                    column.server_default.arg if column.server_default else None
+                ),
+            )
+            for column in source.columns
+        ]
+        table = Table(
+            name,
+            metadata,
+            *columns,
+            postgresql_partition_by=f"RANGE ({PARTITION_KEY})",
+        )
+        unique_column = _UNIQUE_TO_INDEX[name]
+        Index(f"ix_{name}_{unique_column}", table.c[unique_column])
+        if name == "prediction_outputs":
+            Index(
+                LEADERBOARD_INDEX,
+                table.c.probability.desc(),
+                table.c.prediction_input_id,
+                postgresql_include=["prediction"],
+                postgresql_where=text(LEADERBOARD_WHERE),
+            )
+    return metadata
+
+
+def create_month_partition(connection: Connection, table: str, month: date) -> bool:
+    """
+    Crée la partition mensuelle de `month` si elle n'existe pas. Les lignes du
+    mois déjà rangées dans la partition par défaut y sont déplacées : PostgreSQL
+    refuse sinon la création (violation de contrainte sur la partition par
+    défaut). Retourne True si la partition a été créée.
+    """
+    name = partition_name(table, month)
+    if _exists(connection, name):
+        return False
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    bounds = f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    in_month = f"{PARTITION_KEY} >= '{lower}' AND {PARTITION_KEY} < '{upper}'"
+    default = f"{table}_default"
+    stranded = (
+        _exists(connection, default)
+        and connection.execute(
+            text(f"SELECT 1 FROM {default} WHERE {in_month} LIMIT 1")
+        ).first()
+        is not None
+    )
+    if not stranded:
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+        return True
+    # Partition par défaut détachée le temps du déplacement (même transaction)
+    connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    connection.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+    connection.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_month}")
+    )
+    connection.execute(text(f"DELETE FROM {default} WHERE {in_month}"))
+    connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    return True
+
+
+def default_months(connection: Connection, table: str) -> list[date]:
+    """Mois des lignes rangées dans la partition par défaut d'une table."""
+    if not _exists(connection, f"{table}_default"):
+        return []
+    return list(
+        connection.execute(
+            text(
+                f"SELECT DISTINCT date_trunc('month', {PARTITION_KEY})::date "
+                f"FROM {table}_default ORDER BY 1"
+            )
+        ).scalars()
+    )
+
+
+def ensure_partitions(
+    connection: Connection, start: date, months_ahead: int
+) -> list[str]:
+    """
+    Crée (si besoin) la partition par défaut et les partitions mensuelles
+    de `start` jusqu'à `months_ahead` mois plus tard. Retourne leurs noms.
+    """
+    created = []
+    first = month_start(start)
+    for table in PARTITIONED_TABLES:
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+            )
+        )
+        for offset in range(months_ahead + 1):
+            lower = add_months(first, offset)
+            create_month_partition(connection, table, lower)
+            created.append(partition_name(table, lower))
+    return created
+
+
+def create_partitioned_tables(
+    engine: Engine, months_ahead: int = 3, start: date | None = None
+) -> None:
+    """
+    Crée les tables partitionnées et leurs partitions mensuelles, du mois de
+    `start` (par défaut le mois courant) à `months_ahead` mois plus tard.
+    """
+    partitioned = partitioned_metadata()
+    # Les tables non partitionnées sont créées normalement
+    others = [
+        table
+        for name, table in Base.metadata.tables.items()
+        if name not in PARTITIONED_TABLES
+    ]
+    Base.metadata.create_all(bind=engine, tables=others)
+    partitioned.create_all(bind=engine)
+    with engine.begin() as connection:
+        ensure_partitions(connection, start or date.today(), months_ahead)
+
+
+def list_partitions(connection: Connection, table: str) -> list[tuple[str, date]]:
+    """
+    Retourne les partitions mensuelles d'une table (nom, premier jour du mois),
+    triées chronologiquement. La partition par défaut est ignorée.
+    """
+    rows = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    ).scalars()
+    partitions = []
+    prefix = f"{table}_"
+    for name in rows:
+        suffix = name[len(prefix) :]
+        try:
+            month = datetime.strptime(suffix, "%Y_%m").date()
+        except ValueError:
+            continue
+        partitions.append((name, month))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def _exists(connection: Connection, name: str) -> bool:
+    return (
+        connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        is not None
+    )
+
+
+def is_partitioned(connection: Connection, table: str) -> bool:
+    return (
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table"
+            ),
+            {"table": table},
+        ).first()
+        is not None
+    )
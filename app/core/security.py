@@ -1,10 +1,15 @@
 """Security and authentication utilities."""
 
+import math
 import os
+import threading
+import time
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
 
+from app.core.config import ApiKeyPolicy, settings
+
 # Get API key from environment
 API_KEY = os.getenv("API_KEY", "default-key-change-me")
 
@@ -12,9 +17,97 @@ API_KEY = os.getenv("API_KEY", "default-key-change-me")
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
+class KeyLimiter:
+    """
+    Token bucket (request rate) and concurrency counter for one API key.
+    Every check is O(1) and done under a per-key lock.
+    """
+
+    def __init__(self, policy: ApiKeyPolicy):
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._tokens = float(policy.burst)
+        self._updated = time.monotonic()
+        self.in_flight = 0
+        self.allowed = 0
+        self.rejected_rate = 0
+        self.rejected_concurrency = 0
+
+    def acquire_request(self) -> float | None:
+        """
+        Consume one token. Returns None if allowed, otherwise the number of
+        seconds to wait before a token is available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.policy.burst,
+                self._tokens + (now - self._updated) * self.policy.rate_per_second,
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.allowed += 1
+                return None
+            self.rejected_rate += 1
+            if self.policy.rate_per_second <= 0:
+                return 60.0
+            return (1 - self._tokens) / self.policy.rate_per_second
+
+    def acquire_slot(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.policy.max_concurrency:
+                self.rejected_concurrency += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release_slot(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.policy.name,
+                "allowed": self.allowed,
+                "rejected_rate": self.rejected_rate,
+                "rejected_concurrency": self.rejected_concurrency,
+                "in_flight": self.in_flight,
+                "rate_per_second": self.policy.rate_per_second,
+                "burst": self.policy.burst,
+                "max_concurrency": self.policy.max_concurrency,
+            }
+
+
+def build_limiters() -> dict[str, KeyLimiter]:
+    """Create one limiter per configured key (API_KEY plus API_KEYS)."""
+    policies = {
+        API_KEY: ApiKeyPolicy(
+            name="default",
+            rate_per_second=settings.RATE_LIMIT_PER_SECOND,
+            burst=settings.RATE_LIMIT_BURST,
+            max_concurrency=settings.MAX_CONCURRENT_INFERENCES,
+        ),
+        **settings.API_KEYS,
+    }
+    return {key: KeyLimiter(policy) for key, policy in policies.items()}
+
+
+limiters = build_limiters()
+
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
 async def verify_api_key(api_key: str = Depends(api_key_header)) -> str:
     """
-    Verify the API key from the request header.
+    Verify the API key from the request header and apply its rate limit.
 
     Args:
         api_key: The API key from X-API-Key header
@@ -23,7 +116,8 @@ async def verify_api_key(api_key: str = Depends(api_key_header)) -> str:
         The validated API key
 
     Raises:
-        HTTPException: 403 Forbidden if API key is missing or invalid
+        HTTPException: 403 Forbidden if API key is missing or invalid,
+            429 Too Many Requests if the key exceeded its request rate
     """
     if api_key is None:
         raise HTTPException(
@@ -31,10 +125,39 @@ async def verify_api_key(api_key: str = Depends(api_key_header)) -> str:
             detail="API key missing. Please provide X-API-Key header.",
         )
 
-    if api_key != API_KEY:
+    limiter = limiters.get(api_key)
+    if limiter is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid API key.",
         )
 
+    retry_after = limiter.acquire_request()
+    if retry_after is not None:
+        raise _too_many_requests("Rate limit exceeded for this API key.", retry_after)
+
     return api_key
+
+
+async def acquire_inference_slot(api_key: str = Depends(verify_api_key)):
+    """
+    Reserve one of the key's concurrent inference slots for the request.
+
+    Raises:
+        HTTPException: 429 Too Many Requests if all slots are in use
+    """
+    limiter = limiters.get(api_key)
+    if limiter is None:
+        yield api_key
+        return
+    if not limiter.acquire_slot():
+        raise _too_many_requests("Too many concurrent inferences for this API key.", 1)
+    try:
+        yield api_key
+    finally:
+        limiter.release_slot()
+
+
+def get_usage() -> list[dict]:
+    """Per-key usage counters (keys themselves are never exposed)."""
+    return [limiter.usage() for limiter in limiters.values()]
@@ -0,0 +1,360 @@
+# app/core/tracing.py
+"""
+Traces en processus : une trace par requête HTTP, découpée en spans.
+
+- `span(nom, **attributs)` (gestionnaire de contexte) et `@traced(nom)`
+  (décorateur) ouvrent un span enfant du span courant. Hors d'une trace
+  échantillonnée, ou traçage désactivé, ils ne coûtent qu'une lecture de
+  variable de contexte.
+- Le middleware reprend le contexte W3C `traceparent` entrant (même trace,
+  décision d'échantillonnage de l'appelant) ; à défaut, une trace est créée
+  et échantillonnée selon TRACING_SAMPLE_RATE. Le header `traceresponse` de
+  la réponse donne l'id de la trace.
+- Les spans terminés sont exportés par lots, par un thread dédié, au format
+  OTLP/JSON : une requête d'export par ligne dans TRACING_EXPORT_PATH (format
+  du « file exporter » du collecteur OpenTelemetry), ou envoyée en HTTP à
+  TRACING_ENDPOINT (récepteur OTLP/HTTP, par exemple :4318/v1/traces). File
+  pleine : les spans sont abandonnés et comptés.
+"""
+
+import functools
+import json
+import logging
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Types et statuts de span OTLP
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    kind: int = SPAN_KIND_INTERNAL
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    status: int = STATUS_OK
+    status_message: str = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class BatchExporter:
+    """
+    Exporte les spans terminés par lots (taille maximale ou délai écoulé)
+    depuis un thread d'arrière-plan.
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        endpoint: str,
+        batch_size: int,
+        flush_seconds: float,
+        max_queue: int,
+    ):
+        self.path = path
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="trace-exporter", daemon=True
+        )
+        self.exported = self.dropped = self.failed = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, wait: float) -> list[Span]:
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is None:  # réveil pour l'arrêt
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._drain(self.flush_seconds)
+            if batch:
+                self.export(batch)
+        while batch := self._drain(0):
+            self.export(batch)
+
+    def export(self, spans: list[Span]) -> None:
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": settings.TRACING_SERVICE_NAME},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        try:
+            if self.endpoint:
+                requests.post(self.endpoint, json=payload, timeout=5).raise_for_status()
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(payload) + "\n")
+            self.exported += len(spans)
+        except Exception as e:
+            self.failed += len(spans)
+            logger.warning(f"⚠️ Export de {len(spans)} spans impossible : {e}")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Exporte les spans en attente puis arrête le thread."""
+        self._stop.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_exporter: BatchExporter | None = None
+
+
+def configure_tracing() -> BatchExporter | None:
+    """Démarre l'export si TRACING_ENABLED ; à appeler une fois au démarrage."""
+    global _exporter
+    if settings.TRACING_ENABLED and _exporter is None:
+        _exporter = BatchExporter(
+            Path(settings.TRACING_EXPORT_PATH),
+            settings.TRACING_ENDPOINT,
+            settings.TRACING_BATCH_SIZE,
+            settings.TRACING_FLUSH_SECONDS,
+            settings.TRACING_QUEUE_SIZE,
+        )
+        _exporter.start()
+    return _exporter
+
+
+def shutdown_tracing() -> None:
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+class _SpanScope:
+    """Ouvre le span à l'entrée du bloc, le ferme et l'exporte à la sortie."""
+
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.span.start_ns = time.time_ns()
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        span = self.span
+        span.end_ns = time.time_ns()
+        if exc is not None:
+            span.status = STATUS_ERROR
+            span.status_message = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        if _exporter is not None:
+            _exporter.submit(span)
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP = _NoopScope()
+
+
+def span(name: str, **attributes: Any) -> _SpanScope | _NoopScope:
+    """Span enfant du span courant ; sans effet hors d'une trace échantillonnée."""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return _SpanScope(
+        Span(
+            name,
+            parent.trace_id,
+            secrets.token_hex(8),
+            parent.span_id,
+            attributes=attributes,
+        )
+    )
+
+
+def traced(name: str | None = None) -> Callable:
+    """Décorateur : exécute la fonction dans un span (par défaut à son nom)."""
+
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """(trace_id, span_id parent, échantillonné) d'un header traceparent valide."""
+    match = TRACEPARENT_PATTERN.match(header or "")
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class TracingMiddleware:
+    """Middleware ASGI : ouvre le span racine de chaque requête HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        incoming = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = random.random() < settings.TRACING_SAMPLE_RATE
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(
+            f"{scope['method']} {scope['path']}",
+            trace_id,
+            secrets.token_hex(8),
+            parent_id,
+            kind=SPAN_KIND_SERVER,
+            attributes={"http.method": scope["method"], "url.path": scope["path"]},
+        )
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.status = STATUS_ERROR
+                traceresponse = f"00-{trace_id}-{root.span_id}-01"
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"traceresponse", traceresponse.encode("latin-1")),
+                ]
+            await send(message)
+
+        with _SpanScope(root):
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"{scope['method']} {route.path}"
+                    root.set_attribute("http.route", route.path)
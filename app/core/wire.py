@@ -0,0 +1,164 @@
+# app/core/wire.py
+"""
+Négociation du format de transport : JSON (par défaut) ou MessagePack.
+
+- Un corps `Content-Type: application/msgpack` est décodé directement en
+  objets Python, puis validé par les mêmes schémas Pydantic qu'un corps JSON
+  (mêmes erreurs 422).
+- Une réponse est encodée en MessagePack si le header `Accept` le préfère à
+  JSON. Le contenu est celui de la réponse JSON (dates en chaînes ISO 8601),
+  sans passer par une chaîne JSON.
+
+Les erreurs (4xx/5xx) et les réponses construites par l'endpoint lui-même
+(lectures en cache avec ETag) restent en JSON.
+
+Les routes ouvrent aussi les spans de l'encodage fait par FastAPI après le
+handler : `serialization` (réponse validée par `response_model` puis
+convertie) et `render` (octets JSON ou MessagePack).
+"""
+
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute, get_request_handler
+
+from app.core.tracing import span
+
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = {MSGPACK, "application/x-msgpack"}
+
+
+def _media_type(value: str) -> str:
+    return value.split(";", 1)[0].strip().lower()
+
+
+def sends_msgpack(request: Request) -> bool:
+    return _media_type(request.headers.get("content-type", "")) in MSGPACK_TYPES
+
+
+def accepts_msgpack(accept: str | None) -> bool:
+    """Vrai si `accept` donne à MessagePack une préférence au moins égale à JSON."""
+    preferences = {}
+    for item in (accept or "").split(","):
+        media_type, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        preferences[_media_type(media_type)] = quality
+    msgpack_quality = max(preferences.get(t, 0.0) for t in MSGPACK_TYPES)
+    json_quality = max(
+        preferences.get(t, 0.0) for t in ("application/json", "application/*", "*/*")
+    )
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def unpack(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False)
+
+
+class MsgpackRequest(Request):
+    """
+    Requête dont le corps MessagePack est servi par `json()`. FastAPI ne lit
+    le corps via `json()` que pour un type JSON : le header `content-type`
+    est présenté comme tel, le format d'origine reste visible par
+    `isinstance`.
+    """
+
+    def __init__(self, scope, receive):
+        headers = [
+            (name, b"application/json" if name == b"content-type" else value)
+            for name, value in scope["headers"]
+        ]
+        super().__init__({**scope, "headers": headers}, receive)
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = unpack(await self.body())
+        return self._json
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content)
+
+
+class _TracedField:
+    """Champ de réponse FastAPI dont la validation et la conversion ouvrent un span."""
+
+    def __init__(self, field: Any, name: str):
+        self._field = field
+        self._name = name
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._field, attribute)
+
+    def validate(self, *args, **kwargs):
+        with span(self._name):
+            return self._field.validate(*args, **kwargs)
+
+    def serialize(self, *args, **kwargs):
+        with span(self._name):
+            return self._field.serialize(*args, **kwargs)
+
+
+def _traced_render(response_class: Any) -> type[Response]:
+    """Sous-classe dont l'encodage du contenu en octets ouvre un span."""
+    if isinstance(response_class, DefaultPlaceholder):
+        response_class = response_class.value
+
+    def render(self, content: Any) -> bytes:
+        with span("render", media_type=response_class.media_type or ""):
+            return response_class.render(self, content)
+
+    return type(response_class.__name__, (response_class,), {"render": render})
+
+
+class NegotiatedRoute(APIRoute):
+    """Route qui lit et écrit JSON ou MessagePack selon les headers."""
+
+    def _handler(
+        self, response_class: Any
+    ) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        response_field = self.secure_cloned_response_field
+        return get_request_handler(
+            dependant=self.dependant,
+            body_field=self.body_field,
+            status_code=self.status_code,
+            response_class=_traced_render(response_class),
+            response_field=(
+                _TracedField(response_field, "serialization")
+                if response_field is not None
+                else None
+            ),
+            response_model_include=self.response_model_include,
+            response_model_exclude=self.response_model_exclude,
+            response_model_by_alias=self.response_model_by_alias,
+            response_model_exclude_unset=self.response_model_exclude_unset,
+            response_model_exclude_defaults=self.response_model_exclude_defaults,
+            response_model_exclude_none=self.response_model_exclude_none,
+            dependency_overrides_provider=self.dependency_overrides_provider,
+            embed_body_fields=self._embed_body_fields,
+        )
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        json_handler = self._handler(self.response_class)
+        msgpack_handler = self._handler(MsgpackResponse)
+
+        async def handler(request: Request) -> Response:
+            if sends_msgpack(request):
+                request = MsgpackRequest(request.scope, request.receive)
+            if accepts_msgpack(request.headers.get("accept")):
+                return await msgpack_handler(request)
+            return await json_handler(request)
+
+        return handler
@@ -0,0 +1,388 @@
+# app/jobs.py
+"""
+Tâches de scoring asynchrones, sans broker externe : la file est une table
+PostgreSQL partagée par tous les processus API, sur tous les nœuds.
+
+- POST /jobs crée la tâche et renvoie son id tout de suite. Un lot transmis
+  au format colonnes est validé puis découpé en blocs de JOBS_CHUNK_SIZE
+  lignes dans la même transaction ; un fichier référencé (CSV ou Parquet
+  sous JOBS_INPUT_DIR) est lu et découpé par le premier worker qui réclame
+  la tâche.
+- Chaque processus API lance JOBS_WORKERS threads. Un worker réclame le plus
+  ancien bloc en attente avec `SELECT … FOR UPDATE SKIP LOCKED` : les autres
+  workers, de ce processus ou d'un autre nœud, passent au bloc suivant sans
+  attendre. Le verrou est tenu pendant le scoring et relâché au commit ; si
+  le worker meurt, la transaction est annulée et le bloc redevient
+  disponible.
+- Le bloc est scoré comme POST /predictions/batch (file d'inférence, profil
+  BATCH_INFERENCE_PROFILE). File pleine : le bloc est rendu sans compter de
+  tentative. Une erreur est retentée jusqu'à JOBS_MAX_ATTEMPTS tentatives,
+  puis le bloc est marqué en échec.
+- Les compteurs de la tâche sont mis à jour dans la transaction du bloc ; le
+  dernier bloc termine la tâche (`succeeded`, ou `failed` si un bloc a
+  échoué : les résultats des autres blocs restent disponibles).
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Literal
+
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.columnar import ColumnarValidationError, validate_columns
+from app.core.config import settings
+from app.core.database import engine
+from app.ml.decision import DECISION_THRESHOLD
+from app.models import PredictionJob, PredictionJobChunk
+from app.schemas import JobChunkFailure, JobResponse, JobResults, PredictionMode
+from app.services import score_batch_service
+
+logger = logging.getLogger(__name__)
+
+INPUT_FORMATS = {".csv", ".parquet"}
+FINISHED_STATUSES = {"succeeded", "failed"}
+
+# Résultat d'un passage de worker (voir process_next_chunk)
+ChunkOutcome = Literal["empty", "busy", "done", "retry", "failed"]
+
+# Réveille les workers de ce processus quand une tâche y est créée
+_wakeup = threading.Event()
+
+
+def resolve_input_file(name: str) -> Path:
+    """Chemin d'un fichier CSV/Parquet de JOBS_INPUT_DIR (ValueError sinon)."""
+    base = Path(settings.JOBS_INPUT_DIR).resolve()
+    path = (base / name).resolve()
+    if not path.is_relative_to(base):
+        raise ValueError(f"Fichier hors de {settings.JOBS_INPUT_DIR} : {name}")
+    if path.suffix.lower() not in INPUT_FORMATS:
+        raise ValueError(f"Format non pris en charge (CSV ou Parquet) : {name}")
+    if not path.is_file():
+        raise ValueError(f"Fichier introuvable : {name}")
+    return path
+
+
+def read_input_file(path: Path) -> pd.DataFrame:
+    """Lit et valide un fichier de lignes (mêmes règles que le format colonnes)."""
+    if path.suffix.lower() == ".parquet":
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    return validate_columns(frame.to_dict("list"), settings.JOBS_MAX_ROWS)
+
+
+def _enqueue_chunks(
+    db: Session, job: PredictionJob, X: pd.DataFrame, chunk_size: int
+) -> None:
+    """Découpe un lot validé en blocs en attente ; la tâche passe à running."""
+    chunks = []
+    for start in range(0, len(X), chunk_size):
+        part = X.iloc[start : start + chunk_size]
+        chunks.append(
+            {
+                "job_id": job.id,
+                "first_row": start,
+                "rows": len(part),
+                "payload": part.to_dict("list"),
+            }
+        )
+    db.execute(insert(PredictionJobChunk), chunks)
+    job.total_rows = len(X)
+    job.total_chunks = len(chunks)
+    job.status = "running"
+
+
+def create_job(
+    db: Session,
+    X: pd.DataFrame | None = None,
+    source_file: str | None = None,
+    mode: PredictionMode = "exact",
+    model_name: str | None = None,
+    chunk_size: int | None = None,
+) -> PredictionJob:
+    """
+    Enregistre une tâche pour un lot validé `X`, ou pour le fichier
+    `source_file` de JOBS_INPUT_DIR (lu plus tard par un worker).
+    """
+    job = PredictionJob(
+        status="queued",
+        source_file=source_file,
+        mode=mode,
+        model_name=model_name,
+        processed_rows=0,
+        done_chunks=0,
+        failed_chunks=0,
+    )
+    db.add(job)
+    db.flush()
+    if X is not None:
+        _enqueue_chunks(db, job, X, chunk_size or settings.JOBS_CHUNK_SIZE)
+    db.commit()
+    db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+def _finish_job(db: Session, job_id: int, **values) -> None:
+    db.execute(
+        update(PredictionJob)
+        .where(PredictionJob.id == job_id)
+        .values(finished_at=func.now(), **values)
+    )
+
+
+def _split_file_job(db: Session, job: PredictionJob) -> None:
+    try:
+        X = read_input_file(resolve_input_file(job.source_file))
+    except ColumnarValidationError as e:
+        _finish_job(
+            db,
+            job.id,
+            status="failed",
+            error=json.dumps(e.errors, ensure_ascii=False),
+        )
+    except (ValueError, OSError) as e:
+        _finish_job(db, job.id, status="failed", error=f"{type(e).__name__}: {e}")
+    else:
+        _enqueue_chunks(db, job, X, settings.JOBS_CHUNK_SIZE)
+        logger.info(
+            f"📂 Tâche {job.id} : {job.source_file} découpé en "
+            f"{job.total_chunks} blocs"
+        )
+
+
+def claim_file_job(db_engine: Engine = engine) -> bool:
+    """
+    Lit et découpe le fichier d'une tâche en attente ; False s'il n'y en a pas.
+    Toute erreur marque la tâche en échec : elle n'est pas réclamée à nouveau.
+    """
+    with Session(db_engine) as db:
+        job = db.scalars(
+            select(PredictionJob)
+            .where(PredictionJob.status == "queued")
+            .order_by(PredictionJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if job is None:
+            return False
+        job_id = job.id
+        try:
+            _split_file_job(db, job)
+        except Exception as e:
+            # Blocs éventuellement insérés annulés avec la transaction
+            db.rollback()
+            _finish_job(db, job_id, status="failed", error=f"{type(e).__name__}: {e}")
+            logger.error(f"❌ Tâche {job_id} : {type(e).__name__}: {e}")
+        db.commit()
+    return True
+
+
+def _record_chunk(db: Session, job_id: int, rows: int, failed: bool) -> None:
+    """Compte le bloc terminé ; le dernier bloc termine la tâche."""
+    if failed:
+        values = {"failed_chunks": PredictionJob.failed_chunks + 1}
+    else:
+        values = {
+            "done_chunks": PredictionJob.done_chunks + 1,
+            "processed_rows": PredictionJob.processed_rows + rows,
+        }
+    done, failures, total = db.execute(
+        update(PredictionJob)
+        .where(PredictionJob.id == job_id)
+        .values(**values)
+        .returning(
+            PredictionJob.done_chunks,
+            PredictionJob.failed_chunks,
+            PredictionJob.total_chunks,
+        )
+    ).one()
+    if done + failures == total:
+        _finish_job(db, job_id, status="failed" if failures else "succeeded")
+
+
+def process_next_chunk(
+    db_engine: Engine = engine, worker: str | None = None
+) -> ChunkOutcome:
+    """
+    Réclame le plus ancien bloc en attente et le score, dans une transaction.
+    Retourne "empty" (file vide), "busy" (file d'inférence pleine, bloc
+    rendu), "done", "retry" (erreur, nouvelle tentative plus tard) ou
+    "failed" (tentatives épuisées).
+    """
+    with Session(db_engine) as db:
+        chunk = db.scalars(
+            select(PredictionJobChunk)
+            .where(PredictionJobChunk.status == "pending")
+            .order_by(PredictionJobChunk.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if chunk is None:
+            return "empty"
+        mode, model_name = db.execute(
+            select(PredictionJob.mode, PredictionJob.model_name).where(
+                PredictionJob.id == chunk.job_id
+            )
+        ).one()
+        chunk.attempts += 1
+        chunk.worker = worker
+        try:
+            X = validate_columns(chunk.payload, chunk.rows)
+            scored = score_batch_service(X, mode=mode, model_name=model_name)
+        except HTTPException as e:
+            if e.status_code == 503:
+                db.rollback()
+                return "busy"
+            chunk.error = str(e.detail)
+        except Exception as e:
+            chunk.error = f"{type(e).__name__}: {e}"
+        else:
+            chunk.status = "done"
+            chunk.result = scored.model_dump(exclude={"threshold"})
+            chunk.payload = None
+            chunk.error = None
+            chunk.finished_at = func.now()
+            _record_chunk(db, chunk.job_id, chunk.rows, failed=False)
+            db.commit()
+            return "done"
+
+        outcome = "retry"
+        if chunk.attempts >= settings.JOBS_MAX_ATTEMPTS:
+            chunk.status = outcome = "failed"
+            chunk.finished_at = func.now()
+            _record_chunk(db, chunk.job_id, chunk.rows, failed=True)
+        logger.warning(
+            f"⚠️ Tâche {chunk.job_id}, bloc {chunk.id} "
+            f"(tentative {chunk.attempts}) : {chunk.error}"
+        )
+        db.commit()
+        return outcome
+
+
+def run_worker(
+    stop: threading.Event, db_engine: Engine = engine, worker: str | None = None
+) -> None:
+    """Traite les tâches jusqu'à l'arrêt ; attend JOBS_POLL_SECONDS si la file est vide."""
+    while not stop.is_set():
+        # Une tâche fichier en erreur ne doit pas bloquer le traitement des blocs
+        try:
+            worked = claim_file_job(db_engine)
+        except Exception as e:  # base injoignable...
+            logger.error(f"❌ Worker de tâches {worker} : {type(e).__name__}: {e}")
+            worked = False
+        try:
+            worked = worked or process_next_chunk(db_engine, worker) not in (
+                "empty",
+                "busy",
+            )
+        except Exception as e:
+            logger.error(f"❌ Worker de tâches {worker} : {type(e).__name__}: {e}")
+            worked = False
+        if not worked:
+            _wakeup.wait(settings.JOBS_POLL_SECONDS)
+            _wakeup.clear()
+
+
+def start_job_workers(count: int | None = None) -> threading.Event:
+    """Lance les workers de ce processus ; l'événement retourné les arrête."""
+    stop = threading.Event()
+    count = settings.JOBS_WORKERS if count is None else count
+    for index in range(count):
+        worker = f"{socket.gethostname()}:{os.getpid()}:{index}"
+        threading.Thread(
+            target=run_worker,
+            args=(stop, engine, worker),
+            name=f"jobs-{index}",
+            daemon=True,
+        ).start()
+    return stop
+
+
+def job_results(db: Session, job_id: int, offset: int, limit: int) -> JobResults:
+    """
+    Résultats des lignes [offset, offset + limit) ; les lignes d'un bloc non
+    scoré (en attente ou en échec) valent null.
+    """
+    chunks = db.execute(
+        select(
+            PredictionJobChunk.first_row,
+            PredictionJobChunk.rows,
+            PredictionJobChunk.status,
+            PredictionJobChunk.result,
+        )
+        .where(
+            PredictionJobChunk.job_id == job_id,
+            PredictionJobChunk.first_row < offset + limit,
+            PredictionJobChunk.first_row + PredictionJobChunk.rows > offset,
+        )
+        .order_by(PredictionJobChunk.first_row)
+    ).all()
+    results = {"prediction": [], "probability": [], "trees_used": []}
+    for chunk in chunks:
+        start = max(offset - chunk.first_row, 0)
+        end = min(offset + limit - chunk.first_row, chunk.rows)
+        for key, values in results.items():
+            if chunk.status == "done" and chunk.result[key] is not None:
+                values.extend(chunk.result[key][start:end])
+            else:
+                values.extend([None] * (end - start))
+    if not any(value is not None for value in results["trees_used"]):
+        results["trees_used"] = None
+    return JobResults(offset=offset, **results)
+
+
+def get_job(
+    db: Session, job_id: int, offset: int = 0, limit: int | None = None
+) -> JobResponse | None:
+    """État d'une tâche ; les résultats sont joints une fois la tâche terminée."""
+    # Les compteurs sont mis à jour par les workers : pas de copie en cache
+    job = db.get(PredictionJob, job_id, populate_existing=True)
+    if job is None:
+        return None
+    failures = db.execute(
+        select(
+            PredictionJobChunk.first_row,
+            PredictionJobChunk.rows,
+            PredictionJobChunk.attempts,
+            PredictionJobChunk.error,
+        )
+        .where(
+            PredictionJobChunk.job_id == job_id,
+            PredictionJobChunk.status == "failed",
+        )
+        .order_by(PredictionJobChunk.first_row)
+    ).all()
+    results = None
+    if job.status in FINISHED_STATUSES and job.total_rows:
+        limit = min(
+            limit or settings.JOBS_RESULTS_PAGE_MAX, settings.JOBS_RESULTS_PAGE_MAX
+        )
+        results = job_results(db, job_id, offset, limit)
+    return JobResponse(
+        id=job.id,
+        status=job.status,
+        mode=job.mode,
+        model_name=job.model_name,
+        source_file=job.source_file,
+        total_rows=job.total_rows,
+        processed_rows=job.processed_rows,
+        failed_rows=sum(failure.rows for failure in failures),
+        total_chunks=job.total_chunks,
+        done_chunks=job.done_chunks,
+        failed_chunks=job.failed_chunks,
+        threshold=DECISION_THRESHOLD,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        failures=[JobChunkFailure(**failure._asdict()) for failure in failures],
+        results=results,
+    )
@@ -0,0 +1,211 @@
+# app/leaderboard.py
+"""
+Classement des employés les plus à risque (GET /predictions/top), par
+segment : tous, un département, un poste, ou un département et un poste.
+
+Chaque segment garde en mémoire (propre au processus) ses
+LEADERBOARD_DEPTH meilleures entrées, triées par probabilité décroissante :
+une requête top-K est servie sans accès à la base, quelle que soit la taille
+de la table. Seuls les scores exacts du modèle par défaut sont classés : les
+probabilités estimées du mode décision (`trees_used` renseigné) et celles des
+modèles nommés (`model_name`), non comparables, en sont exclues.
+
+- Les prédictions enregistrées et supprimées par ce processus mettent à jour
+  les segments chargés.
+- Un segment est reconstruit depuis la base (index
+  `ix_prediction_outputs_leaderboard`) au premier accès, après
+  LEADERBOARD_TTL_SECONDS (écritures d'un autre worker, recalcul, archivage)
+  ou quand des suppressions l'ont vidé sous k entrées alors que la base peut
+  en contenir d'autres.
+- Une écriture pendant une reconstruction empêche d'enregistrer le segment
+  reconstruit, qui pourrait ne pas la refléter (comme pour les caches).
+"""
+
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+
+from sortedcontainers import SortedKeyList
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.enums import Departement, Poste
+from app.models import PredictionInput, PredictionOutput
+from app.schemas import LeaderboardEntry
+
+# (département, poste) ; None = tous
+SegmentKey = tuple[str | None, str | None]
+
+
+def _rank(entry: LeaderboardEntry) -> tuple[float, int]:
+    """Probabilité décroissante, puis id croissant (ordre de l'index)."""
+    return -entry.probability, entry.prediction_input_id
+
+
+def segment_keys(entry: LeaderboardEntry) -> tuple[SegmentKey, ...]:
+    departement, poste = entry.departement.value, entry.poste.value
+    return (None, None), (departement, None), (None, poste), (departement, poste)
+
+
+class Segment:
+    def __init__(self, entries: list[LeaderboardEntry], depth: int, expires: float):
+        self.entries = SortedKeyList(entries, key=_rank)
+        self.by_id = {entry.prediction_input_id: entry for entry in entries}
+        self.depth = depth
+        # Vrai si la base ne contient pas d'autre entrée du segment
+        self.complete = len(entries) < depth
+        self.expires = expires
+
+    def add(self, entry: LeaderboardEntry) -> None:
+        self.discard(entry.prediction_input_id)
+        # Segment tronqué : une entrée sous la dernière gardée peut en précéder
+        # d'autres, absentes de la mémoire
+        if not self.complete and (
+            not self.entries or _rank(entry) > _rank(self.entries[-1])
+        ):
+            return
+        self.entries.add(entry)
+        self.by_id[entry.prediction_input_id] = entry
+        if len(self.entries) > self.depth:
+            dropped = self.entries.pop()
+            del self.by_id[dropped.prediction_input_id]
+            self.complete = False
+
+    def discard(self, prediction_input_id: int) -> None:
+        entry = self.by_id.pop(prediction_input_id, None)
+        if entry is not None:
+            self.entries.remove(entry)
+
+    def top(self, k: int) -> list[LeaderboardEntry] | None:
+        """Les k premières entrées, ou None si la mémoire n'y suffit pas."""
+        if self.complete or len(self.entries) >= k:
+            return list(self.entries.islice(0, k))
+        return None
+
+
+class Leaderboard:
+    def __init__(self, depth: int, ttl: float):
+        self.depth = depth
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._segments: dict[SegmentKey, Segment] = {}
+        # Incrémentés à chaque écriture (par segment) et suppression
+        self._generations: defaultdict[SegmentKey, int] = defaultdict(int)
+        self._deletions = 0
+        self._counters = dict.fromkeys(("hits", "rebuilds"), 0)
+
+    def add(self, entry: LeaderboardEntry) -> None:
+        with self._lock:
+            for key in segment_keys(entry):
+                self._generations[key] += 1
+                segment = self._segments.get(key)
+                if segment is not None:
+                    segment.add(entry)
+
+    def discard(self, prediction_input_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._deletions += 1
+            for prediction_input_id in prediction_input_ids:
+                for segment in self._segments.values():
+                    segment.discard(prediction_input_id)
+
+    def top(
+        self,
+        key: SegmentKey,
+        k: int,
+        load: Callable[[SegmentKey, int], list[LeaderboardEntry]],
+    ) -> list[LeaderboardEntry]:
+        """
+        Les k entrées les plus à risque du segment `key` (k ≤ depth). Le
+        segment est rechargé avec `load(key, depth)` si nécessaire.
+        """
+        with self._lock:
+            segment = self._segments.get(key)
+            if segment is not None and segment.expires > time.monotonic():
+                entries = segment.top(k)
+                if entries is not None:
+                    self._counters["hits"] += 1
+                    return entries
+            self._counters["rebuilds"] += 1
+            generation = self._generations[key], self._deletions
+
+        entries = load(key, self.depth)
+        if self.ttl > 0:
+            segment = Segment(entries, self.depth, time.monotonic() + self.ttl)
+            with self._lock:
+                if generation == (self._generations[key], self._deletions):
+                    self._segments[key] = segment
+        return entries[:k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._segments.clear()
+            self._deletions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "entries": sum(len(s.entries) for s in self._segments.values()),
+                "depth": self.depth,
+                "ttl_seconds": self.ttl,
+                **self._counters,
+            }
+
+
+def segment_query(key: SegmentKey, limit: int) -> Select:
+    """Les `limit` sorties les plus probables du segment, lues par l'index."""
+    departement, poste = key
+    query = (
+        select(
+            PredictionOutput.prediction_input_id,
+            PredictionInput.matricule,
+            PredictionInput.departement,
+            PredictionInput.poste,
+            PredictionOutput.probability,
+            PredictionOutput.prediction,
+        )
+        .join(
+            PredictionInput, PredictionInput.id == PredictionOutput.prediction_input_id
+        )
+        .order_by(
+            PredictionOutput.probability.desc(), PredictionOutput.prediction_input_id
+        )
+        .where(
+            PredictionOutput.trees_used.is_(None),
+            PredictionOutput.model_name.is_(None),
+        )
+        .limit(limit)
+    )
+    if departement is not None:
+        query = query.where(PredictionInput.departement == Departement(departement))
+    if poste is not None:
+        query = query.where(PredictionInput.poste == Poste(poste))
+    return query
+
+
+def load_segment(db: Session, key: SegmentKey, limit: int) -> list[LeaderboardEntry]:
+    return [
+        LeaderboardEntry.model_validate(row, from_attributes=True)
+        for row in db.execute(segment_query(key, limit))
+    ]
+
+
+def get_top(
+    db: Session,
+    k: int,
+    departement: Departement | None = None,
+    poste: Poste | None = None,
+) -> list[LeaderboardEntry]:
+    key = (
+        departement.value if departement is not None else None,
+        poste.value if poste is not None else None,
+    )
+    return leaderboard.top(key, k, lambda key, limit: load_segment(db, key, limit))
+
+
+leaderboard = Leaderboard(
+    depth=settings.LEADERBOARD_DEPTH, ttl=settings.LEADERBOARD_TTL_SECONDS
+)
@@ -1,20 +1,54 @@
 import os
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from gradio.routes import mount_gradio_app
 
-from app.api.endpoints import api_router
-from app.ui import build_interface
+from app.core.logs import RequestLogMiddleware, configure_logging, shutdown_logging
+from app.core.tracing import TracingMiddleware, configure_tracing, shutdown_tracing
+
+# Journalisation configurée avant l'import des modules qui chargent le modèle
+configure_logging()
+
+from app.api.endpoints import api_router  # noqa: E402
+from app.jobs import start_job_workers  # noqa: E402
+from app.ml.backends import shutdown_backend  # noqa: E402
+from app.ml.drift import stop_drift_monitor  # noqa: E402
+from app.ml.features import feature_writer  # noqa: E402
+from app.ui import build_interface  # noqa: E402
+from app.warmup import start_warmup  # noqa: E402
 
 # Load environment variables
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Préchauffage en arrière-plan : /v1/ready passe à 200 une fois terminé
+    configure_tracing()
+    stop_warmup = start_warmup()
+    # Workers des tâches asynchrones : réclament les blocs de la file en base
+    stop_jobs = start_job_workers()
+    yield
+    stop_jobs.set()
+    stop_warmup.set()
+    # Workers du pool de processus (INFERENCE_BACKEND=process)
+    shutdown_backend()
+    # Écritures du magasin de caractéristiques en attente
+    feature_writer.stop()
+    # Compteurs de dérive du processus en attente de fusion
+    stop_drift_monitor()
+    shutdown_tracing()
+    shutdown_logging()
+
+
 app = FastAPI(
     title=os.getenv("API_TITLE", "Futurisys ML API"),
     description=os.getenv("API_DESCRIPTION", "Simple ML model deployment API"),
     version=os.getenv("API_VERSION", "dev"),
+    lifespan=lifespan,
 )
 
 # === Middleware CORS (utile si tu appelles ton API depuis le front) ===
@@ -26,6 +60,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(RequestLogMiddleware)
+# Ajouté en dernier, donc exécuté en premier : la ligne de journal de la
+# requête porte l'id de sa trace
+app.add_middleware(TracingMiddleware)
+
 app.include_router(api_router, prefix="/v1")
 
 # Montage de Gradio sur /ui
@@ -0,0 +1,246 @@
+# app/ml/backends.py
+"""
+Backends d'exécution du modèle.
+
+- `ThreadBackend` : le modèle tourne dans le thread appelant (un worker de la
+  file d'inférence). Simple, mais le surcoût Python de sklearn reste limité à
+  un cœur par processus à cause du GIL.
+- `ProcessPoolBackend` : le modèle tourne dans un pool de processus dont
+  chaque worker charge le modèle une seule fois, à son démarrage. Seules les
+  colonnes (tableaux numpy) traversent la frontière de processus, pas le
+  DataFrame ni le modèle. Le pool vit indépendamment des requêtes : un worker
+  tombé est remplacé et la requête concernée est rejouée une fois.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from app.core.config import settings
+from app.ml.decision import early_exit_predict
+from app.ml.profiles import inference_profile
+
+logger = logging.getLogger(__name__)
+
+# Modèle du processus worker (chargé par _init_worker)
+_worker_model = None
+
+
+def _init_worker() -> None:
+    global _worker_model
+    from app.ml.model_loader import model
+
+    _worker_model = model
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _from_proba(model: Any, proba) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (probabilités de la classe positive, prédictions) d'un seul passage sur
+    la forêt : équivalent à model.predict pour un classifieur à probabilités.
+    """
+    proba = np.asarray(proba)
+    prediction = np.asarray(model.classes_).take(proba.argmax(axis=1))
+    return np.ascontiguousarray(proba[:, 1]), prediction
+
+
+def _score_columns(
+    columns: dict[str, np.ndarray], profile: str | None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exécuté dans le worker : reconstruit le DataFrame sans copie et calcule
+    probabilités et classes en un seul passage sur la forêt.
+    """
+    X = pd.DataFrame(columns, copy=False)
+    with inference_profile(_worker_model, profile) as model:
+        proba = model.predict_proba(X)
+    return _from_proba(_worker_model, proba)
+
+
+def _score_encoded(
+    features: np.ndarray, profile: str | None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exécuté dans le worker : caractéristiques déjà encodées (magasin
+    app.ml.features), seule la dernière étape du pipeline est évaluée.
+    """
+    with inference_profile(_worker_model, profile) as model:
+        classifier = model.steps[-1][1] if isinstance(model, Pipeline) else model
+        proba = classifier.predict_proba(features)
+    return _from_proba(_worker_model, proba)
+
+
+def _decide_columns(
+    columns: dict[str, np.ndarray], profile: str | None, threshold: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Exécuté dans le worker : évaluation anticipée (mode décision)."""
+    X = pd.DataFrame(columns, copy=False)
+    with inference_profile(_worker_model, profile) as model:
+        return early_exit_predict(model, X, threshold)
+
+
+def to_columns(X: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Un tableau numpy par colonne : sérialisé comme un bloc mémoire contigu."""
+    return {name: X[name].to_numpy() for name in X.columns}
+
+
+class ThreadBackend:
+    name = "thread"
+
+    def score(
+        self, X: pd.DataFrame, model: Any, profile: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Retourne (probabilités de la classe positive, prédictions)."""
+        with inference_profile(model, profile) as profiled:
+            proba = profiled.predict_proba(X)
+        return _from_proba(model, proba)
+
+    def decide(
+        self, X: pd.DataFrame, model: Any, threshold: float, profile: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Retourne (probabilités estimées, prédictions, arbres utilisés)."""
+        with inference_profile(model, profile) as profiled:
+            return early_exit_predict(profiled, X, threshold)
+
+    def start(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ProcessPoolBackend:
+    name = "process"
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+        self.restarts = 0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # "spawn" : les workers ne dupliquent pas les threads et connexions du
+        # processus API (forker un processus multi-thread est risqué)
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def start(self) -> None:
+        """Démarre tous les workers et attend que chacun ait chargé le modèle."""
+        executor = self._executor
+        futures = [executor.submit(_ping) for _ in range(self.processes)]
+        pids = {future.result() for future in futures}
+        logger.info(f"✅ Pool d'inférence prêt ({len(pids)} processus).")
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                logger.warning("⚠️ Pool d'inférence cassé, redémarrage.")
+                self._executor = self._new_executor()
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def score(
+        self, X: pd.DataFrame, model: Any = None, profile: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Retourne (probabilités de la classe positive, prédictions). `model`
+        n'est pas utilisé : chaque worker a sa propre copie du modèle.
+        """
+        return self._submit(_score_columns, to_columns(X), profile)
+
+    def decide(
+        self,
+        X: pd.DataFrame,
+        model: Any = None,
+        threshold: float = 0.5,
+        profile: str | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Retourne (probabilités estimées, prédictions, arbres utilisés)."""
+        return self._submit(_decide_columns, to_columns(X), profile, threshold)
+
+    def submit_score(self, X: pd.DataFrame, profile: str | None = None) -> Future:
+        """
+        Soumet un lot sans attendre son résultat, pour en scorer plusieurs en
+        parallèle (traitements hors ligne). Pas de rejeu si le pool casse.
+        """
+        return self._executor.submit(_score_columns, to_columns(X), profile)
+
+    def submit_score_encoded(
+        self, features: np.ndarray, profile: str | None = None
+    ) -> Future:
+        """Comme `submit_score`, pour des lignes déjà encodées (sans prétraitement)."""
+        return self._executor.submit(_score_encoded, features, profile)
+
+    def _submit(self, fn, *args):
+        for attempt in range(2):
+            executor = self._executor
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                self._restart(executor)
+                if attempt:
+                    raise
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_backend: ThreadBackend | ProcessPoolBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def process_pool_size() -> int:
+    """Nombre de processus du pool (INFERENCE_PROCESSES, un par cœur si 0)."""
+    return settings.INFERENCE_PROCESSES or os.cpu_count() or 1
+
+
+def queue_workers() -> int:
+    """
+    Threads de la file d'inférence. Chaque appel au pool de processus occupe
+    un thread jusqu'à son résultat : en mode process, il en faut au moins un
+    par processus pour les occuper tous.
+    """
+    if settings.INFERENCE_BACKEND == "process":
+        return max(settings.INFERENCE_WORKERS, process_pool_size())
+    return settings.INFERENCE_WORKERS
+
+
+def build_backend() -> ThreadBackend | ProcessPoolBackend:
+    if settings.INFERENCE_BACKEND == "process":
+        return ProcessPoolBackend(process_pool_size())
+    return ThreadBackend()
+
+
+def get_backend() -> ThreadBackend | ProcessPoolBackend:
+    """Backend configuré, créé au premier appel (les workers démarrent alors)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend = build_backend()
+                backend.start()
+                _backend = backend
+    return _backend
+
+
+def shutdown_backend() -> None:
+    """Arrête le backend s'il a été créé (workers du pool de processus)."""
+    global _backend
+    with _backend_lock:
+        backend, _backend = _backend, None
+    if backend is not None:
+        backend.shutdown()
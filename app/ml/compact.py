@@ -0,0 +1,327 @@
+# app/ml/compact.py
+"""
+Variantes compactes de la forêt aléatoire, évaluées hors ligne.
+
+Les arbres sklearn sont convertis en tableaux numpy (un arbre par ligne,
+nœuds renumérotés) avec des types réduits :
+- seuils en float32, arrondis vers le bas : pour des entrées float32 (ce que
+  sklearn utilise à la prédiction) `x <= seuil` donne exactement le même
+  résultat qu'avec le seuil float64 ;
+- probabilités des feuilles en float32 ;
+- indices de variables et de nœuds dans le plus petit entier signé suffisant.
+On peut en outre ne garder que les premiers arbres et tronquer leur
+profondeur (un nœud interne tronqué devient une feuille avec sa probabilité).
+
+Usage :
+    python -m app.ml.compact report [--rows 2000] [--source synthetic|db]
+    python -m app.ml.compact save f32-t100-d8
+"""
+
+import argparse
+import io
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from app.ml.model_loader import VARIANTS_DIR, load_model
+from app.ml.samples import load_rows
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    """Variante nommée `<f32|f64>[-t<arbres>][-d<profondeur>]`."""
+
+    precision: str = "f32"
+    n_trees: int | None = None
+    max_depth: int | None = None
+
+    @property
+    def name(self) -> str:
+        name = self.precision
+        if self.n_trees is not None:
+            name += f"-t{self.n_trees}"
+        if self.max_depth is not None:
+            name += f"-d{self.max_depth}"
+        return name
+
+    @classmethod
+    def parse(cls, name: str) -> "VariantSpec":
+        match = re.fullmatch(r"(f32|f64)(?:-t(\d+))?(?:-d(\d+))?", name)
+        if match is None:
+            raise ValueError(f"Nom de variante invalide : {name}")
+        precision, trees, depth = match.groups()
+        return cls(
+            precision,
+            int(trees) if trees else None,
+            int(depth) if depth else None,
+        )
+
+
+def _smallest_int(max_value: int) -> type:
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _float32_floor(values: np.ndarray) -> np.ndarray:
+    """Plus grand float32 inférieur ou égal à chaque valeur float64."""
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _flatten_tree(tree, max_depth: int | None) -> tuple[list, ...]:
+    """
+    Parcours en profondeur d'un arbre sklearn jusqu'à `max_depth`.
+    Les feuilles pointent sur elles-mêmes, ce qui permet de descendre tous
+    les arbres un nombre fixe de fois sans test de fin.
+    """
+    value = tree.value[:, 0, :]
+    positive = value[:, 1] / value.sum(axis=1)
+    feature, threshold, left, right, proba = [], [], [], [], []
+    stack = [(0, 0, None, False)]
+    while stack:
+        node, depth, parent, is_left = stack.pop()
+        index = len(feature)
+        if parent is not None:
+            (left if is_left else right)[parent] = index
+        is_leaf = tree.children_left[node] == -1 or (
+            max_depth is not None and depth >= max_depth
+        )
+        feature.append(0 if is_leaf else int(tree.feature[node]))
+        threshold.append(0.0 if is_leaf else float(tree.threshold[node]))
+        left.append(index)
+        right.append(index)
+        proba.append(float(positive[node]))
+        if not is_leaf:
+            stack.append((tree.children_right[node], depth + 1, index, False))
+            stack.append((tree.children_left[node], depth + 1, index, True))
+    return feature, threshold, left, right, proba
+
+
+class CompactForestClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Forêt binaire sous forme de tableaux (n_arbres, n_nœuds). Remplace le
+    RandomForestClassifier en dernière étape du pipeline. Construite depuis
+    une forêt entraînée (`from_forest`) ou entraînée par `fit`.
+    """
+
+    def __init__(self, spec: VariantSpec = VariantSpec()):
+        self.spec = spec
+
+    @classmethod
+    def from_forest(cls, forest, spec: VariantSpec) -> "CompactForestClassifier":
+        return cls(spec)._compact(forest)
+
+    def fit(self, X, y, **forest_params) -> "CompactForestClassifier":
+        """
+        Entraîne un RandomForestClassifier (`spec.n_trees` arbres, 100 par
+        défaut, `forest_params` en plus) puis le compacte.
+        """
+        forest = RandomForestClassifier(
+            n_estimators=self.spec.n_trees or 100, **forest_params
+        )
+        return self._compact(forest.fit(X, y))
+
+    def _compact(self, forest) -> "CompactForestClassifier":
+        spec = self.spec
+        if len(forest.classes_) != 2:
+            raise ValueError("Seules les forêts binaires sont prises en charge.")
+        estimators = forest.estimators_[: spec.n_trees]
+        trees = [_flatten_tree(e.tree_, spec.max_depth) for e in estimators]
+        width = max(len(tree[0]) for tree in trees)
+
+        def stack(position: int, dtype) -> np.ndarray:
+            array = np.zeros((len(trees), width), dtype=dtype)
+            for i, tree in enumerate(trees):
+                array[i, : len(tree[position])] = tree[position]
+            return array
+
+        f32 = spec.precision == "f32"
+        feature_dtype = _smallest_int(forest.n_features_in_) if f32 else np.int64
+        node_dtype = _smallest_int(width) if f32 else np.int64
+        self.feature_ = stack(0, feature_dtype)
+        threshold = stack(1, np.float64)
+        self.threshold_ = _float32_floor(threshold) if f32 else threshold
+        self.left_ = stack(2, node_dtype)
+        self.right_ = stack(3, node_dtype)
+        self.proba_ = stack(4, np.float32 if f32 else np.float64)
+        self.depth_ = max(
+            e.tree_.max_depth if spec.max_depth is None else spec.max_depth
+            for e in estimators
+        )
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        return self
+
+    @property
+    def n_trees(self) -> int:
+        return self.feature_.shape[0]
+
+    def __sklearn_is_fitted__(self) -> bool:
+        return hasattr(self, "feature_")
+
+    def leaf_probabilities(self, X, trees: slice = slice(None)) -> np.ndarray:
+        """Probabilité positive de chaque arbre de `trees` : (n_lignes, n_arbres)."""
+        if sparse.issparse(X):
+            X = X.toarray()
+        X = np.asarray(X, dtype=np.float32)
+        tree_index = np.arange(self.n_trees)[trees]
+        width = self.feature_.shape[1]
+        # Index à plat : nœud (arbre, n°) et valeur (ligne, variable)
+        tree_offset = (tree_index * width)[None, :]
+        row_offset = (np.arange(len(X)) * X.shape[1])[:, None]
+        X_flat = X.ravel()
+        feature, threshold = self.feature_.ravel(), self.threshold_.ravel()
+        left, right = self.left_.ravel(), self.right_.ravel()
+        node = np.broadcast_to(tree_offset, (len(X), len(tree_index)))
+        for _ in range(self.depth_):
+            values = X_flat.take(row_offset + feature.take(node))
+            child = np.where(
+                values <= threshold.take(node), left.take(node), right.take(node)
+            )
+            node = tree_offset + child
+        return self.proba_.ravel().take(node)
+
+    def predict_proba(self, X) -> np.ndarray:
+        positive = self.leaf_probabilities(X).mean(axis=1, dtype=np.float64)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            getattr(self, name).nbytes
+            for name in ("feature_", "threshold_", "left_", "right_", "proba_")
+        )
+
+
+def build_variant(pipeline: Pipeline, spec: VariantSpec) -> Pipeline:
+    """Copie du pipeline dont la forêt est remplacée par sa version compacte."""
+    *preprocessing, (name, forest) = pipeline.steps
+    return Pipeline(
+        [*preprocessing, (name, CompactForestClassifier.from_forest(forest, spec))]
+    )
+
+
+def serialized_size(model) -> int:
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return len(buffer.getbuffer())
+
+
+def _latency_ms(model, X: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for i in range(repeat):
+        row = X.iloc[[i % len(X)]]
+        started = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def evaluate(
+    reference: Pipeline,
+    variant,
+    X: pd.DataFrame,
+    threshold: float,
+    repeat: int = 200,
+) -> dict:
+    """Écart de probabilité, accord de décision, taille et latences d'une variante."""
+    expected = reference.predict_proba(X)[:, 1]
+    started = time.perf_counter()
+    proba = variant.predict_proba(X)[:, 1]
+    batch_ms = (time.perf_counter() - started) * 1000
+    deviation = np.abs(proba - expected)
+    return {
+        "mean_abs_deviation": float(deviation.mean()),
+        "max_abs_deviation": float(deviation.max()),
+        # Décision servie : classe positive si la probabilité dépasse le seuil
+        "agreement": float(np.mean((proba > threshold) == (expected > threshold))),
+        "size_bytes": serialized_size(variant),
+        "latency_ms": _latency_ms(variant, X, repeat),
+        "batch_ms": batch_ms,
+    }
+
+
+DEFAULT_VARIANTS = [
+    VariantSpec("f64"),
+    VariantSpec("f32"),
+    VariantSpec("f32", n_trees=100),
+    VariantSpec("f32", n_trees=50),
+    VariantSpec("f32", max_depth=8),
+    VariantSpec("f32", n_trees=100, max_depth=8),
+    VariantSpec("f32", n_trees=50, max_depth=6),
+]
+
+
+def save_variant(model: Pipeline, name: str) -> Path:
+    VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = VARIANTS_DIR / f"{name}.pkl"
+    joblib.dump(model, path)
+    return path
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.ml.decision import DECISION_THRESHOLD
+    from app.ml.profiles import model_for_profile
+
+    parser = argparse.ArgumentParser(description="Variantes compactes de la forêt")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="Compare les variantes au modèle servi")
+    report.add_argument("--rows", type=int, default=2000)
+    report.add_argument("--source", choices=["synthetic", "db"], default="synthetic")
+    report.add_argument("--variants", nargs="+", default=None)
+    save = sub.add_parser("save", help="Enregistre une variante dans app/ml/variants")
+    save.add_argument("variant")
+    args = parser.parse_args(argv)
+
+    reference = model_for_profile(load_model(variant=""), "latency")
+    if args.command == "save":
+        path = save_variant(
+            build_variant(reference, VariantSpec.parse(args.variant)), args.variant
+        )
+        print(f"Variante enregistrée : {path} (MODEL_VARIANT={args.variant})")
+        return
+
+    X = load_rows(args.source, args.rows)
+    specs = (
+        [VariantSpec.parse(name) for name in args.variants]
+        if args.variants
+        else DEFAULT_VARIANTS
+    )
+    print(
+        f"{'variante':<14}{'arbres':>7}{'écart moy':>11}{'écart max':>11}"
+        f"{'accord':>9}{'Ko':>9}{'ms/ligne':>10}{'ms/lot':>9}"
+    )
+    candidates = [("sklearn", reference)] + [
+        (spec.name, build_variant(reference, spec)) for spec in specs
+    ]
+    for name, candidate in candidates:
+        result = evaluate(reference, candidate, X, DECISION_THRESHOLD)
+        forest = candidate.steps[-1][1]
+        trees = getattr(forest, "n_trees", None) or len(forest.estimators_)
+        print(
+            f"{name:<14}{trees:>7}{result['mean_abs_deviation']:>11.4f}"
+            f"{result['max_abs_deviation']:>11.4f}{result['agreement']:>9.2%}"
+            f"{result['size_bytes'] / 1024:>9.0f}{result['latency_ms']:>10.2f}"
+            f"{result['batch_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# app/ml/decision.py
+"""
+Mode « décision » : évaluation anticipée de la forêt.
+
+Les arbres sont évalués dans l'ordre. Après chaque bloc, on borne la moyenne
+finale avec les probabilités de feuille minimale et maximale des arbres
+restants. Dès que ces bornes sont du même côté du seuil, la décision ne
+peut plus changer et l'évaluation s'arrête pour cette ligne. La décision est
+identique à celle du mode exact (`probabilité > seuil`, comme l'argmax de
+sklearn au seuil 0,5). La probabilité retournée est la moyenne des seuls
+arbres utilisés.
+"""
+
+import threading
+import weakref
+
+import numpy as np
+from scipy import sparse
+
+from app.ml.compact import CompactForestClassifier
+
+# Seuil de décision de la classe positive
+DECISION_THRESHOLD = 0.5
+
+# Arbres évalués entre deux vérifications des bornes (forêt compacte)
+COMPACT_BLOCK = 32
+
+_bounds: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_bounds_lock = threading.Lock()
+
+
+def _leaf_bounds(forest) -> tuple[np.ndarray, np.ndarray]:
+    """Probabilités positives minimale et maximale des feuilles de chaque arbre."""
+    if isinstance(forest, CompactForestClassifier):
+        nodes = np.arange(forest.feature_.shape[1])
+        leaves = forest.left_ == nodes
+        proba = forest.proba_.astype(np.float64)
+        return (
+            np.where(leaves, proba, np.inf).min(axis=1),
+            np.where(leaves, proba, -np.inf).max(axis=1),
+        )
+    low, high = [], []
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        value = tree.value[tree.children_left == -1, 0, :]
+        positive = value[:, 1] / value.sum(axis=1)
+        low.append(positive.min())
+        high.append(positive.max())
+    return np.array(low), np.array(high)
+
+
+def leaf_bounds(forest) -> tuple[np.ndarray, np.ndarray]:
+    with _bounds_lock:
+        if forest not in _bounds:
+            _bounds[forest] = _leaf_bounds(forest)
+        return _bounds[forest]
+
+
+def _tree_probabilities(forest, Xt: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Probabilité positive des arbres [start, stop[ : (n_lignes, stop - start)."""
+    if isinstance(forest, CompactForestClassifier):
+        return forest.leaf_probabilities(Xt, slice(start, stop))
+    return np.column_stack(
+        [
+            estimator.predict_proba(Xt, check_input=False)[:, 1]
+            for estimator in forest.estimators_[start:stop]
+        ]
+    )
+
+
+def early_exit_predict(
+    model, X, threshold: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Applique le pipeline en mode décision.
+    Retourne (probabilités estimées, prédictions, nombre d'arbres utilisés).
+    """
+    forest = model.steps[-1][1]
+    Xt = model[:-1].transform(X)
+    if sparse.issparse(Xt):
+        Xt = Xt.toarray()
+    # Même conversion que sklearn avant la descente des arbres
+    Xt = np.ascontiguousarray(Xt, dtype=np.float32)
+
+    low, high = leaf_bounds(forest)
+    n_trees = len(low)
+    # Contribution minimale / maximale des arbres k et suivants
+    rest_low = np.append(np.cumsum(low[::-1])[::-1], 0.0)
+    rest_high = np.append(np.cumsum(high[::-1])[::-1], 0.0)
+    block = COMPACT_BLOCK if isinstance(forest, CompactForestClassifier) else 1
+
+    total = np.zeros(len(Xt))
+    used = np.full(len(Xt), n_trees)
+    positive = np.zeros(len(Xt), dtype=bool)
+    pending = np.arange(len(Xt))
+    done_trees = 0
+    while len(pending) and done_trees < n_trees:
+        stop = min(done_trees + block, n_trees)
+        total[pending] += _tree_probabilities(
+            forest, Xt[pending], done_trees, stop
+        ).sum(axis=1)
+        done_trees = stop
+        above = (total[pending] + rest_low[done_trees]) / n_trees > threshold
+        below = (total[pending] + rest_high[done_trees]) / n_trees <= threshold
+        decided = above | below
+        positive[pending[above]] = True
+        used[pending[decided]] = done_trees
+        pending = pending[~decided]
+
+    prediction = forest.classes_.take(positive.astype(np.intp))
+    return total / used, prediction, used
@@ -0,0 +1,467 @@
+# app/ml/drift.py
+"""
+Surveillance de la dérive des entrées et des probabilités prédites.
+
+Chaque prédiction enregistrée met à jour, en temps et mémoire constants :
+- pour chaque variable numérique : moyenne et variance (algorithme de
+  Welford), minimum, maximum et histogramme à intervalles fixes ;
+- pour chaque variable catégorielle (`app/enums.py`) : le compte de chaque
+  modalité ;
+- pour la probabilité prédite : les mêmes statistiques qu'une variable
+  numérique.
+
+Les intervalles et les proportions attendues viennent d'un profil de
+référence enregistré à côté du modèle (`drift_reference.json`). Les
+compteurs sont stockés dans un fichier projeté en mémoire (mmap) : tous les
+workers d'un même hôte partagent ainsi les mêmes statistiques. Une prédiction
+ne met à jour que les compteurs de son processus ; un thread dédié les
+fusionne dans le fichier, sous verrou `flock`, toutes les
+DRIFT_FLUSH_SECONDS secondes (et avant chaque rapport).
+
+Usage :
+    python -m app.ml.drift reference [--csv data.csv]
+    python -m app.ml.drift reference --source db|synthetic [--rows N]
+
+Par défaut le profil est construit sur les données d'entraînement
+(DRIFT_TRAINING_DATA_PATH, ou `--csv`) : un profil tiré du trafic enregistré
+(`--source db`) mesurerait la dérive par rapport à un trafic peut-être déjà
+dérivé.
+"""
+
+import argparse
+import bisect
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.columnar import COLUMN_SPECS
+from app.core.config import settings
+from app.ml.model_loader import DRIFT_REFERENCE_PATH
+from app.ml.samples import load_rows
+
+logger = logging.getLogger(__name__)
+
+# Seuils usuels du PSI : stable / dérive modérée / dérive significative
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Lissage des proportions nulles avant le calcul du PSI et de la KL
+_EPSILON = 1e-4
+# Intervalles de l'histogramme des probabilités
+PROBABILITY_EDGES = [i / 10 for i in range(1, 10)]
+# Quantiles servant de bornes aux histogrammes des variables numériques
+_QUANTILES = np.linspace(0.1, 0.9, 9)
+_MAGIC = b"FTSDRIFT"
+_HEADER_SIZE = 16
+# Compte, moyenne, M2 (somme des carrés des écarts), minimum, maximum
+_MOMENTS = 5
+
+CATEGORICAL = [name for name, spec in COLUMN_SPECS.items() if spec.allowed is not None]
+NUMERIC = [name for name, spec in COLUMN_SPECS.items() if spec.allowed is None]
+
+
+def _proportions(counts: np.ndarray) -> np.ndarray:
+    total = counts.sum()
+    return counts / total if total else np.zeros(len(counts))
+
+
+def histogram(values: np.ndarray, edges: list[float]) -> np.ndarray:
+    """Comptes par intervalle ]bornes[i-1], bornes[i]] ; len(edges) + 1 cases."""
+    bins = np.searchsorted(np.asarray(edges, dtype=np.float64), values, side="left")
+    return np.bincount(bins, minlength=len(edges) + 1).astype(np.float64)
+
+
+def psi(observed: np.ndarray, expected: np.ndarray) -> float:
+    """Population Stability Index entre deux distributions de proportions."""
+    observed = np.maximum(observed, _EPSILON)
+    expected = np.maximum(expected, _EPSILON)
+    return float(np.sum((observed - expected) * np.log(observed / expected)))
+
+
+def kl_divergence(observed: np.ndarray, expected: np.ndarray) -> float:
+    """Divergence de Kullback-Leibler KL(observé ‖ référence)."""
+    observed = np.maximum(observed, _EPSILON)
+    expected = np.maximum(expected, _EPSILON)
+    return float(np.sum(observed * np.log(observed / expected)))
+
+
+def build_reference(X: pd.DataFrame, proba: np.ndarray, source: str) -> dict:
+    """
+    Profil de référence : bornes d'histogramme (déciles) et proportions des
+    variables numériques, proportions des modalités, distribution des
+    probabilités.
+    """
+    numeric = {}
+    for name in NUMERIC:
+        values = X[name].to_numpy(dtype=np.float64)
+        edges = np.unique(np.quantile(values, _QUANTILES)).tolist()
+        numeric[name] = {
+            "edges": edges,
+            "proportions": _proportions(histogram(values, edges)).tolist(),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+        }
+    categorical = {}
+    for name in CATEGORICAL:
+        allowed = COLUMN_SPECS[name].allowed.tolist()
+        counts = X[name].value_counts()
+        categorical[name] = {
+            "values": allowed,
+            "proportions": _proportions(
+                np.array([counts.get(value, 0) for value in allowed], dtype=float)
+            ).tolist(),
+        }
+    return {
+        "created_at": datetime.now(UTC).isoformat(),
+        "source": source,
+        "rows": len(X),
+        "numeric": numeric,
+        "categorical": categorical,
+        "probability": {
+            "edges": PROBABILITY_EDGES,
+            "proportions": _proportions(histogram(proba, PROBABILITY_EDGES)).tolist(),
+            "mean": float(np.mean(proba)),
+            "std": float(np.std(proba)),
+        },
+    }
+
+
+@dataclass(frozen=True)
+class _Slot:
+    """Position d'une statistique dans le tableau partagé."""
+
+    offset: int
+    edges: tuple[float, ...] = ()
+    index: dict | None = None  # modalité -> case (variables catégorielles)
+
+    @property
+    def size(self) -> int:
+        if self.index is not None:
+            return len(self.index)
+        return _MOMENTS + len(self.edges) + 1
+
+
+class DriftMonitor:
+    """Statistiques glissantes partagées entre processus via un fichier mmap."""
+
+    def __init__(self, reference: dict, path: str | Path):
+        self.reference = reference
+        self.path = Path(path)
+        self.slots: dict[str, _Slot] = {}
+        offset = 0
+        for name in NUMERIC:
+            slot = _Slot(offset, tuple(reference["numeric"][name]["edges"]))
+            self.slots[name] = slot
+            offset += slot.size
+        for name in CATEGORICAL:
+            values = reference["categorical"][name]["values"]
+            slot = _Slot(offset, index={v: i for i, v in enumerate(values)})
+            self.slots[name] = slot
+            offset += slot.size
+        self.probability = _Slot(offset, tuple(reference["probability"]["edges"]))
+        self.size = offset + self.probability.size
+        # Empreinte du profil : un fichier écrit pour une autre référence est remis à zéro
+        self.fingerprint = hashlib.sha256(
+            json.dumps(reference, sort_keys=True).encode()
+        ).digest()[:8]
+        self._lock = threading.Lock()
+        # Compteurs du processus en attente de fusion (même disposition)
+        self._pending = np.zeros(self.size)
+        self._pending_lock = threading.Lock()
+        self._closing = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self._open()
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        length = _HEADER_SIZE + self.size * 8
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, _HEADER_SIZE, 0)
+            fresh = (
+                header != _MAGIC + self.fingerprint
+                or os.fstat(self._fd).st_size != length
+            )
+            if fresh:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, length)
+                os.pwrite(self._fd, _MAGIC + self.fingerprint, 0)
+            self._mmap = mmap.mmap(self._fd, length)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._data = np.frombuffer(self._mmap, dtype=np.float64, offset=_HEADER_SIZE)
+
+    def close(self) -> None:
+        self._closing.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        del self._data
+        self._mmap.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _locked(self):
+        """Verrou entre threads (Lock) puis entre processus (flock)."""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _add(data: np.ndarray, slot: _Slot, value: float) -> None:
+        """Mise à jour de Welford, des extrêmes et de l'histogramme."""
+        start = slot.offset
+        count = data[start] + 1
+        delta = value - data[start + 1]
+        data[start] = count
+        data[start + 1] += delta / count
+        data[start + 2] += delta * (value - data[start + 1])
+        data[start + 3] = value if count == 1 else min(data[start + 3], value)
+        data[start + 4] = value if count == 1 else max(data[start + 4], value)
+        data[start + _MOMENTS + bisect.bisect_left(slot.edges, value)] += 1
+
+    @staticmethod
+    def _merge(data: np.ndarray, slot: _Slot, delta: np.ndarray) -> None:
+        """Fusionne les moments d'un lot (formule de Chan) et ses comptes."""
+        start, moments = slot.offset, slot.offset + _MOMENTS
+        count_b = delta[start]
+        if count_b:
+            count_a, mean_a, m2_a, low, high = data[start:moments]
+            count = count_a + count_b
+            diff = delta[start + 1] - mean_a
+            data[start] = count
+            data[start + 1] = mean_a + diff * count_b / count
+            data[start + 2] = (
+                m2_a + delta[start + 2] + diff**2 * count_a * count_b / count
+            )
+            data[start + 3] = (
+                delta[start + 3] if not count_a else min(low, delta[start + 3])
+            )
+            data[start + 4] = (
+                delta[start + 4] if not count_a else max(high, delta[start + 4])
+            )
+        data[moments : start + slot.size] += delta[moments : start + slot.size]
+
+    def observe(self, row: dict, probability: float | None) -> None:
+        """
+        Ajoute une entrée (valeurs métier) et, si fournie, sa probabilité aux
+        compteurs du processus, sans verrou `flock` : ils sont fusionnés dans
+        le fichier partagé par `flush`.
+        """
+        with self._pending_lock:
+            pending = self._pending
+            for name in NUMERIC:
+                self._add(pending, self.slots[name], float(row[name]))
+            for name in CATEGORICAL:
+                slot = self.slots[name]
+                value = row[name]
+                value = value.value if isinstance(value, Enum) else value
+                case = slot.index.get(value)
+                if case is not None:
+                    pending[slot.offset + case] += 1
+            if probability is not None:
+                self._add(pending, self.probability, float(probability))
+
+    def flush(self) -> None:
+        """Fusionne les compteurs du processus dans le fichier partagé."""
+        with self._pending_lock:
+            if not self._pending.any():
+                return
+            delta, self._pending = self._pending, np.zeros(self.size)
+        with self._locked():
+            for name in NUMERIC:
+                self._merge(self._data, self.slots[name], delta)
+            for name in CATEGORICAL:
+                slot = self.slots[name]
+                self._data[slot.offset : slot.offset + slot.size] += delta[
+                    slot.offset : slot.offset + slot.size
+                ]
+            self._merge(self._data, self.probability, delta)
+
+    def start_flushing(self, interval: float) -> None:
+        """Fusion périodique par un thread dédié, jusqu'à `close`."""
+        if interval <= 0 or self._flusher is not None:
+            return
+
+        def run() -> None:
+            while not self._closing.wait(interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning(f"⚠️ Statistiques de dérive non fusionnées : {e}")
+
+        self._flusher = threading.Thread(target=run, name="drift-flush", daemon=True)
+        self._flusher.start()
+
+    def reset(self) -> None:
+        with self._pending_lock:
+            self._pending[:] = 0
+        with self._locked():
+            self._data[:] = 0
+
+    def _numeric_report(self, slot: _Slot, data: np.ndarray, expected: dict) -> dict:
+        count, mean, m2, low, high = data[slot.offset : slot.offset + _MOMENTS]
+        observed = _proportions(data[slot.offset + _MOMENTS : slot.offset + slot.size])
+        expected_proportions = np.array(expected["proportions"])
+        return {
+            "count": int(count),
+            "mean": float(mean) if count else None,
+            "std": float(np.sqrt(m2 / count)) if count else None,
+            "min": float(low) if count else None,
+            "max": float(high) if count else None,
+            "reference_mean": expected["mean"],
+            "reference_std": expected["std"],
+            "psi": psi(observed, expected_proportions) if count else None,
+            "kl": kl_divergence(observed, expected_proportions) if count else None,
+        }
+
+    def report(self) -> dict:
+        """PSI et KL de chaque variable et des probabilités contre la référence."""
+        self.flush()
+        with self._locked():
+            data = self._data.copy()
+        features = {}
+        for name in NUMERIC:
+            features[name] = self._numeric_report(
+                self.slots[name], data, self.reference["numeric"][name]
+            )
+        for name in CATEGORICAL:
+            slot = self.slots[name]
+            counts = data[slot.offset : slot.offset + slot.size]
+            total = counts.sum()
+            observed = _proportions(counts)
+            expected = np.array(self.reference["categorical"][name]["proportions"])
+            features[name] = {
+                "count": int(total),
+                "counts": dict(zip(map(str, slot.index), counts.astype(int).tolist())),
+                "psi": psi(observed, expected) if total else None,
+                "kl": kl_divergence(observed, expected) if total else None,
+            }
+        probability = self._numeric_report(
+            self.probability, data, self.reference["probability"]
+        )
+        drifted = sorted(
+            name
+            for name, stats in features.items()
+            if stats["psi"] is not None and stats["psi"] >= PSI_SIGNIFICANT
+        )
+        return {
+            "observations": features[NUMERIC[0]]["count"],
+            "reference": {
+                key: self.reference[key] for key in ("created_at", "source", "rows")
+            },
+            "thresholds": {"moderate": PSI_MODERATE, "significant": PSI_SIGNIFICANT},
+            "drifted_features": drifted,
+            "probability": probability,
+            "features": features,
+        }
+
+
+_monitor: DriftMonitor | None = None
+_monitor_loaded = False
+_monitor_lock = threading.Lock()
+
+
+def load_reference(path: Path = DRIFT_REFERENCE_PATH) -> dict | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def get_drift_monitor() -> DriftMonitor | None:
+    """
+    Moniteur créé au premier appel ; None si la surveillance est désactivée
+    ou si aucun profil de référence n'accompagne le modèle.
+    """
+    global _monitor, _monitor_loaded
+    if not _monitor_loaded:
+        with _monitor_lock:
+            if not _monitor_loaded:
+                reference = load_reference() if settings.DRIFT_ENABLED else None
+                if settings.DRIFT_ENABLED and reference is None:
+                    logger.warning(
+                        f"⚠️ Aucun profil de référence ({DRIFT_REFERENCE_PATH}), "
+                        "surveillance de la dérive désactivée."
+                    )
+                if reference is not None:
+                    _monitor = DriftMonitor(reference, settings.DRIFT_STATE_PATH)
+                    _monitor.start_flushing(settings.DRIFT_FLUSH_SECONDS)
+                _monitor_loaded = True
+    return _monitor
+
+
+def observe_prediction(row: dict, probability: float | None) -> None:
+    """Alimente le moniteur sans jamais faire échouer la prédiction."""
+    monitor = get_drift_monitor()
+    if monitor is None:
+        return
+    try:
+        monitor.observe(row, probability)
+    except Exception as e:
+        logger.warning(f"⚠️ Statistiques de dérive non mises à jour : {e}")
+
+
+def stop_drift_monitor() -> None:
+    """Fusionne les compteurs en attente et arrête le thread de fusion."""
+    global _monitor, _monitor_loaded
+    with _monitor_lock:
+        monitor, _monitor, _monitor_loaded = _monitor, None, False
+    if monitor is not None:
+        monitor.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.ml.model_loader import load_model
+
+    parser = argparse.ArgumentParser(description="Surveillance de la dérive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    reference = sub.add_parser(
+        "reference", help="Construit le profil de référence à côté du modèle"
+    )
+    reference.add_argument("--rows", type=int, default=5000)
+    reference.add_argument(
+        "--source", choices=["training", "synthetic", "db"], default="training"
+    )
+    reference.add_argument(
+        "--csv",
+        type=Path,
+        default=Path(settings.DRIFT_TRAINING_DATA_PATH),
+        help="Données d'entraînement (CSV), pour --source training",
+    )
+    args = parser.parse_args(argv)
+
+    if args.source == "training":
+        if not args.csv.exists():
+            parser.error(
+                f"Données d'entraînement introuvables : {args.csv}. Indiquer "
+                "--csv, ou --source db pour partir des entrées enregistrées."
+            )
+        X = pd.read_csv(args.csv, usecols=list(COLUMN_SPECS))
+        source = str(args.csv)
+    else:
+        X = load_rows(args.source, args.rows)
+        source = args.source
+    proba = load_model().predict_proba(X[list(COLUMN_SPECS)])[:, 1]
+    DRIFT_REFERENCE_PATH.write_text(
+        json.dumps(build_reference(X, proba, source), ensure_ascii=False, indent=2)
+    )
+    print(f"Profil de référence enregistré : {DRIFT_REFERENCE_PATH} ({len(X)} lignes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,579 @@
+# app/ml/features.py
+"""
+Magasin des caractéristiques encodées de toutes les entrées enregistrées.
+
+La matrice est celle que reçoit la forêt : sortie du préprocesseur du modèle
+servi (`model[:-1]`), en float32. La forêt convertit de toute façon ses
+entrées en float32 : les scores calculés depuis le magasin sont identiques.
+Le répertoire FEATURE_STORE_DIR contient :
+- `features.npy` : une ligne par entrée ;
+- `ids.npy` : l'id de l'entrée de chaque ligne (index id → ligne) ;
+- `deleted.npy` : les ids supprimés depuis la dernière construction ;
+- `meta.json` : version du modèle et noms des caractéristiques.
+
+Les fichiers sont des `.npy` standard, à en-tête de taille fixe : une ligne
+est ajoutée en place, puis l'en-tête est réécrit avec le nouveau nombre de
+lignes (`ids.npy` en dernier, il fait foi). Les consommateurs vectorisés les
+ouvrent projetés en mémoire (`open_features`), sans copie ni accès à la base.
+
+- Chaque prédiction enregistrée est déposée dans une file bornée
+  (FEATURE_STORE_QUEUE_SIZE) ; un thread dédié l'encode (réplique numpy du
+  préprocesseur) et l'ajoute par lots, sous verrou `flock` : tous les workers
+  d'un même hôte partagent le magasin, sans fichier ouvert sur le chemin
+  d'une requête.
+- Une suppression est ajoutée à `deleted.npy` par le même thread ; la ligne
+  reste jusqu'à la prochaine construction.
+- `python -m app.ml.features rebuild` reconstruit le magasin depuis la base
+  (après un changement de modèle ou un archivage). Les ajouts et
+  suppressions faits pendant la reconstruction, la première comprise, sont
+  reportés. Tant que le magasin n'a pas été construit pour la version
+  servie, rien n'y est ajouté.
+
+Usage :
+    python -m app.ml.features rebuild [--chunk-size N]
+    python -m app.ml.features status
+"""
+
+import argparse
+import fcntl
+import itertools
+import json
+import logging
+import os
+import queue
+import shutil
+import struct
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from enum import Enum
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.ml.model_loader import model, model_version
+from app.ml.samples import example_row, records_frame
+
+logger = logging.getLogger(__name__)
+
+FEATURES_FILE = "features.npy"
+IDS_FILE = "ids.npy"
+DELETED_FILE = "deleted.npy"
+META_FILE = "meta.json"
+# En-tête .npy (version 1.0) de taille fixe, réécrit en place à chaque ajout
+_HEADER_SIZE = 128
+_FEATURE_DTYPE = np.dtype(np.float32)
+_ID_DTYPE = np.dtype(np.int64)
+
+INPUT_COLUMNS = list(example_row())
+
+
+class FeatureEncoder:
+    """
+    Réplique numpy d'un préprocesseur ColumnTransformer fait de StandardScaler
+    et de OneHotEncoder (`handle_unknown="ignore"`) : mêmes opérations, même
+    résultat, sans le coût fixe de sklearn par appel. Tout autre préprocesseur
+    est appliqué tel quel.
+    """
+
+    def __init__(self, preprocessor):
+        self.preprocessor = preprocessor
+        self.names = [str(name) for name in preprocessor.get_feature_names_out()]
+        self.blocks = self._blocks(preprocessor)
+
+    @staticmethod
+    def _blocks(preprocessor) -> list[tuple] | None:
+        if isinstance(preprocessor, Pipeline) and len(preprocessor.steps) == 1:
+            preprocessor = preprocessor.steps[0][1]
+        if not isinstance(preprocessor, ColumnTransformer):
+            return None
+        blocks = []
+        for _, transformer, columns in preprocessor.transformers_:
+            if isinstance(transformer, str):
+                if transformer == "drop":
+                    continue
+                return None
+            if isinstance(transformer, StandardScaler):
+                blocks.append(("scale", columns, transformer.mean_, transformer.scale_))
+            elif (
+                isinstance(transformer, OneHotEncoder)
+                and transformer.handle_unknown == "ignore"
+                and transformer.drop is None
+                and transformer.min_frequency is None
+                and transformer.max_categories is None
+            ):
+                blocks.append(("onehot", columns, transformer.categories_, None))
+            else:
+                return None
+        return blocks
+
+    def transform(self, X: pd.DataFrame | dict[str, list]) -> np.ndarray:
+        """Encode un DataFrame ou des colonnes (`rows_columns`)."""
+        if self.blocks is None:
+            return np.asarray(
+                self.preprocessor.transform(pd.DataFrame(X)),
+                dtype=_FEATURE_DTYPE,
+                order="C",
+            )
+        parts = []
+        for kind, columns, first, second in self.blocks:
+            if kind == "scale":
+                values = np.column_stack(
+                    [np.asarray(X[column], dtype=np.float64) for column in columns]
+                )
+                if first is not None:
+                    values -= first
+                if second is not None:
+                    values /= second
+                parts.append(values)
+            else:
+                for column, categories in zip(columns, first):
+                    values = np.asarray(X[column], dtype=object)
+                    parts.append(values[:, None] == categories[None, :])
+        return np.hstack(parts, dtype=_FEATURE_DTYPE)
+
+
+@cache
+def get_encoder() -> FeatureEncoder:
+    """Encodeur du modèle servi par défaut."""
+    return FeatureEncoder(model[:-1])
+
+
+def rows_columns(rows: list[dict]) -> dict[str, list]:
+    """Entrées (valeurs ou enums) en colonnes prêtes pour l'encodeur."""
+    return {
+        name: [
+            row[name].value if isinstance(row[name], Enum) else row[name]
+            for row in rows
+        ]
+        for name in INPUT_COLUMNS
+    }
+
+
+def _header(dtype: np.dtype, shape: tuple) -> bytes:
+    text = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": shape,
+        }
+    )
+    # Magic (6 octets), version (2), longueur de l'en-tête (2), puis le dict
+    header = text.encode("latin1").ljust(_HEADER_SIZE - 11) + b"\n"
+    return np.lib.format.magic(1, 0) + struct.pack("<H", len(header)) + header
+
+
+class _Array:
+    """Fichier .npy dont les lignes sont ajoutées en place."""
+
+    def __init__(self, path: Path, dtype: np.dtype, width: int | None = None):
+        self.path = path
+        self.dtype = dtype
+        self.width = width
+
+    def _shape(self, rows: int) -> tuple:
+        return (rows,) if self.width is None else (rows, self.width)
+
+    @property
+    def row_bytes(self) -> int:
+        return self.dtype.itemsize * (self.width or 1)
+
+    def rows(self) -> int:
+        if not self.path.exists():
+            return 0
+        with open(self.path, "rb") as f:
+            np.lib.format.read_magic(f)
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        return shape[0]
+
+    def create(self) -> None:
+        with open(self.path, "wb") as f:
+            f.write(_header(self.dtype, self._shape(0)))
+
+    def write(self, values: np.ndarray, at_row: int) -> None:
+        """Écrit `values` à partir de la ligne `at_row`, puis l'en-tête."""
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        with open(self.path, "r+b") as f:
+            f.seek(_HEADER_SIZE + at_row * self.row_bytes)
+            f.write(values.tobytes())
+            f.truncate()
+            f.flush()
+            f.seek(0)
+            f.write(_header(self.dtype, self._shape(at_row + len(values))))
+
+    def read(self, rows: int) -> np.ndarray:
+        """Les `rows` premières lignes, projetées en mémoire (lecture seule)."""
+        if rows == 0:
+            return np.empty(self._shape(0), dtype=self.dtype)
+        return np.memmap(
+            self.path,
+            dtype=self.dtype,
+            mode="r",
+            offset=_HEADER_SIZE,
+            shape=self._shape(rows),
+        )
+
+
+@dataclass
+class FeatureMatrix:
+    """Instantané du magasin : tableaux projetés en mémoire, sans copie."""
+
+    ids: np.ndarray
+    features: np.ndarray
+    deleted: np.ndarray
+    names: list[str]
+    model_version: str
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Masque des lignes dont l'entrée n'a pas été supprimée."""
+        return np.isin(self.ids, self.deleted, invert=True)
+
+    def rows_of(self, prediction_input_ids) -> np.ndarray:
+        """Ligne de chaque id (-1 si absent ou supprimé)."""
+        wanted = np.asarray(prediction_input_ids, dtype=_ID_DTYPE)
+        order = np.argsort(self.ids, kind="stable")
+        sorted_ids = self.ids[order]
+        positions = np.searchsorted(sorted_ids, wanted)
+        positions = np.minimum(positions, max(len(sorted_ids) - 1, 0))
+        found = (
+            (sorted_ids[positions] == wanted)
+            if len(sorted_ids)
+            else np.zeros(len(wanted), dtype=bool)
+        )
+        found &= np.isin(wanted, self.deleted, invert=True)
+        rows = np.full(len(wanted), -1, dtype=np.int64)
+        rows[found] = order[positions[found]]
+        return rows
+
+
+class FeatureStore:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _arrays(self, path: Path, width: int) -> tuple[_Array, _Array, _Array]:
+        return (
+            _Array(path / FEATURES_FILE, _FEATURE_DTYPE, width),
+            _Array(path / IDS_FILE, _ID_DTYPE),
+            _Array(path / DELETED_FILE, _ID_DTYPE),
+        )
+
+    @contextmanager
+    def _locked(self):
+        """Verrou entre threads (Lock) puis entre processus (flock)."""
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+
+    def meta(self) -> dict | None:
+        path = self.path / META_FILE
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    @staticmethod
+    def _write_meta(path: Path, names: list[str], version: str, complete: bool):
+        (path / META_FILE).write_text(
+            json.dumps(
+                {
+                    "model_version": version,
+                    "names": names,
+                    "complete": complete,
+                    "created_at": datetime.now(UTC).isoformat(),
+                }
+            )
+        )
+
+    def append(self, prediction_input_ids, features: np.ndarray) -> None:
+        with self._locked():
+            meta = self.meta()
+            if meta is None:
+                return
+            features_file, ids_file, _ = self._arrays(self.path, len(meta["names"]))
+            rows = ids_file.rows()
+            features_file.write(features, rows)
+            ids_file.write(np.asarray(prediction_input_ids), rows)
+
+    def delete(self, prediction_input_ids) -> None:
+        with self._locked():
+            meta = self.meta()
+            if meta is None:
+                return
+            _, _, deleted_file = self._arrays(self.path, len(meta["names"]))
+            deleted_file.write(np.asarray(prediction_input_ids), deleted_file.rows())
+
+    def open(self) -> FeatureMatrix | None:
+        """Instantané cohérent du magasin ; None s'il n'a jamais été construit."""
+        with self._locked():
+            meta = self.meta()
+            if meta is None or not meta.get("complete", True):
+                return None
+            features_file, ids_file, deleted_file = self._arrays(
+                self.path, len(meta["names"])
+            )
+            rows = ids_file.rows()
+            return FeatureMatrix(
+                ids=ids_file.read(rows),
+                features=features_file.read(rows),
+                deleted=deleted_file.read(deleted_file.rows()),
+                names=meta["names"],
+                model_version=meta["model_version"],
+            )
+
+    def rebuild(
+        self,
+        batches: Iterable[tuple[np.ndarray, np.ndarray]],
+        names: list[str],
+        version: str,
+    ) -> int:
+        """
+        Reconstruit le magasin à partir de `batches` (ids, caractéristiques)
+        dans un répertoire temporaire, puis le met en place. Retourne le nombre
+        de lignes.
+        """
+        with self._locked():
+            previous = self.meta()
+            if previous is None:
+                # Premier build : magasin vide, pas encore lisible, pour que
+                # les ajouts faits pendant la lecture de la base soient reportés
+                for array in self._arrays(self.path, len(names)):
+                    array.create()
+                self._write_meta(self.path, names, version, complete=False)
+                previous = self.meta()
+            _, old_ids, old_deleted = self._arrays(self.path, len(previous["names"]))
+            start = old_ids.rows(), old_deleted.rows()
+
+        building = self.path / "rebuild"
+        shutil.rmtree(building, ignore_errors=True)
+        building.mkdir(parents=True)
+        features_file, ids_file, deleted_file = self._arrays(building, len(names))
+        for array in (features_file, ids_file, deleted_file):
+            array.create()
+        rows = 0
+        for ids, features in batches:
+            features_file.write(features, rows)
+            ids_file.write(ids, rows)
+            rows += len(ids)
+
+        with self._locked():
+            meta = self.meta()
+            if meta == previous:
+                # Écritures faites pendant la lecture de la base : reportées
+                old_features, old_ids, old_deleted = self._arrays(
+                    self.path, len(meta["names"])
+                )
+                added = old_ids.read(old_ids.rows())[start[0] :]
+                new = np.isin(added, ids_file.read(rows), invert=True)
+                if new.any() and meta["names"] == names:
+                    features = old_features.read(old_ids.rows())[start[0] :]
+                    features_file.write(features[new], rows)
+                    ids_file.write(added[new], rows)
+                    rows += int(new.sum())
+                deleted = old_deleted.read(old_deleted.rows())[start[1] :]
+                deleted_file.write(deleted, 0)
+            self._write_meta(building, names, version, complete=True)
+            # meta.json en dernier : il rend le magasin utilisable
+            for name in (FEATURES_FILE, IDS_FILE, DELETED_FILE, META_FILE):
+                os.replace(building / name, self.path / name)
+        building.rmdir()
+        return rows
+
+
+def iter_encoded(
+    db_engine: Engine, encoder: FeatureEncoder, chunk_size: int
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Toutes les entrées enregistrées, encodées par blocs (curseur côté serveur)."""
+    from app.models import PredictionInput
+
+    query = select(
+        PredictionInput.id, *(getattr(PredictionInput, name) for name in INPUT_COLUMNS)
+    ).order_by(PredictionInput.id)
+    with db_engine.connect() as connection:
+        result = connection.execution_options(yield_per=chunk_size).execute(query)
+        for records in result.partitions(chunk_size):
+            X = records_frame(records, ["id", *INPUT_COLUMNS])
+            yield X["id"].to_numpy(dtype=_ID_DTYPE), encoder.transform(X)
+
+
+_store: FeatureStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store() -> FeatureStore | None:
+    """Magasin partagé ; None si FEATURE_STORE_ENABLED est faux."""
+    global _store
+    if not settings.FEATURE_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None or _store.path != Path(settings.FEATURE_STORE_DIR):
+            _store = FeatureStore(settings.FEATURE_STORE_DIR)
+    return _store
+
+
+class FeatureWriter:
+    """
+    Écrit les ajouts et suppressions dans le magasin depuis un thread dédié :
+    une requête dépose l'opération dans une file bornée, sans entrée/sortie ni
+    verrou `flock`. Le thread les écrit par lots, dans l'ordre. File pleine :
+    l'opération est abandonnée et comptée (le recalcul relit alors ces entrées
+    en base).
+    """
+
+    def __init__(self, maxsize: int, batch_size: int = 256):
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stale_warned = False
+
+    def put(self, operation: tuple) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="feature-store-writer", daemon=True
+                    )
+                    self._thread.start()
+        try:
+            self.queue.put_nowait(operation)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([operation for operation in batch if operation])
+            except Exception as e:
+                logger.warning(f"⚠️ Magasin de caractéristiques non mis à jour : {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _write(self, operations: list[tuple]) -> None:
+        store = get_feature_store()
+        if store is None or not operations:
+            return
+        meta = store.meta()
+        if meta is None:
+            return
+        if meta["model_version"] != model_version():
+            if not self._stale_warned:
+                logger.warning(
+                    "⚠️ Magasin de caractéristiques construit pour la version "
+                    f"{meta['model_version']} : ajouts suspendus jusqu'à "
+                    "`python -m app.ml.features rebuild`."
+                )
+                self._stale_warned = True
+            operations = [op for op in operations if op[0] == "delete"]
+        # Opérations consécutives de même nature regroupées, ordre conservé
+        for kind, group in itertools.groupby(operations, key=lambda op: op[0]):
+            group = list(group)
+            if kind == "append":
+                rows = [row for _, _, row in group]
+                store.append(
+                    [prediction_input_id for _, prediction_input_id, _ in group],
+                    get_encoder().transform(rows_columns(rows)),
+                )
+            else:
+                store.delete([i for _, ids in group for i in ids])
+
+    def flush(self) -> None:
+        """Attend l'écriture des opérations déjà déposées."""
+        if self._thread is not None:
+            self.queue.join()
+
+    def stop(self) -> None:
+        """Écrit les opérations en attente et arrête le thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+
+
+feature_writer = FeatureWriter(settings.FEATURE_STORE_QUEUE_SIZE)
+
+
+def store_prediction_features(prediction_input_id: int, row: dict) -> None:
+    """Dépose une entrée pour le magasin, sans jamais faire échouer la prédiction."""
+    if get_feature_store() is not None:
+        feature_writer.put(("append", prediction_input_id, row))
+
+
+def discard_features(prediction_input_ids: list[int]) -> None:
+    """Dépose des entrées supprimées, sans jamais faire échouer la suppression."""
+    if get_feature_store() is not None and prediction_input_ids:
+        feature_writer.put(("delete", list(prediction_input_ids)))
+
+
+def open_features() -> FeatureMatrix | None:
+    """Matrice encodée de toutes les entrées, projetée en mémoire."""
+    store = get_feature_store()
+    return store.open() if store is not None else None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Magasin des caractéristiques")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild", help="Reconstruit le magasin depuis la base")
+    rebuild.add_argument(
+        "--chunk-size", type=int, default=settings.FEATURE_STORE_CHUNK_SIZE
+    )
+    sub.add_parser("status", help="Affiche l'état du magasin")
+    args = parser.parse_args(argv)
+
+    store = FeatureStore(settings.FEATURE_STORE_DIR)
+    if args.command == "rebuild":
+        from app.core.database import read_engine
+
+        encoder = get_encoder()
+        rows = store.rebuild(
+            iter_encoded(read_engine, encoder, args.chunk_size),
+            encoder.names,
+            model_version(),
+        )
+        print(f"Magasin reconstruit : {rows} lignes dans {store.path}")
+        return
+
+    matrix = store.open()
+    if matrix is None:
+        building = store.meta() is not None
+        print(
+            f"{'Construction en cours' if building else 'Aucun magasin'} : {store.path}"
+        )
+        return
+    alive = int(matrix.alive.sum())
+    print(
+        f"{store.path} : {len(matrix.ids)} lignes ({alive} actives), "
+        f"{len(matrix.names)} caractéristiques, modèle {matrix.model_version}"
+        + ("" if matrix.model_version == model_version() else " (périmé)")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# app/ml/inference.py
+"""
+File d'attente bornée devant l'inférence du modèle.
+
+Les requêtes sont exécutées par un nombre fixe de threads. Quand la file est
+pleine, la soumission échoue immédiatement (délestage) au lieu d'empiler les
+requêtes dans le threadpool de Starlette. Une tâche dont l'échéance est passée
+est abandonnée avant d'atteindre le modèle.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.ml.backends import queue_workers
+
+
+class InferenceQueueFull(Exception):
+    """La file d'inférence a atteint sa profondeur maximale."""
+
+
+class DeadlineExceeded(Exception):
+    """L'échéance de la requête est dépassée."""
+
+
+class InferenceQueue:
+    def __init__(self, maxsize: int, workers: int):
+        self.maxsize = maxsize
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.completed = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"inference-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def submit(self, fn: Callable, *args: Any, deadline: float | None = None) -> Future:
+        """
+        Place une tâche dans la file. `deadline` est une échéance absolue
+        (horloge time.monotonic). Lève InferenceQueueFull si la file est pleine.
+        """
+        if deadline is not None and time.monotonic() >= deadline:
+            self._count("expired")
+            raise DeadlineExceeded()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((fn, args, deadline, future))
+        except queue.Full:
+            self._count("rejected")
+            raise InferenceQueueFull()
+        self._count("submitted")
+        return future
+
+    def run(self, fn: Callable, *args: Any, deadline: float | None = None) -> Any:
+        """Soumet la tâche et attend son résultat au plus jusqu'à l'échéance."""
+        future = self.submit(fn, *args, deadline=deadline)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # Si la tâche n'a pas démarré, elle ne sera jamais exécutée
+            future.cancel()
+            raise DeadlineExceeded()
+
+    def _worker(self) -> None:
+        while True:
+            fn, args, deadline, future = self._queue.get()
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._count("expired")
+                    future.set_exception(DeadlineExceeded())
+                    continue
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+                self._count("completed")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "depth": self._queue.qsize(),
+                "max_depth": self.maxsize,
+                "workers": len(self._threads),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "completed": self.completed,
+            }
+
+
+inference_queue = InferenceQueue(
+    maxsize=settings.INFERENCE_QUEUE_SIZE, workers=queue_workers()
+)
+
+
+def deadline_from_timeout(timeout: float | None) -> float | None:
+    """Convertit un délai relatif (secondes) en échéance absolue."""
+    if timeout is None:
+        timeout = settings.INFERENCE_DEFAULT_TIMEOUT_SECONDS or None
+    if timeout is None:
+        return None
+    return time.monotonic() + min(timeout, settings.INFERENCE_MAX_TIMEOUT_SECONDS)
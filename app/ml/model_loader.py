@@ -1,4 +1,6 @@
+import hashlib
 import logging
+from functools import cache
 from io import BytesIO
 from pathlib import Path
 
@@ -6,28 +8,49 @@ import joblib
 import requests
 from huggingface_hub import hf_hub_url
 
+from app.core.config import settings
+
 MODEL_PATH = Path(__file__).resolve().parent / "random_forest_pipeline.pkl"
 # Nom du dépôt et fichier sur Hugging Face
 HF_REPO_ID = "XavierCoulon/futurisys-model"
 HF_FILENAME = "random_forest_pipeline.pkl"
+# Variantes compactes produites par `python -m app.ml.compact save <nom>`
+VARIANTS_DIR = MODEL_PATH.parent / "variants"
+# Profil de référence de la surveillance de dérive (python -m app.ml.drift reference)
+DRIFT_REFERENCE_PATH = MODEL_PATH.parent / "drift_reference.json"
+
+logger = logging.getLogger(__name__)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
 
+def load_variant(name: str):
+    """Charge une variante compacte enregistrée dans app/ml/variants."""
+    path = VARIANTS_DIR / f"{name}.pkl"
+    logger.info(f"🔍 Chargement de la variante {name} depuis {path}")
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        logger.error(f"❌ Échec du chargement de la variante {name} : {e}")
+        raise RuntimeError(f"Impossible de charger la variante {name}.") from e
 
-def load_model():
-    """Charge le modèle ML depuis le fichier en local ou depuis Hugging Face."""
-    logging.info(f"🔍 Tentative de chargement du modèle depuis {MODEL_PATH}")
+
+def load_model(variant: str | None = None):
+    """
+    Charge le modèle ML depuis le fichier en local ou depuis Hugging Face.
+    Si `variant` (par défaut MODEL_VARIANT) est renseigné, charge cette
+    variante compacte à la place.
+    """
+    variant = settings.MODEL_VARIANT if variant is None else variant
+    if variant:
+        return load_variant(variant)
+    logger.info(f"🔍 Tentative de chargement du modèle depuis {MODEL_PATH}")
     if MODEL_PATH.exists():
         try:
             model = joblib.load(MODEL_PATH)
-            logging.info("✅ Modèle chargé depuis le fichier local.")
+            logger.info("✅ Modèle chargé depuis le fichier local.")
             return model
         except Exception as e:
-            logging.error(f"❌ Échec du chargement local : {e}")
-    logging.info("🌐 Téléchargement du modèle depuis Hugging Face...")
+            logger.error(f"❌ Échec du chargement local : {e}")
+    logger.info("🌐 Téléchargement du modèle depuis Hugging Face...")
     try:
         url = hf_hub_url(
             repo_id=HF_REPO_ID,
@@ -36,11 +59,27 @@ def load_model():
         response = requests.get(url)
         response.raise_for_status()
         model = joblib.load(BytesIO(response.content))
-        logging.info("✅ Modèle téléchargé et chargé depuis Hugging Face.")
+        logger.info("✅ Modèle téléchargé et chargé depuis Hugging Face.")
         return model
     except Exception as e:
-        logging.error(f"❌ Échec du téléchargement depuis Hugging Face : {e}")
+        logger.error(f"❌ Échec du téléchargement depuis Hugging Face : {e}")
         raise RuntimeError("Impossible de charger le modèle ML.") from e
 
 
+@cache
+def model_version(variant: str | None = None) -> str:
+    """
+    Version du modèle servi, enregistrée avec chaque prédiction : MODEL_VERSION
+    si défini, sinon empreinte du fichier local (suffixée du nom de variante).
+    """
+    if settings.MODEL_VERSION:
+        return settings.MODEL_VERSION
+    variant = settings.MODEL_VARIANT if variant is None else variant
+    path = VARIANTS_DIR / f"{variant}.pkl" if variant else MODEL_PATH
+    if not path.exists():
+        return f"{HF_REPO_ID}/{HF_FILENAME}"
+    version = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+    return f"{version}-{variant}" if variant else version
+
+
 model = load_model()
@@ -0,0 +1,131 @@
+# app/ml/profiles.py
+"""
+Profils d'inférence : parallélisme joblib (`n_jobs`) et threads natifs
+(BLAS/OpenMP, via threadpoolctl) appliqués autour de chaque appel au modèle.
+
+- `latency` : une ligne à la fois, sans coût de dispatch joblib ni
+  sur-souscription des threads natifs ;
+- `throughput` : tous les cœurs pour les lots et les exports.
+
+Le modèle partagé n'est jamais modifié : chaque profil utilise une copie
+superficielle dont seul `n_jobs` diffère (les arbres ne sont pas copiés).
+"""
+
+import copy
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from sklearn.base import BaseEstimator
+from sklearn.pipeline import Pipeline
+from threadpoolctl import ThreadpoolController
+
+from app.core.config import InferenceProfile, settings
+
+_controller = ThreadpoolController()
+_copies: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_copies_lock = threading.Lock()
+
+
+def get_profile(name: str | None) -> InferenceProfile:
+    """Profil nommé ; `None` désigne le profil par défaut (INFERENCE_PROFILE)."""
+    name = name or settings.INFERENCE_PROFILE
+    try:
+        return settings.INFERENCE_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Profil d'inférence inconnu : {name}")
+
+
+def _with_n_jobs(estimator: Any, n_jobs: int) -> Any:
+    if isinstance(estimator, Pipeline):
+        estimator = copy.copy(estimator)
+        estimator.steps = [
+            (name, _with_n_jobs(step, n_jobs)) for name, step in estimator.steps
+        ]
+        return estimator
+    if isinstance(estimator, BaseEstimator) and hasattr(estimator, "n_jobs"):
+        estimator = copy.copy(estimator)
+        estimator.n_jobs = n_jobs
+    return estimator
+
+
+def model_for_profile(model: Any, name: str | None = None) -> Any:
+    """
+    Version du modèle configurée pour le profil (mise en cache par modèle).
+    Les objets qui ne sont pas des estimateurs sklearn sont retournés tels quels.
+    """
+    profile = get_profile(name)
+    if profile.n_jobs is None or not isinstance(model, BaseEstimator):
+        return model
+    with _copies_lock:
+        per_model = _copies.setdefault(model, {})
+        if profile.n_jobs not in per_model:
+            per_model[profile.n_jobs] = _with_n_jobs(model, profile.n_jobs)
+        return per_model[profile.n_jobs]
+
+
+class _NativeThreadLimit:
+    """
+    Les limites threadpoolctl s'appliquent à tout le processus, pas au thread
+    appelant : les appels sont donc regroupés par limite. Les appels de même
+    limite s'exécutent ensemble (posée par le premier entré, restaurée par le
+    dernier sorti) ; un appel d'une autre limite (`None` compris) attend
+    qu'ils soient sortis, et les nouveaux arrivants attendent derrière lui.
+    Un appel `latency` en cours ne bride ainsi jamais un appel `throughput`.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._active = 0
+        self._threads: int | None = None
+        self._limiter = None
+        # Appels en attente, par limite
+        self._waiting: defaultdict[int | None, int] = defaultdict(int)
+
+    def _can_enter(self, threads: int | None) -> bool:
+        if self._active == 0:
+            return True
+        return self._threads == threads and not any(
+            count for other, count in self._waiting.items() if other != threads
+        )
+
+    @contextmanager
+    def __call__(self, threads: int | None) -> Iterator[None]:
+        with self._condition:
+            self._waiting[threads] += 1
+            self._condition.wait_for(lambda: self._can_enter(threads))
+            self._waiting[threads] -= 1
+            if self._active == 0:
+                self._threads = threads
+                if threads is not None:
+                    self._limiter = _controller.limit(limits=threads)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                if self._active == 0:
+                    if self._limiter is not None:
+                        self._limiter.restore_original_limits()
+                        self._limiter = None
+                    self._condition.notify_all()
+
+
+native_thread_limit = _NativeThreadLimit()
+
+
+@contextmanager
+def inference_profile(model: Any, name: str | None = None) -> Iterator[Any]:
+    """
+    Applique le profil pendant le bloc et fournit le modèle à utiliser :
+
+        with inference_profile(model, "latency") as profiled:
+            profiled.predict_proba(X)
+    """
+    profile = get_profile(name)
+    profiled = model_for_profile(model, name)
+    with native_thread_limit(profile.native_threads):
+        yield profiled
@@ -0,0 +1,226 @@
+# app/ml/registry.py
+"""
+Registre de modèles nommés (par exemple un pipeline par département), en
+plus du modèle servi par défaut.
+
+- Un modèle `<nom>` est le fichier `<nom>.pkl` de MODELS_DIR, chargé au
+  premier usage.
+- La mémoire totale des modèles chargés est plafonnée
+  (MODELS_MEMORY_BUDGET_MB) : au-delà, les modèles inactifs les moins
+  récemment utilisés sont déchargés. Un modèle en cours d'utilisation n'est
+  jamais déchargé.
+- Des requêtes simultanées sur un modèle non chargé attendent un seul et
+  même chargement.
+- Chargements, échecs, attentes, succès de cache et évictions sont comptés
+  et journalisés.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import joblib
+from sklearn.pipeline import Pipeline
+
+from app.core.config import settings
+from app.ml.model_loader import MODEL_PATH
+
+logger = logging.getLogger(__name__)
+
+# Noms autorisés : pas de séparateur de chemin ni de point
+MODEL_NAME_PATTERN = r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$"
+
+
+class UnknownModel(Exception):
+    """Aucun modèle de ce nom dans MODELS_DIR."""
+
+
+@dataclass
+class LoadedModel:
+    name: str
+    model: Any
+    version: str
+    nbytes: int
+    load_seconds: float
+    in_use: int = 0
+    last_used: float = 0.0
+
+
+def estimate_nbytes(model: Any, fallback: int) -> int:
+    """
+    Mémoire occupée par la forêt (tableaux des arbres), à défaut la taille
+    du fichier. Le prétraitement est négligeable devant les arbres.
+    """
+    forest = model.steps[-1][1] if isinstance(model, Pipeline) else model
+    if hasattr(forest, "nbytes"):
+        return int(forest.nbytes)
+    estimators = getattr(forest, "estimators_", None)
+    if not estimators or not all(hasattr(e, "tree_") for e in estimators):
+        return fallback
+    total = 0
+    for estimator in estimators:
+        state = estimator.tree_.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+
+class ModelRegistry:
+    def __init__(self, models_dir: Path, budget_bytes: int):
+        self.models_dir = models_dir
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, LoadedModel] = OrderedDict()
+        self._loading: dict[str, Future] = {}
+        self._counters = dict.fromkeys(
+            ("hits", "misses", "waits", "loads", "load_failures", "evictions"), 0
+        )
+        self._load_seconds = 0.0
+
+    def _path(self, name: str) -> Path:
+        path = self.models_dir / f"{name}.pkl"
+        if not re.fullmatch(MODEL_NAME_PATTERN, name) or not path.is_file():
+            raise UnknownModel(name)
+        return path
+
+    def available(self) -> list[str]:
+        if not self.models_dir.is_dir():
+            return []
+        return sorted(
+            path.stem
+            for path in self.models_dir.glob("*.pkl")
+            if re.fullmatch(MODEL_NAME_PATTERN, path.stem)
+        )
+
+    def _load(self, name: str) -> LoadedModel:
+        path = self._path(name)
+        started = time.perf_counter()
+        content = path.read_bytes()
+        model = joblib.load(BytesIO(content))
+        seconds = time.perf_counter() - started
+        return LoadedModel(
+            name=name,
+            model=model,
+            version=f"{name}-{hashlib.sha256(content).hexdigest()[:12]}",
+            nbytes=estimate_nbytes(model, len(content)),
+            load_seconds=seconds,
+        )
+
+    def _evict(self, keep: str) -> None:
+        """Décharge les modèles inactifs les plus anciens jusqu'à tenir le budget."""
+        loaded = sum(entry.nbytes for entry in self._entries.values())
+        for name in list(self._entries):
+            if loaded <= self.budget_bytes:
+                return
+            entry = self._entries[name]
+            if name == keep or entry.in_use:
+                continue
+            del self._entries[name]
+            loaded -= entry.nbytes
+            self._counters["evictions"] += 1
+            logger.info(f"♻️ Modèle {name} déchargé ({entry.nbytes / 2**20:.1f} Mo)")
+        if loaded > self.budget_bytes:
+            logger.warning(
+                f"⚠️ Budget mémoire des modèles dépassé ({loaded / 2**20:.1f} Mo) : "
+                "aucun modèle inactif à décharger."
+            )
+
+    def acquire(self, name: str) -> LoadedModel:
+        """Réserve un modèle (chargé si besoin) ; à libérer avec `release`."""
+        while True:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    self._entries.move_to_end(name)
+                    entry.in_use += 1
+                    entry.last_used = time.time()
+                    self._counters["hits"] += 1
+                    return entry
+                loading = self._loading.get(name)
+                owner = loading is None
+                if owner:
+                    loading = self._loading[name] = Future()
+                    self._counters["misses"] += 1
+                else:
+                    self._counters["waits"] += 1
+            if not owner:
+                # Chargement en cours par une autre requête : on attend son
+                # résultat puis on réserve le modèle depuis le cache
+                loading.result()
+                continue
+
+            try:
+                entry = self._load(name)
+            except BaseException as e:
+                with self._lock:
+                    del self._loading[name]
+                    if not isinstance(e, UnknownModel):
+                        self._counters["load_failures"] += 1
+                loading.set_exception(e)
+                if not isinstance(e, UnknownModel):
+                    logger.error(f"❌ Échec du chargement du modèle {name} : {e}")
+                raise
+            with self._lock:
+                entry.in_use = 1
+                entry.last_used = time.time()
+                self._entries[name] = entry
+                del self._loading[name]
+                self._counters["loads"] += 1
+                self._load_seconds += entry.load_seconds
+                self._evict(keep=name)
+            loading.set_result(entry)
+            logger.info(
+                f"📦 Modèle {name} chargé en {entry.load_seconds:.2f}s "
+                f"({entry.nbytes / 2**20:.1f} Mo, version {entry.version})"
+            )
+            return entry
+
+    def release(self, entry: LoadedModel) -> None:
+        with self._lock:
+            entry.in_use -= 1
+            self._evict(keep="")
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[LoadedModel]:
+        entry = self.acquire(name)
+        try:
+            yield entry
+        finally:
+            self.release(entry)
+
+    def stats(self) -> dict:
+        available = self.available()
+        with self._lock:
+            loaded = [
+                {
+                    "name": entry.name,
+                    "version": entry.version,
+                    "bytes": entry.nbytes,
+                    "in_use": entry.in_use,
+                    "last_used": entry.last_used,
+                }
+                for entry in reversed(self._entries.values())
+            ]
+            return {
+                "budget_bytes": self.budget_bytes,
+                "loaded_bytes": sum(item["bytes"] for item in loaded),
+                "loaded": loaded,
+                "available": available,
+                **self._counters,
+                "load_seconds_total": round(self._load_seconds, 4),
+            }
+
+
+model_registry = ModelRegistry(
+    Path(settings.MODELS_DIR) if settings.MODELS_DIR else MODEL_PATH.parent / "models",
+    settings.MODELS_MEMORY_BUDGET_MB * 2**20,
+)
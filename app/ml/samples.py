@@ -0,0 +1,112 @@
+# app/ml/samples.py
+"""
+Données d'exemple construites à partir du schéma d'entrée : valeurs
+`examples` des champs, ou lignes synthétiques aléatoires mais valides
+(enums, bornes et règles de cohérence). Utilisées pour les benchmarks,
+l'évaluation hors ligne des variantes du modèle et son préchauffage.
+Les entrées réellement enregistrées peuvent aussi être relues de la base.
+"""
+
+from enum import Enum, IntEnum
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app.schemas import PredictionInputBase
+
+
+def example_row() -> dict:
+    """Une ligne d'entrée valide, sans matricule, aux valeurs métier."""
+    row = {}
+    for name, field in PredictionInputBase.model_fields.items():
+        if name == "matricule":
+            continue
+        value = field.examples[0]
+        row[name] = value.value if isinstance(value, Enum) else value
+    return row
+
+
+def example_frame(rows: int = 1) -> pd.DataFrame:
+    """DataFrame de `rows` lignes identiques, prêt pour le pipeline."""
+    return pd.DataFrame([example_row()] * rows)
+
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    `rows` lignes aléatoires respectant le schéma : enums tirés uniformément,
+    années d'entreprise et de poste bornées par l'expérience totale, ratios
+    dans [0, 1].
+    """
+    rng = np.random.default_rng(seed)
+    total = rng.integers(0, 41, rows)
+    in_company = (total * rng.random(rows)).astype(np.int64)
+    in_role = (in_company * rng.random(rows)).astype(np.int64)
+    numeric = {
+        "age": np.clip(22 + total + rng.integers(0, 10, rows), 18, 70),
+        "revenu_mensuel": np.round(rng.lognormal(8.3, 0.5, rows), 2),
+        "nombre_experiences_precedentes": rng.integers(0, 10, rows),
+        "annee_experience_totale": total,
+        "annees_dans_l_entreprise": in_company,
+        "annees_dans_le_poste_actuel": in_role,
+        "augmentation_salaire_precedente": np.round(rng.uniform(0, 25, rows), 2),
+        "nombre_participation_pee": rng.integers(0, 4, rows),
+        "nb_formations_suivies": rng.integers(0, 7, rows),
+        "distance_domicile_travail": np.round(rng.uniform(1, 30, rows), 1),
+        "annees_depuis_la_derniere_promotion": (in_company * rng.random(rows)).astype(
+            np.int64
+        ),
+        "annes_sous_responsable_actuel": (in_company * rng.random(rows)).astype(
+            np.int64
+        ),
+        "mobilite_interne_ratio": np.round(rng.random(rows), 3),
+        "ratio_anciennete": np.round(in_company / np.maximum(total, 1), 3),
+        "delta_evaluation": np.round(rng.uniform(-2, 2, rows), 2),
+    }
+    columns = {}
+    for name, field in PredictionInputBase.model_fields.items():
+        if name == "matricule":
+            continue
+        if name in numeric:
+            columns[name] = numeric[name]
+            continue
+        values = [member.value for member in field.annotation]
+        dtype = np.int64 if issubclass(field.annotation, IntEnum) else object
+        columns[name] = rng.choice(np.array(values, dtype=dtype), rows)
+    return pd.DataFrame(columns)
+
+
+def stored_frame(db_engine: Engine, rows: int) -> pd.DataFrame:
+    """Les `rows` dernières entrées enregistrées, aux valeurs métier."""
+    from app.models import PredictionInput
+
+    names = list(example_row())
+    query = (
+        select(*(getattr(PredictionInput, name) for name in names))
+        .order_by(PredictionInput.id.desc())
+        .limit(rows)
+    )
+    with db_engine.connect() as connection:
+        records = connection.execute(query).all()
+    return records_frame(records, names)
+
+
+def records_frame(records, names: list[str]) -> pd.DataFrame:
+    """DataFrame de lignes lues en base, enums ORM remplacés par leurs valeurs."""
+    X = pd.DataFrame(records, columns=names)
+    for name in X.columns[X.dtypes == object]:
+        X[name] = [v.value if isinstance(v, Enum) else v for v in X[name]]
+    return X
+
+
+def load_rows(source: str, rows: int) -> pd.DataFrame:
+    """Entrées enregistrées (`db`) ou synthétiques, pour les outils hors ligne."""
+    if source == "db":
+        from app.core.database import engine
+
+        X = stored_frame(engine, rows)
+        if len(X):
+            return X
+        print("Aucune entrée en base, données synthétiques utilisées.")
+    return synthetic_frame(rows)
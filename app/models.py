@@ -1,7 +1,8 @@
 # app/models.py
 from sqlalchemy import DateTime
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import Float, ForeignKey, Integer, String, func
+from sqlalchemy import Float, ForeignKey, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -15,6 +16,10 @@ from app.enums import (
     StatutMarital,
 )
 
+LEADERBOARD_INDEX = "ix_prediction_outputs_leaderboard"
+# Index remplacés, supprimés par create_db.py sur les bases existantes
+REPLACED_INDEXES = ("ix_prediction_outputs_probability",)
+
 
 class PredictionInput(Base):
     __tablename__ = "prediction_inputs"
@@ -61,6 +66,8 @@ class PredictionInput(Base):
         "PredictionOutput",
         back_populates="prediction_input",
         cascade="all, delete-orphan",
+        # La base supprime la sortie (ON DELETE CASCADE) : pas de chargement
+        passive_deletes=True,
         uselist=False,
     )
 
@@ -78,6 +85,11 @@ class PredictionOutput(Base):
     prediction: Mapped[int] = mapped_column(Integer, nullable=False)
     probability: Mapped[float] = mapped_column(Float, nullable=False)
     threshold: Mapped[float] = mapped_column(Float, nullable=False)
+    model_version: Mapped[str] = mapped_column(String, nullable=True)
+    # Modèle nommé (X-Model) ayant produit la prédiction ; None = modèle par défaut
+    model_name: Mapped[str] = mapped_column(String, nullable=True)
+    # Mode décision : arbres évalués, probabilité estimée (None = score exact)
+    trees_used: Mapped[int] = mapped_column(Integer, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -86,3 +98,78 @@ class PredictionOutput(Base):
     prediction_input = relationship(
         "PredictionInput", back_populates="prediction_output"
     )
+
+
+# Reconstruction du classement des risques (app/leaderboard.py) : parcours
+# par probabilité décroissante, sans lecture de la table. Index partiel limité
+# aux sorties classées (modèle par défaut, probabilité exacte), ce qui le rend
+# couvrant pour la requête du classement.
+LEADERBOARD_WHERE = "trees_used IS NULL AND model_name IS NULL"
+Index(
+    LEADERBOARD_INDEX,
+    PredictionOutput.probability.desc(),
+    PredictionOutput.prediction_input_id,
+    postgresql_include=["prediction"],
+    postgresql_where=text(LEADERBOARD_WHERE),
+)
+
+
+class PredictionJob(Base):
+    """Tâche de scoring asynchrone (POST /jobs), découpée en blocs."""
+
+    __tablename__ = "prediction_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # queued : fichier à découper ; running ; succeeded ; failed (au moins un bloc)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    source_file: Mapped[str] = mapped_column(String, nullable=True)
+    mode: Mapped[str] = mapped_column(String, nullable=False)
+    model_name: Mapped[str] = mapped_column(String, nullable=True)
+    total_rows: Mapped[int] = mapped_column(Integer, nullable=True)
+    processed_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_chunks: Mapped[int] = mapped_column(Integer, nullable=True)
+    done_chunks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed_chunks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    finished_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class PredictionJobChunk(Base):
+    """Bloc de lignes d'une tâche : unité de travail réclamée par les workers."""
+
+    __tablename__ = "prediction_job_chunks"
+    # Les workers cherchent le plus ancien bloc en attente
+    __table_args__ = (
+        Index(
+            "ix_prediction_job_chunks_pending",
+            "id",
+            postgresql_where="status = 'pending'",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("prediction_jobs.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    first_row: Mapped[int] = mapped_column(Integer, nullable=False)
+    rows: Mapped[int] = mapped_column(Integer, nullable=False)
+    # pending ; done ; failed (tentatives épuisées)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending")
+    # Lignes au format colonnes {champ: [valeurs...]}, vidé une fois scoré
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    # {prediction: [...], probability: [...], trees_used: [...] | null}
+    result: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    worker: Mapped[str] = mapped_column(String, nullable=True)
+    finished_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
@@ -0,0 +1,406 @@
+# app/rescore.py
+"""
+Recalcul des prédictions enregistrées après un changement de modèle.
+
+- Lecture des entrées par ordre d'id (pagination par clé à partir du point
+  de reprise) via un curseur côté serveur, consommé par blocs, sur le
+  réplica s'il est configuré. Les entrées déjà scorées exactement par la
+  version courante du modèle sont ignorées ; les probabilités estimées du
+  mode décision sont recalculées. Les sorties des modèles nommés ne sont
+  jamais recalculées avec le modèle par défaut.
+- Scoring des blocs en parallèle dans un pool de processus (un modèle par
+  worker, profil « latency » : un seul thread natif par processus). Si le
+  magasin de caractéristiques (app.ml.features) a été construit pour le
+  modèle servi, les lignes encodées y sont lues : la base ne fournit que les
+  ids, et seule la forêt est évaluée. Un bloc dont une entrée manque au
+  magasin est lu et encodé comme sans magasin.
+- Écriture en masse sur la base principale, un bloc par transaction : la
+  sortie existante est mise à jour, une sortie manquante est créée, avec la
+  version du modèle.
+- Après chaque bloc, le dernier id écrit est enregistré dans un fichier de
+  reprise ; le débit d'écriture est plafonné pour ne pas saturer la base.
+
+Le cache des réponses et le classement des workers de l'API sont en mémoire :
+ils peuvent servir l'ancienne probabilité jusqu'à expiration
+(PREDICTION_CACHE_TTL_SECONDS, LEADERBOARD_TTL_SECONDS).
+
+Usage :
+    python -m app.rescore run [--chunk-size N] [--processes N]
+                              [--max-rows-per-second R] [--restart]
+    python -m app.rescore status
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, insert, or_, select, update
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import add_missing_columns, engine, read_engine
+from app.ml.backends import ProcessPoolBackend
+from app.ml.decision import DECISION_THRESHOLD
+from app.ml.features import FeatureMatrix, open_features
+from app.ml.model_loader import model_version
+from app.ml.samples import example_row, records_frame
+from app.models import PredictionInput, PredictionOutput
+
+logger = logging.getLogger(__name__)
+
+# Profil des workers : le parallélisme vient des processus
+RESCORE_PROFILE = "latency"
+# Intervalle minimal entre deux rapports de progression
+REPORT_SECONDS = 5.0
+
+FEATURES = list(example_row())
+
+
+@dataclass
+class Checkpoint:
+    """Point de reprise : dernier id d'entrée écrit pour une version du modèle."""
+
+    model_version: str
+    last_id: int = 0
+    rows: int = 0
+    updated_at: str | None = None
+
+    @classmethod
+    def load(cls, path: Path, version: str) -> "Checkpoint":
+        """Reprend le point enregistré s'il concerne la même version du modèle."""
+        if path.exists():
+            saved = cls(**json.loads(path.read_text()))
+            if saved.model_version == version:
+                return saved
+            logger.info(
+                f"ℹ️ Point de reprise pour la version {saved.model_version}, ignoré."
+            )
+        return cls(version)
+
+    def save(self, path: Path) -> None:
+        self.updated_at = datetime.now(UTC).isoformat()
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(asdict(self)))
+        os.replace(tmp_path, path)
+
+
+class Throttle:
+    """Plafonne le débit moyen à `rows_per_second` lignes (0 = sans limite)."""
+
+    def __init__(self, rows_per_second: float):
+        self.rows_per_second = rows_per_second
+        self.started = time.monotonic()
+        self.rows = 0
+
+    def wait(self, rows: int) -> None:
+        self.rows += rows
+        if self.rows_per_second <= 0:
+            return
+        delay = self.started + self.rows / self.rows_per_second - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+@dataclass
+class Chunk:
+    input_ids: np.ndarray
+    output_ids: list[int | None]
+    # None si les entrées n'ont pas été lues (magasin de caractéristiques)
+    X: pd.DataFrame | None
+
+
+@dataclass
+class RescoreResult:
+    model_version: str
+    rows: int
+    updated: int
+    inserted: int
+    last_id: int
+    seconds: float
+    # Lignes scorées depuis le magasin de caractéristiques
+    from_store: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def iter_chunks(
+    db_engine: Engine,
+    after_id: int,
+    chunk_size: int,
+    version: str,
+    with_inputs: bool = True,
+) -> Iterator[Chunk]:
+    """
+    Entrées d'id > `after_id` sans score exact de `version` (hors sorties des
+    modèles nommés), par ordre d'id et par blocs de `chunk_size` lignes
+    (curseur côté serveur). Sans `with_inputs`, seuls les ids sont lus.
+    """
+    features = FEATURES if with_inputs else []
+    query = (
+        select(
+            PredictionInput.id,
+            PredictionOutput.id,
+            *(getattr(PredictionInput, name) for name in features),
+        )
+        .outerjoin(
+            PredictionOutput, PredictionOutput.prediction_input_id == PredictionInput.id
+        )
+        .where(
+            PredictionInput.id > after_id,
+            PredictionOutput.model_name.is_(None),
+            or_(
+                PredictionOutput.model_version.is_(None),
+                PredictionOutput.model_version != version,
+                PredictionOutput.trees_used.is_not(None),
+            ),
+        )
+        .order_by(PredictionInput.id)
+    )
+    with db_engine.connect() as connection:
+        result = connection.execution_options(yield_per=chunk_size).execute(query)
+        for records in result.partitions(chunk_size):
+            frame = records_frame(records, ["input_id", "output_id", *features])
+            yield Chunk(
+                input_ids=frame["input_id"].to_numpy(),
+                output_ids=[
+                    None if pd.isna(value) else int(value)
+                    for value in frame["output_id"]
+                ],
+                X=frame[FEATURES] if with_inputs else None,
+            )
+
+
+def load_inputs(db_engine: Engine, input_ids: np.ndarray) -> pd.DataFrame:
+    """Entrées des ids donnés (croissants), dans leur ordre."""
+    query = (
+        select(*(getattr(PredictionInput, name) for name in FEATURES))
+        .where(PredictionInput.id.in_(input_ids.tolist()))
+        .order_by(PredictionInput.id)
+    )
+    with db_engine.connect() as connection:
+        return records_frame(connection.execute(query).all(), FEATURES)
+
+
+def write_chunk(
+    db_engine: Engine,
+    chunk: Chunk,
+    proba: np.ndarray,
+    prediction: np.ndarray,
+    version: str,
+    threshold: float,
+) -> tuple[int, int]:
+    """Met à jour ou crée les sorties d'un bloc. Retourne (mises à jour, créations)."""
+    table = PredictionOutput.__table__
+    updates, inserts = [], []
+    now = datetime.now(UTC)
+    for input_id, output_id, p, y in zip(
+        chunk.input_ids.tolist(), chunk.output_ids, proba.tolist(), prediction.tolist()
+    ):
+        values = {
+            "prediction": int(y),
+            "probability": float(p),
+            "threshold": threshold,
+            "model_version": version,
+            "trees_used": None,
+        }
+        if output_id is None:
+            inserts.append(
+                {**values, "prediction_input_id": input_id, "created_at": now}
+            )
+        else:
+            updates.append({**values, "output_id": output_id})
+    with db_engine.begin() as connection:
+        if updates:
+            connection.execute(
+                update(table).where(table.c.id == bindparam("output_id")), updates
+            )
+        if inserts:
+            connection.execute(insert(table), inserts)
+    return len(updates), len(inserts)
+
+
+def rescore(
+    backend: ProcessPoolBackend,
+    checkpoint_path: Path,
+    chunk_size: int,
+    max_rows_per_second: float,
+    source_engine: Engine = read_engine,
+    target_engine: Engine = engine,
+    version: str | None = None,
+    restart: bool = False,
+    features: FeatureMatrix | None = None,
+) -> RescoreResult:
+    """
+    Recalcule toutes les sorties non produites par `version` (par défaut la
+    version du modèle servi). Jusqu'à deux blocs par worker sont en cours de
+    scoring pendant l'écriture du plus ancien ; les blocs sont écrits dans
+    l'ordre des ids, ce qui garde le point de reprise exact. `features` :
+    magasin de caractéristiques encodées par le modèle des workers.
+    """
+    version = version or model_version()
+    checkpoint = (
+        Checkpoint(version) if restart else Checkpoint.load(checkpoint_path, version)
+    )
+    add_missing_columns(target_engine)
+    logger.info(
+        f"🔁 Recalcul avec le modèle {version} à partir de l'id {checkpoint.last_id}"
+    )
+
+    started = time.monotonic()
+    throttle = Throttle(max_rows_per_second)
+    rows = updated = inserted = from_store = 0
+    last_report = started
+    in_flight: deque = deque()
+
+    def submit(chunk: Chunk) -> Future:
+        nonlocal from_store
+        if features is not None:
+            positions = features.rows_of(chunk.input_ids)
+            if (positions >= 0).all():
+                from_store += len(positions)
+                return backend.submit_score_encoded(
+                    features.features[positions], RESCORE_PROFILE
+                )
+            chunk.X = load_inputs(source_engine, chunk.input_ids)
+        return backend.submit_score(chunk.X, RESCORE_PROFILE)
+
+    def write_oldest() -> None:
+        nonlocal rows, updated, inserted, last_report
+        chunk, future = in_flight.popleft()
+        proba, prediction = future.result()
+        chunk_updated, chunk_inserted = write_chunk(
+            target_engine, chunk, proba, prediction, version, DECISION_THRESHOLD
+        )
+        rows += len(chunk.input_ids)
+        updated += chunk_updated
+        inserted += chunk_inserted
+        checkpoint.last_id = int(chunk.input_ids[-1])
+        checkpoint.rows += len(chunk.input_ids)
+        checkpoint.save(checkpoint_path)
+        throttle.wait(len(chunk.input_ids))
+        now = time.monotonic()
+        if now - last_report >= REPORT_SECONDS:
+            last_report = now
+            logger.info(
+                f"📈 {rows} lignes recalculées ({rows / (now - started):.0f} lignes/s), "
+                f"dernier id {checkpoint.last_id}"
+            )
+
+    chunks = iter_chunks(
+        source_engine,
+        checkpoint.last_id,
+        chunk_size,
+        version,
+        with_inputs=features is None,
+    )
+    for chunk in chunks:
+        in_flight.append((chunk, submit(chunk)))
+        if len(in_flight) >= 2 * backend.processes:
+            write_oldest()
+    while in_flight:
+        write_oldest()
+
+    result = RescoreResult(
+        model_version=version,
+        rows=rows,
+        updated=updated,
+        inserted=inserted,
+        last_id=checkpoint.last_id,
+        seconds=time.monotonic() - started,
+        from_store=from_store,
+    )
+    logger.info(
+        f"✅ Recalcul terminé : {result.rows} lignes ({result.updated} mises à jour, "
+        f"{result.inserted} créées, {result.from_store} lues dans le magasin de "
+        f"caractéristiques) en {result.seconds:.1f}s, "
+        f"{result.rows_per_second:.0f} lignes/s"
+    )
+    return result
+
+
+# Caches en mémoire des workers de l'API : pas d'invalidation entre
+# processus, seule leur durée de vie borne le délai
+STALENESS_NOTICE = (
+    "Les workers de l'API peuvent servir l'ancienne probabilité encore "
+    f"{settings.PREDICTION_CACHE_TTL_SECONDS:g} s (cache des réponses, ETag "
+    f"compris) et {settings.LEADERBOARD_TTL_SECONDS:g} s (classement)."
+)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Recalcul des prédictions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser(
+        "run",
+        help="Recalcule les sorties avec le modèle courant",
+        epilog=STALENESS_NOTICE,
+    )
+    run.add_argument("--chunk-size", type=int, default=settings.RESCORE_CHUNK_SIZE)
+    run.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    run.add_argument(
+        "--max-rows-per-second",
+        type=float,
+        default=settings.RESCORE_MAX_ROWS_PER_SECOND,
+    )
+    run.add_argument(
+        "--checkpoint", type=Path, default=Path(settings.RESCORE_CHECKPOINT_PATH)
+    )
+    run.add_argument("--model-version", default=None)
+    run.add_argument(
+        "--restart", action="store_true", help="Ignore le point de reprise"
+    )
+    status = sub.add_parser("status", help="Affiche le point de reprise")
+    status.add_argument(
+        "--checkpoint", type=Path, default=Path(settings.RESCORE_CHECKPOINT_PATH)
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    if args.command == "status":
+        if args.checkpoint.exists():
+            print(args.checkpoint.read_text())
+        else:
+            print("Aucun point de reprise.")
+        return
+
+    # Magasin utilisable s'il a été encodé par le modèle des workers
+    features = open_features()
+    if features is not None and features.model_version != model_version():
+        logger.info(
+            f"ℹ️ Magasin de caractéristiques construit pour {features.model_version}, "
+            "ignoré (python -m app.ml.features rebuild)."
+        )
+        features = None
+    backend = ProcessPoolBackend(args.processes)
+    backend.start()
+    try:
+        result = rescore(
+            backend,
+            args.checkpoint,
+            args.chunk_size,
+            args.max_rows_per_second,
+            version=args.model_version,
+            restart=args.restart,
+            features=features,
+        )
+    finally:
+        backend.shutdown()
+    print(json.dumps({**asdict(result), "rows_per_second": result.rows_per_second}))
+    if result.updated or result.inserted:
+        logger.info(STALENESS_NOTICE)
+
+
+if __name__ == "__main__":
+    main()
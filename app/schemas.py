@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, model_validator
 from pydantic.fields import Field
 
+from app.core.tracing import span
 from app.enums import (
     Departement,
     DomaineEtude,
@@ -183,6 +184,13 @@ class PredictionInputBase(BaseModel):
 class PredictionInputCreate(PredictionInputBase):
     """Schéma utilisé pour la création (POST)"""
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def traced_validation(cls, data: Any, handler) -> "PredictionInputCreate":
+        """Validation mesurée dans le span `validation` de la requête en cours."""
+        with span("validation"):
+            return handler(data)
+
     @model_validator(mode="after")
     def check_coherence_globale(self) -> "PredictionInputCreate":
         """
@@ -285,6 +293,24 @@ class PredictionOutputBase(BaseModel):
         description="Seuil de décision utilisé pour la classification",
         examples=[0.5],
     )
+    model_version: str | None = Field(
+        default=None,
+        description="Version du modèle ayant produit la prédiction",
+        examples=["3f2a9c1d7b4e"],
+    )
+    model_name: str | None = Field(
+        default=None,
+        description="Modèle nommé ayant produit la prédiction (absent = modèle par défaut)",
+        examples=[None],
+    )
+    trees_used: int | None = Field(
+        default=None,
+        description=(
+            "Arbres évalués si la probabilité est une estimation du mode "
+            "décision (absent pour un score exact)"
+        ),
+        examples=[None],
+    )
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -305,13 +331,244 @@ class PredictionOutputResponse(PredictionOutputBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# "exact" : tous les arbres ; "decision" : arrêt dès que la décision est acquise
+PredictionMode = Literal["exact", "decision"]
+
+
 class PredictionFullResponse(BaseModel):
     input: PredictionInputResponse
     output: PredictionOutputResponse
+    trees_used: int | None = Field(
+        default=None,
+        description="Arbres évalués en mode décision (absent en mode exact)",
+        examples=[74],
+    )
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class BatchPredictionResponse(BaseModel):
+    """Résultats d'un lot au format colonnes, dans l'ordre des lignes reçues"""
+
+    prediction: list[int] = Field(
+        ...,
+        description="Résultats bruts (0 = reste, 1 = quitte l’entreprise)",
+        examples=[[1, 0]],
+    )
+    probability: list[float] = Field(
+        ...,
+        description="Probabilités associées (0–1)",
+        examples=[[0.78, 0.12]],
+    )
+    threshold: float = Field(
+        ...,
+        description="Seuil de décision utilisé pour la classification",
+        examples=[0.5],
+    )
+    trees_used: list[int] | None = Field(
+        default=None,
+        description="Arbres évalués par ligne en mode décision (absent en mode exact)",
+        examples=[[74, 200]],
+    )
+
+
+class WhatIfRequest(BaseModel):
+    """Profil de base et grille de valeurs pour une ou deux caractéristiques"""
+
+    base: PredictionInputCreate
+    grid: dict[str, list[Any]] = Field(
+        ...,
+        min_length=1,
+        max_length=2,
+        description=(
+            "Valeurs à essayer par caractéristique (une ou deux). Avec deux "
+            "caractéristiques, toutes les combinaisons sont évaluées."
+        ),
+        examples=[
+            {
+                "revenu_mensuel": [3000, 3300, 3600],
+                "heure_supplementaires": ["Oui", "Non"],
+            }
+        ],
+    )
+
+    @model_validator(mode="after")
+    def check_grid(self) -> "WhatIfRequest":
+        for name, values in self.grid.items():
+            if name not in PredictionInputBase.model_fields or name == "matricule":
+                raise ValueError(f"Caractéristique inconnue : {name}")
+            if not values:
+                raise ValueError(f"Aucune valeur pour {name}")
+        return self
+
+
+class WhatIfResponse(BaseModel):
+    """Courbe de réponse : probabilité de chaque combinaison de la grille"""
+
+    features: list[str] = Field(..., examples=[["revenu_mensuel"]])
+    base_probability: float = Field(
+        ..., description="Probabilité du profil de base", examples=[0.42]
+    )
+    base_prediction: int = Field(..., examples=[0])
+    threshold: float = Field(..., examples=[0.5])
+    points: dict[str, list[Any]] = Field(
+        ...,
+        description="Valeur de chaque caractéristique de la grille, par point",
+        examples=[{"revenu_mensuel": [3000, 3300, 3600]}],
+    )
+    probability: list[float] = Field(..., examples=[[0.45, 0.42, 0.38]])
+    prediction: list[int] = Field(..., examples=[[0, 0, 0]])
+    delta: list[float] = Field(
+        ...,
+        description="Écart de probabilité avec le profil de base",
+        examples=[[0.03, 0.0, -0.04]],
+    )
+
+
+class StreamPredictionRequest(BaseModel):
+    """Message du canal WebSocket /ws/predictions"""
+
+    id: str | int | None = Field(
+        None,
+        description="Identifiant choisi par le client, repris dans le résultat",
+        examples=["form-42"],
+    )
+    input: PredictionInputCreate
+
+
+class BulkDeleteRequest(BaseModel):
+    """Critères de suppression en masse, combinés (ET) ; au moins un est requis"""
+
+    ids: list[int] | None = Field(
+        default=None,
+        max_length=100_000,
+        description="Identifiants des entrées à supprimer",
+        examples=[[101, 102]],
+    )
+    matricules: list[str] | None = Field(
+        default=None,
+        max_length=100_000,
+        description="Matricules des employés dont les entrées sont supprimées",
+        examples=[["M12345"]],
+    )
+    created_from: datetime | None = Field(
+        default=None,
+        description="Début de la période de création (inclus)",
+        examples=["2025-01-01T00:00:00Z"],
+    )
+    created_to: datetime | None = Field(
+        default=None,
+        description="Fin de la période de création (exclue)",
+        examples=["2025-02-01T00:00:00Z"],
+    )
+
+    @model_validator(mode="after")
+    def check_criteres(self) -> "BulkDeleteRequest":
+        if (
+            self.ids is None
+            and self.matricules is None
+            and self.created_from is None
+            and self.created_to is None
+        ):
+            raise ValueError("Au moins un critère de suppression est requis.")
+        if (
+            self.created_from is not None
+            and self.created_to is not None
+            and self.created_from >= self.created_to
+        ):
+            raise ValueError("created_from doit précéder created_to.")
+        return self
+
+
+class LeaderboardEntry(BaseModel):
+    """Employé du classement des risques de départ"""
+
+    prediction_input_id: int = Field(..., examples=[101])
+    matricule: Optional[str] = Field(None, examples=["M12345"])
+    departement: Departement = Field(..., examples=["Consulting"])
+    poste: Poste = Field(..., examples=["Consultant"])
+    probability: float = Field(
+        ..., description="Probabilité de départ enregistrée", examples=[0.91]
+    )
+    prediction: int = Field(..., examples=[1])
+
+
+class BulkDeleteResponse(BaseModel):
+    """Nombre de lignes supprimées par une suppression en masse"""
+
+    inputs_deleted: int = Field(..., description="Entrées supprimées", examples=[250])
+    outputs_deleted: int = Field(
+        ..., description="Sorties supprimées avec leurs entrées", examples=[248]
+    )
+    batches: int = Field(..., description="Lots (transactions) exécutés", examples=[1])
+
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobChunkFailure(BaseModel):
+    """Bloc de lignes d'une tâche dont les tentatives ont toutes échoué"""
+
+    first_row: int = Field(..., description="Première ligne du bloc", examples=[2000])
+    rows: int = Field(..., description="Lignes du bloc", examples=[1000])
+    attempts: int = Field(..., description="Tentatives effectuées", examples=[3])
+    error: str | None = Field(None, description="Dernière erreur rencontrée")
+
+
+class JobResults(BaseModel):
+    """Page de résultats d'une tâche, au format colonnes"""
+
+    offset: int = Field(..., description="Première ligne de la page", examples=[0])
+    prediction: list[int | None] = Field(
+        ...,
+        description="Résultats bruts (null pour les lignes d'un bloc en échec)",
+        examples=[[1, 0]],
+    )
+    probability: list[float | None] = Field(
+        ..., description="Probabilités associées (0–1)", examples=[[0.78, 0.12]]
+    )
+    trees_used: list[int | None] | None = Field(
+        default=None,
+        description="Arbres évalués par ligne en mode décision (absent en mode exact)",
+    )
+
+
+class JobResponse(BaseModel):
+    """État, progression et résultats d'une tâche de scoring asynchrone"""
+
+    id: int = Field(..., description="Identifiant de la tâche", examples=[42])
+    status: JobStatus = Field(
+        ...,
+        description=(
+            "`queued` (fichier pas encore lu), `running`, `succeeded`, "
+            "`failed` (fichier invalide ou au moins un bloc en échec)"
+        ),
+        examples=["running"],
+    )
+    mode: PredictionMode = Field(..., examples=["exact"])
+    model_name: str | None = Field(None, description="Modèle nommé utilisé")
+    source_file: str | None = Field(
+        None, description="Fichier référencé (relatif à JOBS_INPUT_DIR)"
+    )
+    total_rows: int | None = Field(
+        None, description="Lignes du lot (inconnu tant que le fichier n'est pas lu)"
+    )
+    processed_rows: int = Field(..., description="Lignes scorées", examples=[3000])
+    failed_rows: int = Field(..., description="Lignes des blocs en échec", examples=[0])
+    total_chunks: int | None = Field(None, description="Blocs de la tâche")
+    done_chunks: int = Field(..., description="Blocs scorés")
+    failed_chunks: int = Field(..., description="Blocs en échec")
+    threshold: float = Field(..., description="Seuil de décision", examples=[0.5])
+    error: str | None = Field(None, description="Erreur de lecture du fichier")
+    created_at: datetime
+    finished_at: datetime | None = None
+    failures: list[JobChunkFailure] = Field(default_factory=list)
+    results: JobResults | None = Field(
+        None,
+        description="Page de résultats (`offset`, `limit`), une fois la tâche terminée",
+    )
+
+
 class HealthResponse(BaseModel):
     """Schema for health check responses"""
 
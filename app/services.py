@@ -1,21 +1,50 @@
+import itertools
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from datetime import UTC, datetime
 from enum import Enum
+from typing import Any
 
 import numpy as np
 import pandas as pd
 from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session, joinedload
 
-from app.ml.model_loader import model
+from app.columnar import ColumnarValidationError, validate_columns
+from app.core.cache import CachedResponse, prediction_cache, prediction_list_cache
+from app.core.config import settings
+from app.core.logs import stage
+from app.core.tracing import span
+from app.leaderboard import leaderboard
+from app.ml.backends import ThreadBackend, get_backend
+from app.ml.decision import DECISION_THRESHOLD
+from app.ml.drift import observe_prediction
+from app.ml.features import discard_features, store_prediction_features
+from app.ml.inference import DeadlineExceeded, InferenceQueueFull, inference_queue
+from app.ml.model_loader import model, model_version
+from app.ml.registry import LoadedModel, UnknownModel, model_registry
 from app.models import PredictionInput, PredictionOutput
 from app.schemas import (
+    BatchPredictionResponse,
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    LeaderboardEntry,
     PredictionFullResponse,
     PredictionInputCreate,
     PredictionInputResponse,
+    PredictionMode,
     PredictionOutputCreate,
     PredictionOutputResponse,
+    WhatIfRequest,
+    WhatIfResponse,
 )
 
+_named_model_backend = ThreadBackend()
+
+_input_list_adapter = TypeAdapter(list[PredictionInputResponse])
+
 
 def create_prediction_input(
     db: Session, data: PredictionInputCreate
@@ -81,20 +110,158 @@ def get_prediction_input_by_id(
     )
 
 
+def _cached(
+    cache, key, load: Callable[[], bytes | None], use_cache: bool
+) -> CachedResponse | None:
+    if use_cache:
+        return cache.get_or_load(key, load)
+    body = load()
+    return None if body is None else CachedResponse.of(body)
+
+
+def get_prediction_inputs_json(
+    db: Session,
+    skip: int = 0,
+    limit: int = 10,
+    matricule: str | None = None,
+    use_cache: bool = True,
+) -> CachedResponse:
+    """
+    Page de la liste des entrées, sérialisée en JSON, lue via le cache des
+    listes (TTL court).
+    """
+
+    def load() -> bytes:
+        with stage("db"), span("select_inputs"):
+            records = get_prediction_inputs(db, skip, limit, matricule)
+        return _input_list_adapter.dump_json(
+            _input_list_adapter.validate_python(records, from_attributes=True)
+        )
+
+    return _cached(prediction_list_cache, (skip, limit, matricule), load, use_cache)
+
+
+def get_prediction_input_json(
+    db: Session, prediction_id: int, use_cache: bool = True
+) -> CachedResponse | None:
+    """
+    Entrée `prediction_id` sérialisée en JSON, lue via le cache par id.
+    Retourne None si l'entrée n'existe pas.
+    """
+
+    def load() -> bytes | None:
+        with stage("db"), span("select_input", prediction_id=prediction_id):
+            prediction = get_prediction_input_by_id(db, prediction_id)
+        if prediction is None:
+            return None
+        return (
+            PredictionInputResponse.model_validate(prediction)
+            .model_dump_json()
+            .encode()
+        )
+
+    return _cached(prediction_cache, prediction_id, load, use_cache)
+
+
 def delete_prediction_input(db: Session, prediction_id: int) -> bool:
     """
-    Supprime une entrée de prédiction par son ID.
+    Supprime une entrée de prédiction par son ID, en une seule instruction.
     Retourne True si la suppression a réussi, False si l'entrée n'existe pas.
     """
-    prediction = (
-        db.query(PredictionInput).filter(PredictionInput.id == prediction_id).first()
+    result = delete_prediction_inputs(db, BulkDeleteRequest(ids=[prediction_id]))
+    return result.inputs_deleted == 1
+
+
+def _delete_batch(db: Session, conditions: list) -> tuple[list[int], int]:
+    """
+    Supprime les entrées vérifiant `conditions` et leurs sorties. Retourne les
+    ids supprimés et le nombre de sorties supprimées.
+    """
+    has_output = (
+        select(PredictionOutput.id)
+        .where(PredictionOutput.prediction_input_id == PredictionInput.id)
+        .exists()
     )
-    if not prediction:
-        return False
+    # La sortie est supprimée par la cascade de la clé étrangère ; RETURNING
+    # voit encore la base avant la cascade, d'où le comptage des sorties
+    rows = db.execute(
+        delete(PredictionInput)
+        .where(*conditions)
+        .returning(PredictionInput.id, has_output)
+        .execution_options(synchronize_session=False)
+    ).all()
+    ids = [row[0] for row in rows]
+    outputs = sum(1 for row in rows if row[1])
+    if settings.DB_PARTITIONING and ids:
+        # Tables partitionnées : pas de clé étrangère, donc pas de cascade
+        outputs = db.execute(
+            delete(PredictionOutput)
+            .where(PredictionOutput.prediction_input_id.in_(ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    return ids, outputs
 
-    db.delete(prediction)
-    db.commit()
-    return True
+
+def delete_prediction_inputs(
+    db: Session,
+    criteria: BulkDeleteRequest,
+    batch_size: int = settings.BULK_DELETE_BATCH_SIZE,
+) -> BulkDeleteResponse:
+    """
+    Supprime les entrées vérifiant tous les critères et leurs sorties, par
+    lots d'au plus `batch_size` entrées (une transaction par lot, pour ne pas
+    verrouiller longtemps les tables).
+    """
+    conditions = []
+    if criteria.created_from is not None:
+        conditions.append(PredictionInput.created_at >= criteria.created_from)
+    if criteria.created_to is not None:
+        conditions.append(PredictionInput.created_at < criteria.created_to)
+    if criteria.ids is not None and criteria.matricules is not None:
+        conditions.append(PredictionInput.matricule.in_(criteria.matricules))
+
+    if criteria.ids is not None or criteria.matricules is not None:
+        # Listes découpées en lots côté application
+        column, values = (
+            (PredictionInput.id, criteria.ids)
+            if criteria.ids is not None
+            else (PredictionInput.matricule, criteria.matricules)
+        )
+        batches = (
+            [column.in_(values[start : start + batch_size])]
+            for start in range(0, len(values), batch_size)
+        )
+    else:
+        # Période seule : premiers ids restants, jusqu'à épuisement
+        next_ids = (
+            select(PredictionInput.id)
+            .where(*conditions)
+            .order_by(PredictionInput.id)
+            .limit(batch_size)
+        )
+        batches = iter(
+            lambda: [PredictionInput.id.in_(next_ids.scalar_subquery())], None
+        )
+
+    result = BulkDeleteResponse(inputs_deleted=0, outputs_deleted=0, batches=0)
+    for batch in batches:
+        ids, outputs = _delete_batch(db, [*batch, *conditions])
+        db.commit()
+        result.inputs_deleted += len(ids)
+        result.outputs_deleted += outputs
+        result.batches += 1
+        for prediction_id in ids:
+            prediction_cache.invalidate(prediction_id)
+        prediction_list_cache.clear()
+        leaderboard.discard(ids)
+        discard_features(ids)
+        if (
+            criteria.ids is None
+            and criteria.matricules is None
+            and len(ids) < batch_size
+        ):
+            break
+    return result
 
 
 def create_prediction_output(
@@ -117,65 +284,291 @@ def get_prediction_outputs(db: Session, skip: int = 0, limit: int = 10):
     return db.query(PredictionOutput).offset(skip).limit(limit).all()
 
 
+def _model_and_backend(served_model: Any) -> tuple[Any, Any]:
+    """
+    Modèle servi par défaut avec le backend configuré ; un modèle nommé du
+    registre tourne toujours dans le thread de la file d'inférence.
+    """
+    if served_model is None:
+        return model, get_backend()
+    return served_model, _named_model_backend
+
+
+def _predict_one(
+    X: pd.DataFrame, profile: str | None = None, served_model: Any = None
+) -> tuple[float, int]:
+    """
+    Applique le pipeline ML sur une ligne : (probabilité, prédiction).
+    Le calcul est délégué au backend configuré (thread ou pool de processus),
+    avec le profil d'inférence demandé (INFERENCE_PROFILE par défaut).
+    """
+    pipeline, backend = _model_and_backend(served_model)
+    proba, prediction = backend.score(X, pipeline, profile)
+    return float(proba[0]), int(prediction[0])
+
+
+def _predict_batch(
+    X: pd.DataFrame, profile: str | None = None, served_model: Any = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Applique le pipeline ML sur un lot : (probabilités, prédictions)."""
+    pipeline, backend = _model_and_backend(served_model)
+    return backend.score(X, pipeline, profile)
+
+
+def _decide_batch(
+    X: pd.DataFrame,
+    threshold: float,
+    profile: str | None = None,
+    served_model: Any = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mode décision : (probabilités estimées, prédictions, arbres utilisés).
+    L'évaluation s'arrête dès que la décision au seuil est acquise.
+    """
+    pipeline, backend = _model_and_backend(served_model)
+    return backend.decide(X, pipeline, threshold, profile)
+
+
+@contextmanager
+def selected_model(model_name: str | None) -> Iterator[LoadedModel | None]:
+    """
+    Modèle nommé du registre, réservé le temps de l'inférence (404 s'il
+    n'existe pas) ; None pour le modèle servi par défaut.
+    """
+    if model_name is None:
+        yield None
+        return
+    try:
+        entry = model_registry.acquire(model_name)
+    except UnknownModel:
+        raise HTTPException(status_code=404, detail=f"Modèle inconnu : {model_name}")
+    try:
+        yield entry
+    finally:
+        model_registry.release(entry)
+
+
+def run_inference(fn, *args, deadline: float | None = None):
+    """
+    Exécute une fonction d'inférence via la file bornée.
+    - 503 si la file est pleine (délestage)
+    - 504 si l'échéance de la requête est dépassée
+    """
+    try:
+        with stage("inference"), span("inference", function=fn.__name__):
+            return inference_queue.run(fn, *args, deadline=deadline)
+    except InferenceQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Service saturé : file d'inférence pleine, réessayez plus tard.",
+            headers={"Retry-After": "1"},
+        )
+    except DeadlineExceeded:
+        raise HTTPException(
+            status_code=504,
+            detail="Échéance de la requête dépassée avant l'inférence.",
+        )
+
+
 def create_prediction_full_service(
     db: Session,
     payload: PredictionInputCreate,
+    deadline: float | None = None,
+    profile: str | None = None,
+    mode: PredictionMode = "exact",
+    model_name: str | None = None,
 ) -> PredictionFullResponse:
     """
     Service métier complet :
     - Vérifie l'unicité du matricule
-    - Enregistre l'entrée (input)
     - Supprime le matricule pour la prédiction
-    - Applique le modèle ML
-    - Enregistre la sortie (output)
+    - Applique le modèle ML (file bornée, abandon si `deadline` est dépassée,
+      profil d'inférence `profile`, mode exact ou décision, modèle nommé
+      `model_name` ou modèle par défaut)
+    - Enregistre l'entrée (input) et la sortie (output) dans une même transaction
+    - Met à jour les statistiques de dérive
     - Retourne un PredictionFullResponse complet
     """
 
     # Vérifier l'unicité du matricule si fourni
     if payload.matricule is not None:
-        existing_prediction = (
-            db.query(PredictionInput)
-            .filter(PredictionInput.matricule == payload.matricule)
-            .first()
-        )
+        with stage("db"), span("matricule_check"):
+            existing_prediction = (
+                db.query(PredictionInput)
+                .filter(PredictionInput.matricule == payload.matricule)
+                .first()
+            )
         if existing_prediction:
             raise HTTPException(
                 status_code=409,
                 detail=f"Un employé avec le matricule '{payload.matricule}' existe déjà.",
             )
 
-    # Sauvegarder l'entrée brute
-    db_input = PredictionInput(**payload.model_dump())
-    db.add(db_input)
-    db.commit()
-    db.refresh(db_input)
-
     # Supprimer le matricule avant la prédiction
     if "matricule" in payload.model_dump():
         del payload.model_dump()["matricule"]
 
     # Préparer les données pour le modèle
-    X = pd.DataFrame([payload.model_dump()]).replace("", np.nan)
-
-    # Prédire via le pipeline ML
-    proba = float(model.predict_proba(X)[0][1])
-    prediction = int(model.predict(X)[0])
-    threshold = 0.5
-
-    # Sauvegarder le résultat
-    db_output = PredictionOutput(
-        prediction_input_id=db_input.id,
-        prediction=prediction,
-        probability=proba,
-        threshold=threshold,
-        created_at=datetime.now(UTC),
-    )
-    db.add(db_output)
-    db.commit()
-    db.refresh(db_output)
+    with span("prepare_features"):
+        X = pd.DataFrame([payload.model_dump()]).replace("", np.nan)
+
+    # Prédire via le pipeline ML, avant toute écriture : une requête délestée
+    # ou expirée ne laisse pas d'entrée orpheline en base
+    threshold = DECISION_THRESHOLD
+    trees_used = None
+    with selected_model(model_name) as selected:
+        served = selected.model if selected else None
+        if mode == "decision":
+            probas, predictions, used = run_inference(
+                _decide_batch, X, threshold, profile, served, deadline=deadline
+            )
+            proba, prediction = float(probas[0]), int(predictions[0])
+            trees_used = int(used[0])
+        else:
+            proba, prediction = run_inference(
+                _predict_one, X, profile, served, deadline=deadline
+            )
+    version = selected.version if selected else model_version()
+
+    # Sauvegarder l'entrée brute et le résultat
+    with stage("db"):
+        with span("insert_input"):
+            db_input = PredictionInput(**payload.model_dump())
+            db.add(db_input)
+            db.flush()
+        with span("insert_output"):
+            db_output = PredictionOutput(
+                prediction_input_id=db_input.id,
+                prediction=prediction,
+                probability=proba,
+                threshold=threshold,
+                model_version=version,
+                model_name=model_name,
+                trees_used=trees_used,
+                created_at=datetime.now(UTC),
+            )
+            db.add(db_output)
+            db.commit()
+            db.refresh(db_input)
+            db.refresh(db_output)
+
+    # Statistiques de dérive ; la référence des probabilités est celle du modèle
+    # par défaut, en mode exact (le mode décision ne fait qu'estimer)
+    tracked = mode == "exact" and model_name is None
+    observe_prediction(payload.model_dump(), proba if tracked else None)
+    store_prediction_features(db_input.id, payload.model_dump())
+    # Classement : scores exacts du modèle par défaut seulement (une estimation
+    # est recalculée par app.rescore)
+    if trees_used is None and model_name is None:
+        leaderboard.add(
+            LeaderboardEntry(
+                prediction_input_id=db_input.id,
+                matricule=db_input.matricule,
+                departement=db_input.departement,
+                poste=db_input.poste,
+                probability=db_output.probability,
+                prediction=db_output.prediction,
+            )
+        )
 
     # 5️⃣ Construire la réponse finale
-    return PredictionFullResponse(
-        input=PredictionInputResponse.model_validate(db_input),
-        output=PredictionOutputResponse.model_validate(db_output),
-    )
+    with span("build_response"):
+        return PredictionFullResponse(
+            input=PredictionInputResponse.model_validate(db_input),
+            output=PredictionOutputResponse.model_validate(db_output),
+            trees_used=trees_used,
+        )
+
+
+def score_batch_service(
+    X: pd.DataFrame,
+    deadline: float | None = None,
+    mode: PredictionMode = "exact",
+    model_name: str | None = None,
+) -> BatchPredictionResponse:
+    """
+    Score un lot déjà validé (format colonnes), sans l'enregistrer en base.
+    Le lot passe par la file d'inférence avec le profil BATCH_INFERENCE_PROFILE.
+    """
+    profile = settings.BATCH_INFERENCE_PROFILE
+    with selected_model(model_name) as selected:
+        served = selected.model if selected else None
+        if mode == "decision":
+            proba, prediction, used = run_inference(
+                _decide_batch,
+                X,
+                DECISION_THRESHOLD,
+                profile,
+                served,
+                deadline=deadline,
+            )
+            trees_used = used.tolist()
+        else:
+            proba, prediction = run_inference(
+                _predict_batch, X, profile, served, deadline=deadline
+            )
+            trees_used = None
+    with span("build_response", rows=len(X)):
+        return BatchPredictionResponse(
+            prediction=prediction.tolist(),
+            probability=proba.tolist(),
+            threshold=DECISION_THRESHOLD,
+            trees_used=trees_used,
+        )
+
+
+def what_if_service(
+    request: WhatIfRequest,
+    deadline: float | None = None,
+    model_name: str | None = None,
+) -> WhatIfResponse:
+    """
+    Simulation sans enregistrement : le profil de base et toutes les
+    combinaisons de la grille forment une seule matrice, validée colonne par
+    colonne puis scorée en un appel au modèle (la ligne 0 est la base).
+    """
+    features = list(request.grid)
+    combinations = list(itertools.product(*request.grid.values()))
+    if len(combinations) > settings.WHATIF_MAX_POINTS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"La grille dépasse {settings.WHATIF_MAX_POINTS} points "
+            f"({len(combinations)}).",
+        )
+
+    base = request.base.model_dump(mode="json", exclude={"matricule"})
+    rows = len(combinations) + 1
+    columns = {name: [value] * rows for name, value in base.items()}
+    for position, name in enumerate(features):
+        columns[name][1:] = [combination[position] for combination in combinations]
+    with span("prepare_features", rows=rows):
+        try:
+            X = validate_columns(columns, rows)
+        except ColumnarValidationError as e:
+            # Lignes numérotées à partir de 0 pour le premier point de la grille
+            for error in e.errors:
+                if "rows" in error:
+                    error["rows"] = [row - 1 for row in error["rows"]]
+            raise HTTPException(status_code=422, detail=e.errors)
+
+    with selected_model(model_name) as selected:
+        served = selected.model if selected else None
+        proba, prediction = run_inference(
+            _predict_batch,
+            X,
+            settings.BATCH_INFERENCE_PROFILE,
+            served,
+            deadline=deadline,
+        )
+    with span("build_response", rows=rows):
+        base_probability = float(proba[0])
+        return WhatIfResponse(
+            features=features,
+            base_probability=base_probability,
+            base_prediction=int(prediction[0]),
+            threshold=DECISION_THRESHOLD,
+            points={name: X[name].iloc[1:].tolist() for name in features},
+            probability=proba[1:].tolist(),
+            prediction=prediction[1:].tolist(),
+            delta=(proba[1:] - base_probability).tolist(),
+        )
@@ -0,0 +1,154 @@
+# app/streaming.py
+"""
+Canal WebSocket de scoring continu (/ws/predictions).
+
+La clé API est vérifiée une fois, à l'ouverture : la connexion occupe
+ensuite un créneau d'inférence concurrente de la clé jusqu'à sa fermeture.
+Chaque message `{"id": ..., "input": {...}}` est validé par
+`StreamPredictionRequest` (mêmes règles que POST /predictions) puis scoré,
+sans enregistrement en base, par le chemin de POST /predictions/batch
+(file d'inférence, profil BATCH_INFERENCE_PROFILE). Un résultat par message,
+dans l'ordre de réception, avec l'`id` du client.
+
+- Micro-lots : pendant qu'un lot est scoré, les messages reçus s'accumulent ;
+  le lot suivant les reprend tous (au plus WS_MAX_BATCH). Aucune attente
+  n'est ajoutée quand le flux est calme.
+- Contre-pression : au plus WS_MAX_PENDING messages lus attendent leur
+  scoring. Au-delà, la lecture du socket est suspendue et le client est
+  ralenti par TCP ; l'envoi des résultats attend de même que le client lise.
+"""
+
+import asyncio
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+import pandas as pd
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.ml.decision import DECISION_THRESHOLD
+from app.schemas import PredictionMode, StreamPredictionRequest
+from app.services import score_batch_service
+
+
+@dataclass
+class StreamMessage:
+    """Message reçu : entrée validée, ou erreur à renvoyer telle quelle."""
+
+    id: Any
+    request: StreamPredictionRequest | None = None
+    error: dict | None = None
+
+
+def parse_message(data: str | bytes) -> StreamMessage:
+    try:
+        raw = orjson.loads(data)
+    except orjson.JSONDecodeError as e:
+        return StreamMessage(
+            None, error={"status": 400, "detail": f"JSON invalide : {e}"}
+        )
+    message_id = raw.get("id") if isinstance(raw, dict) else None
+    try:
+        request = StreamPredictionRequest.model_validate(raw)
+    except ValidationError as e:
+        detail = jsonable_encoder(e.errors(include_url=False))
+        return StreamMessage(message_id, error={"status": 422, "detail": detail})
+    return StreamMessage(request.id, request=request)
+
+
+async def score_messages(
+    messages: list[StreamMessage],
+    mode: PredictionMode = "exact",
+    model_name: str | None = None,
+) -> list[dict]:
+    """Score les messages valides en un seul lot ; un résultat par message."""
+    valid = [message for message in messages if message.request is not None]
+    scored: dict[int, dict] = {}
+    if valid:
+        X = pd.DataFrame(
+            [
+                message.request.input.model_dump(mode="json", exclude={"matricule"})
+                for message in valid
+            ]
+        )
+        try:
+            batch = await run_in_threadpool(
+                score_batch_service, X, None, mode, model_name
+            )
+        except HTTPException as e:
+            error = {"status": e.status_code, "detail": e.detail}
+            scored = {id(message): {"error": error} for message in valid}
+        else:
+            for row, message in enumerate(valid):
+                result = {
+                    "prediction": batch.prediction[row],
+                    "probability": batch.probability[row],
+                    "threshold": DECISION_THRESHOLD,
+                }
+                if batch.trees_used is not None:
+                    result["trees_used"] = batch.trees_used[row]
+                scored[id(message)] = result
+    return [
+        {"id": message.id, **scored.get(id(message), {"error": message.error})}
+        for message in messages
+    ]
+
+
+async def serve_prediction_stream(
+    websocket: WebSocket,
+    mode: PredictionMode = "exact",
+    model_name: str | None = None,
+) -> None:
+    """Sert une connexion acceptée jusqu'à sa fermeture par le client."""
+    pending: asyncio.Queue[StreamMessage | None] = asyncio.Queue(
+        settings.WS_MAX_PENDING
+    )
+    disconnected = asyncio.Event()
+
+    async def receive() -> None:
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    disconnected.set()
+                    break
+                data = message.get("text") or message.get("bytes") or b""
+                # File pleine : la lecture est suspendue (contre-pression)
+                await pending.put(parse_message(data))
+        finally:
+            # Jamais d'attente ici : la tâche peut être annulée, file pleine,
+            # sans plus personne pour la vider. Si le marqueur de fin ne
+            # tient pas, `disconnected` arrête le consommateur au lot suivant.
+            disconnected.set()
+            with suppress(asyncio.QueueFull):
+                pending.put_nowait(None)
+
+    receiver = asyncio.create_task(receive())
+    try:
+        closed = False
+        while not closed:
+            first = await pending.get()
+            if first is None:
+                break
+            batch = [first]
+            while len(batch) < settings.WS_MAX_BATCH and not pending.empty():
+                message = pending.get_nowait()
+                if message is None:
+                    closed = True
+                    break
+                batch.append(message)
+            if disconnected.is_set():
+                break
+            for result in await score_messages(batch, mode, model_name):
+                await websocket.send_text(orjson.dumps(result).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        with suppress(asyncio.CancelledError):
+            await receiver
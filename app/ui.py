@@ -4,7 +4,10 @@ import os
 import subprocess
 
 import gradio as gr
+import numpy as np
+import pandas as pd
 
+from app.columnar import COLUMN_SPECS
 from app.core.database import SessionLocal
 from app.enums import (
     Departement,
@@ -19,8 +22,8 @@ from app.enums import (
     SatisfactionEmployee,
     StatutMarital,
 )
-from app.schemas import PredictionInputCreate
-from app.services import create_prediction_full_service
+from app.schemas import PredictionInputCreate, WhatIfRequest
+from app.services import create_prediction_full_service, what_if_service
 
 # === Clean labels mapping ===
 CLEAN_LABELS = {
@@ -119,6 +122,23 @@ CHOICES = {
 }
 
 
+# === Simulation (what-if) ===
+SIMULATION_FEATURES = [
+    feature
+    for feature in PERSONAL_INFO + PROFESSIONAL_INFO + SATISFACTION_METRICS
+    if feature != "matricule"
+]
+NO_FEATURE = "(aucune)"
+# Grille générée pour un champ numérique : base ±50 % en 11 pas
+DEFAULT_STEPS = 11
+# Bornes vérifiées par la cohérence du schéma, pas par les champs
+COHERENCE_BOUNDS = {
+    "mobilite_interne_ratio": (0, 1),
+    "ratio_anciennete": (0, 1),
+    "delta_evaluation": (-5, 5),
+}
+
+
 # === Fonction de prédiction ===
 def predict_from_ui(**kwargs):
     # Nettoyer les chaînes vides pour les champs optionnels
@@ -222,58 +242,99 @@ def build_interface():
             "Saisissez les informations de l'employé pour évaluer le risque d'attrition."
         )
 
-        with gr.Row():
-            # Colonne gauche - Informations personnelles
-            with gr.Column():
-                gr.Markdown("### 👤 Informations Personnelles")
-                personal_inputs = []
-                for feature in PERSONAL_INFO:
+        with gr.Tab("🔮 Prédiction"):
+            with gr.Row():
+                # Colonne gauche - Informations personnelles
+                with gr.Column():
+                    gr.Markdown("### 👤 Informations Personnelles")
+                    personal_inputs = []
+                    for feature in PERSONAL_INFO:
+                        component = create_input_component(feature)
+                        personal_inputs.append(component)
+
+                # Colonne droite - Informations professionnelles
+                with gr.Column():
+                    gr.Markdown("### 💼 Informations Professionnelles")
+                    professional_inputs = []
+                    for feature in PROFESSIONAL_INFO:
+                        component = create_input_component(feature)
+                        professional_inputs.append(component)
+
+            # Section satisfaction (pleine largeur)
+            gr.Markdown("### 📊 Indicateurs de Satisfaction et Performance")
+            satisfaction_inputs = []
+            with gr.Row():
+                for i, feature in enumerate(SATISFACTION_METRICS):
+                    if i % 2 == 0 and i > 0:
+                        # Nouvelle ligne tous les 2 éléments
+                        with gr.Row():
+                            pass
                     component = create_input_component(feature)
-                    personal_inputs.append(component)
+                    satisfaction_inputs.append(component)
 
-            # Colonne droite - Informations professionnelles
-            with gr.Column():
-                gr.Markdown("### 💼 Informations Professionnelles")
-                professional_inputs = []
-                for feature in PROFESSIONAL_INFO:
-                    component = create_input_component(feature)
-                    professional_inputs.append(component)
-
-        # Section satisfaction (pleine largeur)
-        gr.Markdown("### 📊 Indicateurs de Satisfaction et Performance")
-        satisfaction_inputs = []
-        with gr.Row():
-            for i, feature in enumerate(SATISFACTION_METRICS):
-                if i % 2 == 0 and i > 0:
-                    # Nouvelle ligne tous les 2 éléments
-                    with gr.Row():
-                        pass
-                component = create_input_component(feature)
-                satisfaction_inputs.append(component)
-
-        # Bouton de prédiction et résultats
-        gr.Markdown("---")
-        predict_btn = gr.Button(
-            "🔮 Prédire le Risque d'Attrition", variant="primary", size="lg"
-        )
+            # Bouton de prédiction et résultats
+            gr.Markdown("---")
+            predict_btn = gr.Button(
+                "🔮 Prédire le Risque d'Attrition", variant="primary", size="lg"
+            )
 
-        with gr.Row():
-            with gr.Column():
-                prediction_output = gr.Textbox(
-                    label="📋 Résultat de la Prédiction", lines=3, interactive=False
-                )
-            with gr.Column():
-                details_output = gr.JSON(label="📈 Détails Techniques", visible=True)
+            with gr.Row():
+                with gr.Column():
+                    prediction_output = gr.Textbox(
+                        label="📋 Résultat de la Prédiction", lines=3, interactive=False
+                    )
+                with gr.Column():
+                    details_output = gr.JSON(
+                        label="📈 Détails Techniques", visible=True
+                    )
+
+            # Assemblage de tous les inputs dans l'ordre requis
+            all_inputs = personal_inputs + professional_inputs + satisfaction_inputs
+
+            # Configuration de l'événement de prédiction
+            predict_btn.click(
+                fn=predict_wrapper,
+                inputs=all_inputs,
+                outputs=[prediction_output, details_output],
+            )
 
-        # Assemblage de tous les inputs dans l'ordre requis
-        all_inputs = personal_inputs + professional_inputs + satisfaction_inputs
+        with gr.Tab("📈 Simulation"):
+            gr.Markdown(
+                "Fait varier une ou deux caractéristiques du profil saisi dans "
+                "l'onglet Prédiction, sans rien enregistrer. Valeurs séparées par "
+                "des virgules ; laissées vides, la grille est générée (±50 % pour "
+                "un nombre, toutes les modalités sinon)."
+            )
+            with gr.Row():
+                feature = gr.Dropdown(
+                    choices=SIMULATION_FEATURES,
+                    value="revenu_mensuel",
+                    label="Caractéristique",
+                )
+                values = gr.Textbox(label="Valeurs", placeholder="3000, 3500, 4000")
+            with gr.Row():
+                second_feature = gr.Dropdown(
+                    choices=[NO_FEATURE] + SIMULATION_FEATURES,
+                    value=NO_FEATURE,
+                    label="Seconde caractéristique (optionnelle)",
+                )
+                second_values = gr.Textbox(label="Valeurs", placeholder="Oui, Non")
+            simulate_btn = gr.Button("📈 Simuler", variant="primary")
+            simulation_status = gr.Markdown()
+            simulation_plot = gr.LinePlot(
+                x="valeur",
+                y="probabilite",
+                color="serie",
+                y_lim=[0, 1],
+                label="Probabilité de départ",
+            )
+            simulation_table = gr.Dataframe(label="Points de la simulation")
 
-        # Configuration de l'événement de prédiction
-        predict_btn.click(
-            fn=predict_wrapper,
-            inputs=all_inputs,
-            outputs=[prediction_output, details_output],
-        )
+            simulate_btn.click(
+                fn=what_if_wrapper,
+                inputs=[feature, values, second_feature, second_values] + all_inputs,
+                outputs=[simulation_status, simulation_plot, simulation_table],
+            )
 
     return interface
 
@@ -321,6 +382,83 @@ def predict_wrapper(*args):
         return error_msg, {"error": str(e)}
 
 
+def default_grid(feature, base_value):
+    """Grille par défaut : toutes les modalités, ou la base ±50 % bornée."""
+    if feature in CHOICES:
+        return list(CHOICES[feature])
+    spec = COLUMN_SPECS[feature]
+    span = abs(float(base_value)) * 0.5 or 1.0
+    grid = np.linspace(
+        float(base_value) - span, float(base_value) + span, DEFAULT_STEPS
+    )
+    low, high = COHERENCE_BOUNDS.get(feature, (spec.ge, spec.le))
+    grid = np.clip(
+        grid,
+        low if low is not None else -np.inf,
+        high if high is not None else np.inf,
+    )
+    if spec.kind == "int":
+        return sorted({int(round(value)) for value in grid})
+    return sorted({round(float(value), 3) for value in grid})
+
+
+def parse_grid_values(feature, text, base_value):
+    """Valeurs saisies (séparées par des virgules), typées selon le champ."""
+    if not text or not text.strip():
+        return default_grid(feature, base_value)
+    items = [item.strip() for item in text.split(",") if item.strip()]
+    spec = COLUMN_SPECS[feature]
+    if spec.kind == "category":
+        return items
+    if spec.kind == "int":
+        return [int(float(item)) for item in items]
+    return [float(item) for item in items]
+
+
+def what_if_from_ui(base, grid):
+    """Appelle le service de simulation (aucun enregistrement en base)."""
+    request = WhatIfRequest(base=PredictionInputCreate(**base), grid=grid)
+    return what_if_service(request)
+
+
+def what_if_wrapper(feature, values, second_feature, second_values, *args):
+    """Wrapper de l'onglet Simulation : statut, courbe et tableau des points."""
+    try:
+        all_features = PERSONAL_INFO + PROFESSIONAL_INFO + SATISFACTION_METRICS
+        base = dict(zip(all_features, args))
+        if not base.get("matricule") or base["matricule"].strip() == "":
+            base["matricule"] = None
+
+        grid = {feature: parse_grid_values(feature, values, base[feature])}
+        if second_feature and second_feature not in (NO_FEATURE, feature):
+            grid[second_feature] = parse_grid_values(
+                second_feature, second_values, base[second_feature]
+            )
+        result = what_if_from_ui(base, grid)
+    except Exception as e:
+        return f"❌ **Erreur lors de la simulation**: {str(e)}", None, None
+
+    table = pd.DataFrame(result.points)
+    table["probabilite"] = result.probability
+    table["delta"] = result.delta
+    plot = pd.DataFrame(
+        {
+            "valeur": result.points[feature],
+            "probabilite": result.probability,
+            "serie": (
+                [str(v) for v in result.points[result.features[1]]]
+                if len(result.features) == 2
+                else CLEAN_LABELS.get(feature, feature)
+            ),
+        }
+    )
+    status = (
+        f"📊 **Profil de base**: {result.base_probability * 100:.1f}% — "
+        f"{len(result.probability)} points simulés"
+    )
+    return status, plot, table
+
+
 def get_version():
     """Récupère la version de l'application."""
     try:
@@ -0,0 +1,136 @@
+# app/warmup.py
+"""
+Préchauffage au démarrage : avant de se déclarer prête, l'application
+- démarre le backend d'inférence (workers du pool de processus) ;
+- fait passer des lignes d'exemple (valeurs `examples` du schéma) par tout le
+  chemin d'inférence (file bornée, profils, modes exact et décision), à
+  plusieurs tailles de lot ;
+- ouvre le nombre minimal de connexions de chaque pool de base de données.
+
+Le préchauffage tourne dans un thread lancé par le lifespan : /health répond
+tout de suite, /ready renvoie 503 tant qu'il n'est pas terminé. En cas
+d'échec (base injoignable...), il est retenté périodiquement.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import engine, read_engine
+from app.ml.backends import get_backend
+from app.ml.decision import DECISION_THRESHOLD
+from app.ml.model_loader import model_version
+from app.ml.samples import example_frame
+from app.services import (
+    _decide_batch,
+    _predict_batch,
+    _predict_one,
+    run_inference,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    attempts: int = 0
+    duration_seconds: float | None = None
+    steps: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "warmup_seconds": self.duration_seconds,
+            "steps": dict(self.steps),
+            "error": self.error,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def _open_connections(db_engine: Engine, count: int) -> None:
+    """Ouvre `count` connexions simultanément puis les rend au pool."""
+    connections = []
+    try:
+        for _ in range(count):
+            connection = db_engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def warm_up(state: WarmupState = warmup_state) -> WarmupState:
+    """Exécute toutes les étapes de préchauffage et met à jour `state`."""
+    started = time.perf_counter()
+    state.attempts += 1
+    steps = {}
+
+    def timed(name: str, fn, *args) -> None:
+        step_started = time.perf_counter()
+        fn(*args)
+        steps[name] = round(time.perf_counter() - step_started, 4)
+
+    timed("backend", get_backend)
+    timed("model_version", model_version)
+    for size in settings.WARMUP_BATCH_SIZES:
+        X = example_frame(size)
+        if size == 1:
+            timed("predict_1", run_inference, _predict_one, X)
+            timed("decision_1", run_inference, _decide_batch, X, DECISION_THRESHOLD)
+        else:
+            timed(
+                f"batch_{size}",
+                run_inference,
+                _predict_batch,
+                X,
+                settings.BATCH_INFERENCE_PROFILE,
+            )
+    connections = min(settings.WARMUP_DB_CONNECTIONS, settings.DB_POOL_SIZE)
+    timed("db_primary", _open_connections, engine, connections)
+    if read_engine is not engine:
+        timed("db_replica", _open_connections, read_engine, connections)
+
+    state.steps = steps
+    state.duration_seconds = round(time.perf_counter() - started, 4)
+    state.error = None
+    state.ready = True
+    logger.info(
+        f"🔥 Préchauffage terminé en {state.duration_seconds:.2f}s "
+        f"(tentative {state.attempts}) : {steps}"
+    )
+    return state
+
+
+def run_until_ready(stop: threading.Event, state: WarmupState = warmup_state) -> None:
+    """Retente le préchauffage jusqu'au succès ou à l'arrêt de l'application."""
+    while not stop.is_set():
+        try:
+            warm_up(state)
+            return
+        except Exception as e:
+            state.error = f"{type(e).__name__}: {e}"
+            logger.error(f"❌ Échec du préchauffage : {state.error}")
+        stop.wait(settings.WARMUP_RETRY_SECONDS)
+
+
+def start_warmup(state: WarmupState = warmup_state) -> threading.Event:
+    """Lance le préchauffage en arrière-plan ; l'événement retourné l'interrompt."""
+    stop = threading.Event()
+    if not settings.WARMUP_ENABLED:
+        state.ready = True
+        return stop
+    threading.Thread(
+        target=run_until_ready, args=(stop, state), name="warmup", daemon=True
+    ).start()
+    return stop
@@ -0,0 +1,63 @@
+"""
+Décodage + validation d'un lot : format colonnes contre liste d'objets.
+
+Le format lignes est mesuré tel que le traiterait un endpoint classique :
+validation Pydantic de chaque objet puis construction du DataFrame.
+
+Usage :
+    python -m benchmarks.bench_columnar [--rows 100 1000 10000] [--repeat 5]
+"""
+
+import argparse
+import time
+
+import orjson
+import pandas as pd
+from pydantic import TypeAdapter
+
+from app.columnar import parse_columnar
+from app.ml.samples import example_row
+from app.schemas import PredictionInputCreate
+
+rows_adapter = TypeAdapter(list[PredictionInputCreate])
+
+
+def parse_rows(body: bytes) -> pd.DataFrame:
+    items = rows_adapter.validate_json(body)
+    return pd.DataFrame([item.model_dump() for item in items])
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'lignes':>8}{'format':>10}{'Ko':>10}{'ms':>10}{'lignes/s':>12}{'gain':>8}")
+    row = example_row()
+    for n in args.rows:
+        rows_body = orjson.dumps([row] * n)
+        columns_body = orjson.dumps({name: [value] * n for name, value in row.items()})
+        rows_time = best_of(lambda: parse_rows(rows_body), args.repeat)
+        columns_time = best_of(lambda: parse_columnar(columns_body, n), args.repeat)
+        for label, body, elapsed in (
+            ("lignes", rows_body, rows_time),
+            ("colonnes", columns_body, columns_time),
+        ):
+            print(
+                f"{n:>8}{label:>10}{len(body) / 1024:>10.1f}{elapsed * 1000:>10.2f}"
+                f"{n / elapsed:>12.0f}{rows_time / elapsed:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
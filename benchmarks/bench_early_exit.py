@@ -0,0 +1,70 @@
+"""
+Gain du mode décision (arrêt anticipé de la forêt) sur des entrées réalistes.
+
+Chaque ligne est scorée seule, comme par POST /predictions, en mode exact puis
+en mode décision. Affiche la latence médiane, le nombre moyen d'arbres
+utilisés et le taux d'accord des décisions.
+
+Usage :
+    python -m benchmarks.bench_early_exit [--rows 300] [--source synthetic|db]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.core.database import engine
+from app.ml.compact import VariantSpec, build_variant
+from app.ml.decision import DECISION_THRESHOLD, early_exit_predict
+from app.ml.model_loader import model
+from app.ml.profiles import model_for_profile
+from app.ml.samples import stored_frame, synthetic_frame
+
+
+def median_ms(fn, X) -> float:
+    timings = []
+    for i in range(len(X)):
+        row = X.iloc[[i]]
+        started = time.perf_counter()
+        fn(row)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--source", choices=["synthetic", "db"], default="synthetic")
+    args = parser.parse_args()
+
+    X = stored_frame(engine, args.rows) if args.source == "db" else None
+    if X is None or not len(X):
+        X = synthetic_frame(args.rows)
+
+    reference = model_for_profile(model, "latency")
+    pipelines = {
+        "sklearn": reference,
+        "f32": build_variant(reference, VariantSpec("f32")),
+    }
+    print(
+        f"{'modèle':<9}{'exact ms':>10}{'décision ms':>13}{'gain':>7}"
+        f"{'arbres moy':>12}{'accord':>9}"
+    )
+    for name, pipeline in pipelines.items():
+        exact = pipeline.predict(X)
+        _, decided, used = early_exit_predict(pipeline, X, DECISION_THRESHOLD)
+        exact_ms = median_ms(pipeline.predict_proba, X)
+        decision_ms = median_ms(
+            lambda row: early_exit_predict(pipeline, row, DECISION_THRESHOLD), X
+        )
+        print(
+            f"{name:<9}{exact_ms:>10.2f}{decision_ms:>13.2f}"
+            f"{exact_ms / decision_ms:>6.2f}x{used.mean():>12.1f}"
+            f"{np.mean(decided == exact):>9.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
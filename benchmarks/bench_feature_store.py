@@ -0,0 +1,71 @@
+"""
+Magasin de caractéristiques : matrice encodée lue depuis le magasin contre
+préprocesseur du modèle appliqué à chaque passe.
+
+Pour chaque taille :
+- préprocesseur : `model[:-1].transform` sur le DataFrame des entrées (coût
+  payé à chaque passe vectorisée sans magasin, lecture en base non comptée) ;
+- réplique numpy : `FeatureEncoder.transform` sur le même DataFrame ;
+- magasin : ouverture projetée en mémoire et lecture complète des lignes
+  actives (cache de pages chaud).
+
+Usage :
+    python -m benchmarks.bench_feature_store [--rows 10000 200000] [--repeat 5]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.ml.features import FeatureStore, get_encoder
+from app.ml.model_loader import model
+from app.ml.samples import synthetic_frame
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def read_store(store: FeatureStore) -> float:
+    matrix = store.open()
+    return float(matrix.features[matrix.alive].sum())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 200000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = get_encoder()
+    print(f"{'lignes':>10}{'méthode':>18}{'ms':>10}{'gain':>8}")
+    for n in args.rows:
+        X = synthetic_frame(n)
+        with tempfile.TemporaryDirectory() as path:
+            store = FeatureStore(path)
+            ids = np.arange(1, n + 1)
+            store.rebuild([(ids, encoder.transform(X))], encoder.names, "bench")
+            results = [
+                (
+                    "préprocesseur",
+                    best_of(lambda: model[:-1].transform(X), args.repeat),
+                ),
+                ("réplique numpy", best_of(lambda: encoder.transform(X), args.repeat)),
+                ("magasin", best_of(lambda: read_store(store), args.repeat)),
+            ]
+        baseline = results[0][1]
+        for label, seconds in results:
+            print(
+                f"{n:>10}{label:>18}{seconds * 1e3:>10.1f}{baseline / seconds:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Débit d'inférence selon le backend et le nombre de cœurs.
+
+Chaque configuration exécute `--requests` appels concurrents (une ligne par
+appel, comme POST /predictions) et affiche requêtes/s et latence p50/p95.
+
+Usage :
+    python -m benchmarks.bench_inference_backends [--requests 400] [--rows 1]
+"""
+
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.ml.backends import ProcessPoolBackend, ThreadBackend
+from app.ml.model_loader import model
+from app.ml.samples import example_frame
+
+
+def run(backend, requests: int, rows: int, concurrency: int) -> dict:
+    X = example_frame(rows)
+    latencies = []
+
+    def call(_):
+        started = time.perf_counter()
+        backend.score(X, model)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "req_per_s": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rows", type=int, default=1)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    print(f"{'backend':<10}{'procs':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    result = run(ThreadBackend(), args.requests, args.rows, concurrency=4)
+    print(
+        f"{'thread':<10}{'-':>6}{result['req_per_s']:>10.1f}"
+        f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+    )
+    for processes in counts:
+        backend = ProcessPoolBackend(processes)
+        backend.start()
+        try:
+            result = run(backend, args.requests, args.rows, concurrency=2 * processes)
+        finally:
+            backend.shutdown()
+        print(
+            f"{'process':<10}{processes:>6}{result['req_per_s']:>10.1f}"
+            f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
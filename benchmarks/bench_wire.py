@@ -0,0 +1,121 @@
+"""
+Format de transport : taille et temps d'encodage/décodage, JSON contre MessagePack.
+
+Chaque charge est mesurée telle que la traite l'API :
+- corps d'une prédiction unitaire (JSON : `json` de la bibliothèque standard,
+  utilisé par FastAPI pour `request.json()`) ;
+- réponse PredictionFullResponse (JSON : rendu de JSONResponse) ;
+- lot au format colonnes (JSON : orjson, utilisé par parse_columnar) et sa
+  réponse BatchPredictionResponse.
+
+Usage :
+    python -m benchmarks.bench_wire [--rows 100 10000] [--repeat 2000]
+"""
+
+import argparse
+import json
+import time
+from datetime import UTC, datetime
+
+import msgpack
+import orjson
+
+from app.core.wire import MsgpackResponse
+from app.ml.samples import example_row
+from app.schemas import BatchPredictionResponse, PredictionFullResponse
+
+
+def best_of(fn, repeat: int) -> float:
+    """Meilleur temps moyen par appel, sur 5 séries de `repeat` appels."""
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        timings.append((time.perf_counter() - started) / repeat)
+    return min(timings)
+
+
+def full_response() -> dict:
+    """Contenu JSON-compatible d'une PredictionFullResponse, tel que sérialisé par FastAPI."""
+    now = datetime.now(UTC)
+    response = PredictionFullResponse(
+        input={**example_row(), "id": 101, "matricule": "M12345", "created_at": now},
+        output={
+            "id": 7,
+            "prediction_input_id": 101,
+            "prediction": 1,
+            "probability": 0.78,
+            "threshold": 0.5,
+            "model_version": "v1",
+            "created_at": now,
+        },
+    )
+    return response.model_dump(mode="json")
+
+
+def batch_response(rows: int) -> dict:
+    response = BatchPredictionResponse(
+        prediction=[1, 0] * (rows // 2),
+        probability=[0.781234, 0.123456] * (rows // 2),
+        threshold=0.5,
+    )
+    return response.model_dump(mode="json")
+
+
+def json_response(content) -> bytes:
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    payloads = [
+        ("entrée unitaire", example_row(), json.dumps, json.loads, args.repeat),
+        ("réponse unitaire", full_response(), json_response, json.loads, args.repeat),
+    ]
+    row = example_row()
+    for n in args.rows:
+        repeat = max(1, args.repeat * 10 // n)
+        columns = {name: [value] * n for name, value in row.items()}
+        payloads.append((f"lot {n}", columns, orjson.dumps, orjson.loads, repeat))
+        payloads.append(
+            (f"réponse lot {n}", batch_response(n), json_response, json.loads, repeat)
+        )
+
+    print(
+        f"{'charge':>18}{'format':>10}{'octets':>10}{'encodage µs':>14}"
+        f"{'décodage µs':>14}{'gain':>8}"
+    )
+    for label, content, json_encode, json_decode, repeat in payloads:
+        json_body = json_encode(content)
+        packed = MsgpackResponse(content).body
+        results = [
+            (
+                "json",
+                len(json_body),
+                best_of(lambda: json_encode(content), repeat),
+                best_of(lambda: json_decode(json_body), repeat),
+            ),
+            (
+                "msgpack",
+                len(packed),
+                best_of(lambda: msgpack.packb(content), repeat),
+                best_of(lambda: msgpack.unpackb(packed), repeat),
+            ),
+        ]
+        json_total = results[0][2] + results[0][3]
+        for wire_format, size, encode, decode in results:
+            print(
+                f"{label:>18}{wire_format:>10}{size:>10}{encode * 1e6:>14.1f}"
+                f"{decode * 1e6:>14.1f}{json_total / (encode + decode):>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,29 @@
 # create_db.py
 # Import models so they are registered on Base.metadata before creating tables
 import app.models  # noqa: F401
-from app.core.database import Base, engine
+from app.core.config import settings
+from app.core.database import (
+    Base,
+    add_missing_columns,
+    add_missing_indexes,
+    backfill_model_names,
+    drop_indexes,
+    engine,
+)
+from app.core.partitioning import create_partitioned_tables
 
 print("🧱 Création des tables…")
-Base.metadata.create_all(bind=engine)
+if settings.DB_PARTITIONING:
+    create_partitioned_tables(engine, months_ahead=settings.DB_PARTITIONS_AHEAD)
+else:
+    Base.metadata.create_all(bind=engine)
+for column in add_missing_columns(engine):
+    print(f"➕ Colonne ajoutée : {column}")
+for index in add_missing_indexes(engine):
+    print(f"➕ Index créé : {index}")
+for index in drop_indexes(engine, app.models.REPLACED_INDEXES):
+    print(f"➖ Index remplacé supprimé : {index}")
+# Sorties des modèles nommés enregistrées avant la colonne model_name
+if backfilled := backfill_model_names(engine):
+    print(f"➕ Modèle nommé renseigné sur {backfilled} sorties")
 print("✅ Base PostgreSQL prête !")
@@ -9,8 +9,10 @@ from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import sessionmaker
 
 from app.api.endpoints import api_router
-from app.core.database import Base, get_db
+from app.core.cache import prediction_cache, prediction_list_cache
+from app.core.database import Base, get_db, get_read_db
 from app.core.security import verify_api_key
+from app.leaderboard import leaderboard
 
 
 def is_running_in_docker() -> bool:
@@ -49,9 +51,9 @@ engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def create_test_database():
-    """Create the test DB if it doesn’t already exist."""
-    db_name = TEST_DATABASE_URL.split("/")[-1]
+def create_test_database(db_name: str | None = None):
+    """Create the test DB (or another named DB) if it doesn’t already exist."""
+    db_name = db_name or TEST_DATABASE_URL.split("/")[-1]
     try:
         with admin_engine.connect() as conn:
             conn.execute(text(f"CREATE DATABASE {db_name}"))
@@ -92,6 +94,15 @@ def db():
     print("🧹 Rollback après test")
 
 
+@pytest.fixture(autouse=True)
+def clear_read_caches():
+    """Les données de chaque test sont annulées : leurs réponses en cache aussi."""
+    yield
+    prediction_cache.clear()
+    prediction_list_cache.clear()
+    leaderboard.clear()
+
+
 # --- CLIENT HTTP ASYNCHRONE -----------------------------------------------------------
 
 
@@ -115,6 +126,7 @@ async def async_client(db):
         return api_key or "test-key"
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     app.dependency_overrides[verify_api_key] = override_verify_api_key
 
     transport = ASGITransport(app=app)
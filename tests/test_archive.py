@@ -0,0 +1,273 @@
+from datetime import UTC, date, datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.archive import archive_partition, main, read_archive, run_retention
+from app.core.config import settings
+from app.core.partitioning import (
+    add_months,
+    create_partitioned_tables,
+    ensure_partitions,
+    list_partitions,
+    partitioned_metadata,
+)
+from app.ml.features import FeatureStore
+from app.models import LEADERBOARD_INDEX, PredictionInput, PredictionOutput
+from app.schemas import PredictionInputCreate
+from tests.conftest import TEST_DATABASE_URL, create_test_database
+
+PARTITIONED_DATABASE_URL = (
+    TEST_DATABASE_URL.rsplit("/", 1)[0] + "/futurisys_test_partitioned"
+)
+TODAY = date(2025, 9, 15)
+
+
+@pytest.fixture
+def partitioned_engine():
+    """Base dédiée avec tables partitionnées et une partition par mois depuis 2025-01."""
+    create_test_database(PARTITIONED_DATABASE_URL.split("/")[-1])
+    engine = create_engine(PARTITIONED_DATABASE_URL)
+    create_partitioned_tables(engine, months_ahead=9, start=date(2025, 1, 1))
+    yield engine
+    partitioned_metadata().drop_all(bind=engine)
+    engine.dispose()
+
+
+def insert_prediction(session, sample_input, created_at, matricule):
+    data = PredictionInputCreate(**{**sample_input, "matricule": matricule})
+    db_input = PredictionInput(**data.model_dump(), created_at=created_at)
+    session.add(db_input)
+    session.flush()
+    session.add(
+        PredictionOutput(
+            prediction_input_id=db_input.id,
+            prediction=1,
+            probability=0.8,
+            threshold=0.5,
+            created_at=created_at,
+        )
+    )
+    session.commit()
+    return db_input.id
+
+
+def test_add_months_wraps_years():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+
+def test_partitioned_schema(partitioned_engine):
+    """La clé primaire inclut created_at et les partitions mensuelles existent."""
+    inspector = inspect(partitioned_engine)
+    pk = inspector.get_pk_constraint("prediction_inputs")["constrained_columns"]
+    assert set(pk) == {"id", "created_at"}
+    with partitioned_engine.connect() as conn:
+        names = [name for name, _ in list_partitions(conn, "prediction_inputs")]
+    assert names[0] == "prediction_inputs_2025_01"
+    assert "prediction_inputs_2025_09" in names
+    # Index du classement partiel, comme sur la table non partitionnée
+    with partitioned_engine.connect() as conn:
+        definition = conn.execute(
+            text("SELECT pg_get_indexdef(to_regclass(:name))"),
+            {"name": LEADERBOARD_INDEX},
+        ).scalar()
+    assert "WHERE ((trees_used IS NULL) AND (model_name IS NULL))" in definition
+
+
+def test_retention_archives_cold_partitions(partitioned_engine, sample_input, tmp_path):
+    """Les mois froids partent en Parquet et sont supprimés, les mois chauds restent."""
+    with Session(partitioned_engine) as session:
+        old_id = insert_prediction(
+            session, sample_input, datetime(2025, 1, 10, tzinfo=UTC), "M00001"
+        )
+        insert_prediction(
+            session, sample_input, datetime(2025, 8, 10, tzinfo=UTC), "M00002"
+        )
+
+    report = run_retention(
+        partitioned_engine, retention_months=3, archive_dir=tmp_path, today=TODAY
+    )
+
+    archived = {item["partition"]: item["rows"] for item in report}
+    assert archived["prediction_inputs_2025_01"] == 1
+    assert archived["prediction_outputs_2025_01"] == 1
+    assert "prediction_inputs_2025_08" not in archived
+
+    with partitioned_engine.connect() as conn:
+        assert (
+            conn.execute(text("SELECT count(*) FROM prediction_inputs")).scalar() == 1
+        )
+        names = [name for name, _ in list_partitions(conn, "prediction_inputs")]
+    assert "prediction_inputs_2025_01" not in names
+    assert "prediction_inputs_2025_12" in names  # partitions à venir créées
+
+    inputs = read_archive(
+        "prediction_inputs",
+        start=datetime(2025, 1, 1, tzinfo=UTC),
+        end=datetime(2025, 2, 1, tzinfo=UTC),
+        archive_dir=tmp_path,
+    )
+    assert inputs["id"].tolist() == [old_id]
+    assert inputs["genre"].tolist() == [sample_input["genre"]]
+    outputs = read_archive("prediction_outputs", archive_dir=tmp_path)
+    assert outputs["prediction_input_id"].tolist() == [old_id]
+
+
+def test_retention_handles_rows_in_the_default_partition(
+    partitioned_engine, sample_input, tmp_path
+):
+    """
+    Lignes de mois sans partition (passé ou futur) : rangées dans leur
+    partition mensuelle, archivées si froides, sans bloquer la création
+    des partitions à venir.
+    """
+    with Session(partitioned_engine) as session:
+        cold_id = insert_prediction(
+            session, sample_input, datetime(2024, 11, 5, tzinfo=UTC), "M00001"
+        )
+        ahead_id = insert_prediction(
+            session, sample_input, datetime(2025, 11, 20, tzinfo=UTC), "M00002"
+        )
+    with partitioned_engine.connect() as conn:
+        assert (
+            conn.execute(
+                text("SELECT count(*) FROM prediction_inputs_default")
+            ).scalar()
+            == 2
+        )
+
+    dry = run_retention(
+        partitioned_engine,
+        retention_months=3,
+        archive_dir=tmp_path,
+        today=TODAY,
+        dry_run=True,
+    )
+    assert "prediction_inputs_2024_11" in {item["partition"] for item in dry}
+
+    report = run_retention(
+        partitioned_engine, retention_months=3, archive_dir=tmp_path, today=TODAY
+    )
+
+    archived = {item["partition"]: item["rows"] for item in report}
+    assert archived["prediction_inputs_2024_11"] == 1
+    assert archived["prediction_outputs_2024_11"] == 1
+    with partitioned_engine.connect() as conn:
+        for table in ("prediction_inputs", "prediction_outputs"):
+            assert (
+                conn.execute(text(f"SELECT count(*) FROM {table}_default")).scalar()
+                == 0
+            )
+        assert conn.execute(
+            text("SELECT id FROM prediction_inputs_2025_11")
+        ).scalars().all() == [ahead_id]
+    assert read_archive("prediction_inputs", archive_dir=tmp_path)["id"].tolist() == [
+        cold_id
+    ]
+
+
+def test_ensure_partitions_moves_rows_out_of_the_default_partition(
+    partitioned_engine, sample_input
+):
+    with Session(partitioned_engine) as session:
+        ahead_id = insert_prediction(
+            session, sample_input, datetime(2025, 12, 1, tzinfo=UTC), "M00001"
+        )
+    with partitioned_engine.begin() as conn:
+        ensure_partitions(conn, date(2025, 12, 1), 0)
+    with partitioned_engine.connect() as conn:
+        assert conn.execute(
+            text("SELECT id FROM prediction_inputs_2025_12")
+        ).scalars().all() == [ahead_id]
+        assert (
+            conn.execute(
+                text("SELECT count(*) FROM prediction_inputs_default")
+            ).scalar()
+            == 0
+        )
+
+
+def test_read_command_exports_archived_rows(
+    partitioned_engine, sample_input, tmp_path, monkeypatch, capsys
+):
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    with Session(partitioned_engine) as session:
+        old_id = insert_prediction(
+            session, sample_input, datetime(2025, 1, 10, tzinfo=UTC), "M00001"
+        )
+    run_retention(partitioned_engine, retention_months=3, today=TODAY)
+
+    main(
+        [
+            "read",
+            "prediction_inputs",
+            "--start",
+            "2025-01-01",
+            "--end",
+            "2025-02-01",
+            "--columns",
+            "id",
+            "genre",
+        ]
+    )
+    assert capsys.readouterr().out.splitlines() == [
+        "id,genre",
+        f"{old_id},{sample_input['genre']}",
+    ]
+
+
+def test_interrupted_retention_does_not_duplicate_archives(
+    partitioned_engine, sample_input, tmp_path
+):
+    """Fichier écrit mais partition pas encore supprimée : réexport idempotent."""
+    with Session(partitioned_engine) as session:
+        old_id = insert_prediction(
+            session, sample_input, datetime(2025, 1, 10, tzinfo=UTC), "M00001"
+        )
+    path, ids = archive_partition(
+        partitioned_engine,
+        "prediction_inputs",
+        "prediction_inputs_2025_01",
+        date(2025, 1, 1),
+        tmp_path,
+        100,
+    )
+    assert ids.tolist() == [old_id]
+
+    report = run_retention(
+        partitioned_engine, retention_months=3, archive_dir=tmp_path, today=TODAY
+    )
+
+    assert {item["path"] for item in report if item["rows"]} >= {str(path)}
+    assert len(list((tmp_path / "prediction_inputs").glob("*.parquet"))) == 1
+    assert read_archive("prediction_inputs", archive_dir=tmp_path)["id"].tolist() == [
+        old_id
+    ]
+
+
+def test_retention_discards_archived_features(
+    partitioned_engine, sample_input, tmp_path, monkeypatch
+):
+    with Session(partitioned_engine) as session:
+        old_id = insert_prediction(
+            session, sample_input, datetime(2025, 1, 10, tzinfo=UTC), "M00001"
+        )
+        recent_id = insert_prediction(
+            session, sample_input, datetime(2025, 8, 10, tzinfo=UTC), "M00002"
+        )
+    monkeypatch.setattr(settings, "FEATURE_STORE_DIR", str(tmp_path / "store"))
+    store = FeatureStore(tmp_path / "store")
+    features = np.zeros((2, 1), dtype=np.float32)
+    store.rebuild([(np.array([old_id, recent_id]), features)], ["a"], "v1")
+
+    run_retention(
+        partitioned_engine,
+        retention_months=3,
+        archive_dir=tmp_path / "archive",
+        today=TODAY,
+    )
+
+    assert store.open().rows_of([old_id, recent_id]).tolist() == [-1, 1]
@@ -0,0 +1,96 @@
+import os
+import signal
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.ml import backends
+from app.ml.backends import ProcessPoolBackend, ThreadBackend, to_columns
+from app.ml.model_loader import model
+from app.ml.samples import example_frame
+
+
+@pytest.fixture(scope="module")
+def process_backend():
+    backend = ProcessPoolBackend(processes=1)
+    backend.start()
+    yield backend
+    backend.shutdown()
+
+
+def test_thread_backend_uses_given_model():
+    mock = MagicMock()
+    mock.predict_proba.return_value = [[0.3, 0.7]]
+    mock.classes_ = np.array([0, 1])
+
+    proba, prediction = ThreadBackend().score(example_frame(), mock)
+
+    assert proba.tolist() == [0.7]
+    assert prediction.tolist() == [1]
+    # Un seul passage sur la forêt
+    mock.predict.assert_not_called()
+
+
+def test_shutdown_backend_stops_the_created_backend(monkeypatch):
+    backend = MagicMock()
+    monkeypatch.setattr(backends, "_backend", backend)
+
+    backends.shutdown_backend()
+    backends.shutdown_backend()
+
+    backend.shutdown.assert_called_once()
+    assert backends._backend is None
+
+
+def test_process_backend_gets_a_queue_worker_per_process(monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_WORKERS", 2)
+    monkeypatch.setattr(settings, "INFERENCE_PROCESSES", 6)
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "thread")
+    assert backends.queue_workers() == 2
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "process")
+    assert backends.queue_workers() == 6
+    monkeypatch.setattr(settings, "INFERENCE_PROCESSES", 0)
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    assert backends.queue_workers() == 16
+    monkeypatch.setattr(settings, "INFERENCE_WORKERS", 20)
+    assert backends.queue_workers() == 20
+
+
+def test_to_columns_keeps_dtypes():
+    columns = to_columns(example_frame(3))
+    assert columns["age"].dtype == np.int64
+    assert columns["revenu_mensuel"].dtype == np.float64
+    assert len(columns["genre"]) == 3
+
+
+def test_process_backend_matches_thread_backend(process_backend):
+    X = example_frame(4)
+    X.loc[1, "age"] = 58
+    X.loc[2, "heure_supplementaires"] = "Non"
+
+    expected_proba, expected_prediction = ThreadBackend().score(X, model)
+    proba, prediction = process_backend.score(X)
+
+    np.testing.assert_allclose(proba, expected_proba)
+    assert prediction.tolist() == expected_prediction.tolist()
+
+
+def test_process_backend_recovers_from_dead_worker(process_backend):
+    """Un worker tué casse le pool : il est recréé et la requête rejouée."""
+    for pid in list(process_backend._executor._processes):
+        os.kill(pid, signal.SIGKILL)
+
+    proba, _ = process_backend.score(example_frame())
+
+    assert proba.shape == (1,)
+    assert process_backend.restarts == 1
+
+
+def test_process_backend_decision_mode(process_backend):
+    X = example_frame(2)
+    expected = ThreadBackend().decide(X, model, 0.5)
+    result = process_backend.decide(X, threshold=0.5)
+    for got, want in zip(result, expected):
+        np.testing.assert_allclose(got, want)
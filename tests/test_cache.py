@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from app.core.cache import (
+    CachedResponse,
+    ResponseCache,
+    matches_etag,
+    prediction_cache,
+    prediction_list_cache,
+)
+
+
+def test_cache_loads_once_and_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    loads = []
+
+    def loader(key):
+        def load():
+            loads.append(key)
+            return f"{key}".encode()
+
+        return load
+
+    for key in (1, 2, 1, 3, 1, 2):
+        assert cache.get_or_load(key, loader(key)).body == f"{key}".encode()
+
+    # 2 est évincé à l'arrivée de 3, puis rechargé
+    assert loads == [1, 2, 3, 2]
+    assert cache.stats()["hits"] == 2
+
+
+def test_cache_entries_expire():
+    cache = ResponseCache(max_entries=10, ttl=0.05)
+    cache.get_or_load("page", lambda: b"[]")
+    time.sleep(0.06)
+    cache.get_or_load("page", lambda: b"[]")
+    assert cache.stats()["misses"] == 2
+
+
+def test_missing_records_are_not_cached():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    assert cache.get_or_load(1, lambda: None) is None
+    assert len(cache) == 0
+
+
+def test_invalidation_during_load_discards_result():
+    cache = ResponseCache(max_entries=10, ttl=60)
+
+    def load():
+        # Suppression concurrente pendant la lecture en base
+        cache.invalidate(1)
+        return b"perime"
+
+    assert cache.get_or_load(1, load).body == b"perime"
+    assert len(cache) == 0
+
+
+def test_etag_matching():
+    etag = CachedResponse.of(b"{}").etag
+    assert etag.startswith('"') and etag.endswith('"')
+    assert matches_etag(etag, etag)
+    assert matches_etag(f'"autre", W/{etag}', etag)
+    assert matches_etag("*", etag)
+    assert not matches_etag('"autre"', etag)
+    assert not matches_etag(None, etag)
+
+
+@pytest.mark.asyncio
+async def test_get_prediction_is_cached_and_revalidated(async_client, sample_input):
+    post_resp = await async_client.post("/predictions", json=sample_input)
+    prediction_id = post_resp.json()["input"]["id"]
+
+    first = await async_client.get(f"/predictions/{prediction_id}")
+    second = await async_client.get(f"/predictions/{prediction_id}")
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert first.json()["id"] == prediction_id
+    etag = first.headers["etag"]
+    assert second.headers["etag"] == etag
+    assert "max-age" in first.headers["cache-control"]
+    assert prediction_cache.stats()["hits"] >= 1
+
+    not_modified = await async_client.get(
+        f"/predictions/{prediction_id}", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_delete_invalidates_caches(async_client, sample_input):
+    post_resp = await async_client.post("/predictions", json=sample_input)
+    prediction_id = post_resp.json()["input"]["id"]
+    await async_client.get(f"/predictions/{prediction_id}")
+    listed = await async_client.get("/predictions", params={"matricule": "M12345"})
+    assert [item["id"] for item in listed.json()] == [prediction_id]
+    assert listed.headers["cache-control"] == "no-cache"
+
+    await async_client.delete(f"/predictions/{prediction_id}")
+
+    assert (await async_client.get(f"/predictions/{prediction_id}")).status_code == 404
+    listed = await async_client.get("/predictions", params={"matricule": "M12345"})
+    assert listed.json() == []
+    assert prediction_list_cache.stats()["invalidations"] >= 1
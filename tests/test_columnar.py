@@ -0,0 +1,105 @@
+import orjson
+import pytest
+
+from app.columnar import ColumnarValidationError, parse_columnar
+from app.schemas import PredictionInputCreate
+
+
+@pytest.fixture
+def columns(sample_input):
+    """Trois copies de sample_input au format colonnes."""
+    return {name: [value] * 3 for name, value in sample_input.items()}
+
+
+def _parse(data, max_rows=100):
+    return parse_columnar(orjson.dumps(data), max_rows)
+
+
+def _errors(data, max_rows=100):
+    with pytest.raises(ColumnarValidationError) as excinfo:
+        _parse(data, max_rows)
+    return excinfo.value.errors
+
+
+def test_valid_batch_gives_typed_frame(columns):
+    X = _parse(columns)
+    assert X.shape == (3, 29)
+    assert "matricule" not in X.columns
+    assert X["age"].dtype == "int64"
+    assert X["revenu_mensuel"].dtype == "float64"
+    assert X["genre"].tolist() == ["F"] * 3
+
+
+def test_frame_matches_row_format(sample_input, columns):
+    """Les colonnes ont les mêmes valeurs que celles vues par le service unitaire."""
+    X = _parse(columns)
+    row = PredictionInputCreate(**sample_input).model_dump()
+    for name in X.columns:
+        assert X[name].iloc[0] == row[name]
+
+
+def test_integral_floats_are_accepted_as_int(columns):
+    columns["age"] = [41.0, 42.0, 43.0]
+    assert _parse(columns)["age"].tolist() == [41, 42, 43]
+
+
+@pytest.mark.parametrize(
+    "field,values,rows",
+    [
+        ("genre", ["F", "X", "Y"], [1, 2]),
+        ("satisfaction_employee_equipe", [2, 9, 2], [1]),
+        ("age", [17, 41, 17], [0, 2]),
+        ("age", [41, 71, 41], [1]),
+        ("age", [41, 41.5, 41], [1]),
+        ("mobilite_interne_ratio", [0.5, 0.5, 1.5], [2]),
+        ("annees_dans_le_poste_actuel", [4, 20, 4], [1]),
+    ],
+)
+def test_invalid_values_report_rows(columns, field, values, rows):
+    columns[field] = values
+    [error] = _errors(columns)
+    assert error["loc"] == ["body", field]
+    assert error["rows"] == rows
+    assert error["count"] == len(rows)
+
+
+@pytest.mark.parametrize(
+    "field,values",
+    [
+        ("age", ["41", "41", "41"]),
+        ("age", [41, None, 41]),
+        ("age", [True, False, True]),
+        ("genre", ["F", 1, "F"]),
+        ("genre", [["F"], ["F"], ["F"]]),
+    ],
+)
+def test_wrong_types_are_rejected(columns, field, values):
+    columns[field] = values
+    [error] = _errors(columns)
+    assert error["loc"] == ["body", field]
+
+
+def test_structure_errors(columns):
+    del columns["age"]
+    columns["inconnu"] = [1, 2, 3]
+    errors = _errors(columns)
+    assert {tuple(error["loc"]) for error in errors} == {
+        ("body", "age"),
+        ("body", "inconnu"),
+    }
+
+
+def test_columns_must_have_same_length(columns):
+    columns["age"] = [41]
+    assert "même longueur" in _errors(columns)[0]["msg"]
+
+
+def test_max_rows(columns):
+    assert "entre 1 et 2" in _errors(columns, max_rows=2)[0]["msg"]
+
+
+def test_invalid_json():
+    with pytest.raises(ColumnarValidationError):
+        parse_columnar(b"{", 10)
+    with pytest.raises(ColumnarValidationError):
+        parse_columnar(b"[]", 10)
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import app.ml.compact as compact
+import app.ml.model_loader as model_loader
+from app.ml.compact import (
+    CompactForestClassifier,
+    VariantSpec,
+    _float32_floor,
+    build_variant,
+    evaluate,
+)
+from app.ml.model_loader import model
+from app.ml.samples import synthetic_frame
+
+
+@pytest.fixture(scope="module")
+def X():
+    return synthetic_frame(300, seed=1)
+
+
+def test_variant_names_round_trip():
+    for name in ("f32", "f64-t50", "f32-d8", "f32-t100-d6"):
+        assert VariantSpec.parse(name).name == name
+    with pytest.raises(ValueError):
+        VariantSpec.parse("f16-t10")
+
+
+def test_float32_floor_keeps_comparisons_exact():
+    thresholds = np.array([0.1, 1 / 3, -2.7, 1e-9, 5.0])
+    floored = _float32_floor(thresholds)
+    assert floored.dtype == np.float32
+    assert np.all(floored.astype(np.float64) <= thresholds)
+    # Un float32 juste au-dessus du seuil reste au-dessus
+    above = np.nextafter(floored, np.float32(np.inf))
+    assert np.all(above.astype(np.float64) > thresholds)
+
+
+def test_full_precision_variants_match_sklearn(X):
+    expected = model.predict_proba(X)
+    for name in ("f64", "f32"):
+        variant = build_variant(model, VariantSpec.parse(name))
+        np.testing.assert_allclose(variant.predict_proba(X), expected, atol=1e-6)
+        assert (variant.predict(X) == model.predict(X)).all()
+
+
+def test_fit_compacts_a_trained_forest(X):
+    Xt = model[:-1].transform(X)
+    y = model.predict(X)
+    classifier = CompactForestClassifier(VariantSpec("f64", n_trees=10))
+    assert classifier.fit(Xt, y, max_depth=3, random_state=0) is classifier
+
+    forest = RandomForestClassifier(n_estimators=10, max_depth=3, random_state=0)
+    forest.fit(Xt, y)
+    assert classifier.n_trees == 10
+    np.testing.assert_allclose(
+        classifier.predict_proba(Xt), forest.predict_proba(Xt), atol=1e-12
+    )
+
+
+def test_f32_variant_uses_small_dtypes():
+    forest = build_variant(model, VariantSpec("f32")).steps[-1][1]
+    assert forest.threshold_.dtype == np.float32
+    assert forest.proba_.dtype == np.float32
+    assert forest.feature_.dtype == np.int8
+    assert forest.left_.dtype.itemsize <= 2
+
+
+def test_tree_subset_and_depth_limit(X):
+    forest = build_variant(model, VariantSpec("f32", n_trees=20, max_depth=4))
+    classifier = forest.steps[-1][1]
+    assert classifier.n_trees == 20
+    assert classifier.depth_ == 4
+    # Un arbre de profondeur 4 a au plus 31 nœuds
+    assert classifier.feature_.shape[1] <= 31
+
+    report = evaluate(model, forest, X, threshold=0.5, repeat=5)
+    assert 0 < report["mean_abs_deviation"] < 0.2
+    assert 0.5 < report["agreement"] <= 1
+    assert report["size_bytes"] > 0
+    # Accord calculé sur les décisions servies (predict : p > 0,5)
+    served = np.mean(forest.predict(X) == model.predict(X))
+    assert report["agreement"] == pytest.approx(served)
+
+
+def test_leaf_probabilities_by_tree_slice(X):
+    classifier = build_variant(model, VariantSpec("f32")).steps[-1][1]
+    Xt = model[:-1].transform(X.head(5))
+    first = classifier.leaf_probabilities(Xt, slice(0, 10))
+    assert first.shape == (5, 10)
+    np.testing.assert_array_equal(first, classifier.leaf_probabilities(Xt)[:, :10])
+
+
+def test_saved_variant_is_served_by_load_model(tmp_path, monkeypatch, X):
+    monkeypatch.setattr(compact, "VARIANTS_DIR", tmp_path)
+    monkeypatch.setattr(model_loader, "VARIANTS_DIR", tmp_path)
+    compact.save_variant(build_variant(model, VariantSpec("f32", n_trees=10)), "small")
+
+    loaded = model_loader.load_model(variant="small")
+
+    assert isinstance(loaded.steps[-1][1], CompactForestClassifier)
+    assert loaded.predict_proba(X).shape == (300, 2)
+
+
+def test_missing_variant_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_loader, "VARIANTS_DIR", tmp_path)
+    with pytest.raises(RuntimeError, match="variante absente"):
+        model_loader.load_model(variant="absente")
@@ -0,0 +1,237 @@
+import pytest
+from sqlalchemy import create_engine, delete, exc, select, text
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.requests import Request
+
+from app.core import database
+from app.core.database import (
+    Base,
+    MeteredQueuePool,
+    PoolMetrics,
+    RecentWrites,
+    add_missing_columns,
+    add_missing_indexes,
+    backfill_model_names,
+    build_engine,
+    drop_indexes,
+    get_db,
+    get_read_db,
+)
+from app.models import LEADERBOARD_INDEX, PredictionInput, PredictionOutput
+from app.schemas import PredictionInputCreate
+from app.services import get_prediction_inputs
+from tests.conftest import TEST_DATABASE_URL, create_test_database
+from tests.conftest import engine as test_engine
+
+
+@pytest.fixture
+def pool_settings(monkeypatch):
+    """Petit pool dédié aux tests (1 connexion, pas de débordement)."""
+    monkeypatch.setattr(database.settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(database.settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(database.settings, "DB_POOL_TIMEOUT", 0.1)
+    return database.settings
+
+
+def test_pool_metrics_histogram():
+    """Vérifie le comptage des checkouts, timeouts et la répartition par bucket."""
+    metrics = PoolMetrics()
+    metrics.observe(0.0005)
+    metrics.observe(0.2)
+    metrics.observe(0.3, timed_out=True)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 2
+    assert snapshot["timeouts"] == 1
+    assert snapshot["wait_histogram"]["0.001"] == 1
+    assert snapshot["wait_histogram"]["0.5"] == 2
+    assert snapshot["wait_max_ms"] == 300.0
+
+
+def test_build_engine_uses_settings(pool_settings):
+    """Le moteur utilise le pool instrumenté avec la taille configurée."""
+    engine = build_engine(TEST_DATABASE_URL)
+    try:
+        assert isinstance(engine.pool, MeteredQueuePool)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            status = engine.pool.status_dict()
+            assert status["checked_out"] == 1
+            assert status["saturation"] == 1.0
+        assert engine.pool.status_dict()["checkouts"] == 1
+    finally:
+        engine.dispose()
+
+
+def test_pool_timeout_is_counted(pool_settings):
+    """Un checkout qui dépasse DB_POOL_TIMEOUT est comptabilisé."""
+    engine = build_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        assert engine.pool.status_dict()["timeouts"] == 1
+    finally:
+        engine.dispose()
+
+
+def test_idle_pre_ping_strategy(pool_settings, monkeypatch):
+    """En mode idle, une connexion inactive est pingée puis réutilisée."""
+    monkeypatch.setattr(database.settings, "DB_POOL_PRE_PING", "idle")
+    monkeypatch.setattr(database.settings, "DB_POOL_PRE_PING_IDLE_SECONDS", 0)
+    engine = build_engine(TEST_DATABASE_URL)
+    try:
+        assert engine.pool._pre_ping is False
+        for _ in range(2):
+            with engine.connect() as conn:
+                assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert engine.pool.status_dict()["checkouts"] == 2
+    finally:
+        engine.dispose()
+
+
+# ------------------------------
+# ROUTAGE LECTURE / ÉCRITURE
+# ------------------------------
+
+REPLICA_DATABASE_URL = TEST_DATABASE_URL.rsplit("/", 1)[0] + "/futurisys_test_replica"
+
+
+@pytest.fixture(scope="module")
+def replica_engine():
+    """Seconde base locale jouant le rôle du réplica."""
+    create_test_database(REPLICA_DATABASE_URL.split("/")[-1])
+    replica = create_engine(REPLICA_DATABASE_URL)
+    Base.metadata.create_all(bind=replica)
+    yield replica
+    Base.metadata.drop_all(bind=replica)
+    replica.dispose()
+
+
+@pytest.fixture
+def routed_sessions(monkeypatch, replica_engine):
+    """Branche le primaire de test et le réplica sur les fabriques de sessions."""
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=test_engine))
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica_engine))
+    monkeypatch.setattr(database, "recent_writes", RecentWrites(window=60))
+    return replica_engine
+
+
+def make_request(method: str, api_key: str = "client-a") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": method,
+            "headers": [(b"x-api-key", api_key.encode())],
+        }
+    )
+
+
+def open_session(dependency, request: Request):
+    generator = dependency(request)
+    return generator, next(generator)
+
+
+def test_reads_go_to_replica(routed_sessions, sample_input):
+    """Les lectures sont servies par le réplica (ici une ligne absente du primaire)."""
+    with Session(routed_sessions) as replica_db:
+        replica_db.add(
+            PredictionInput(**PredictionInputCreate(**sample_input).model_dump())
+        )
+        replica_db.commit()
+
+    generator, db = open_session(get_read_db, make_request("GET"))
+    try:
+        assert db.get_bind() is routed_sessions
+        assert [p.matricule for p in get_prediction_inputs(db)] == ["M12345"]
+    finally:
+        generator.close()
+
+
+def test_client_reads_its_own_writes(routed_sessions):
+    """Après une écriture, le même client relit sur le primaire, pas les autres."""
+    generator, _ = open_session(get_db, make_request("POST"))
+    generator.close()
+
+    generator, db = open_session(get_read_db, make_request("GET"))
+    assert db.get_bind() is test_engine
+    generator.close()
+
+    generator, db = open_session(get_read_db, make_request("GET", "client-b"))
+    assert db.get_bind() is routed_sessions
+    generator.close()
+
+
+def test_recent_writes_window_expires():
+    """Une écriture plus ancienne que la fenêtre ne force plus le primaire."""
+    tracker = RecentWrites(window=0)
+    tracker.record("client-a")
+    assert tracker.is_recent("client-a") is False
+    assert tracker.is_recent(None) is False
+
+
+def test_add_missing_columns_upgrades_existing_table():
+    with test_engine.begin() as connection:
+        connection.execute(
+            text("ALTER TABLE prediction_outputs DROP COLUMN model_version")
+        )
+
+    assert add_missing_columns(test_engine) == ["prediction_outputs.model_version"]
+    assert add_missing_columns(test_engine) == []
+
+
+def test_backfill_model_names(sample_input):
+    versions = ["rh-0123456789ab", "0123456789ab", "0123456789ab-f32-t100", None]
+    with Session(test_engine) as session:
+        outputs = []
+        for version in versions:
+            data = PredictionInputCreate(**{**sample_input, "matricule": None})
+            db_input = PredictionInput(**data.model_dump())
+            session.add(db_input)
+            session.flush()
+            outputs.append(
+                PredictionOutput(
+                    prediction_input_id=db_input.id,
+                    prediction=0,
+                    probability=0.1,
+                    threshold=0.5,
+                    model_version=version,
+                )
+            )
+        session.add_all(outputs)
+        session.commit()
+        input_ids = [output.prediction_input_id for output in outputs]
+    try:
+        assert backfill_model_names(test_engine) == 1
+        assert backfill_model_names(test_engine) == 0
+        with Session(test_engine) as session:
+            names = session.scalars(
+                select(PredictionOutput.model_name)
+                .where(PredictionOutput.prediction_input_id.in_(input_ids))
+                .order_by(PredictionOutput.prediction_input_id)
+            ).all()
+        assert names == ["rh", None, None, None]
+    finally:
+        with Session(test_engine) as session:
+            session.execute(
+                delete(PredictionInput).where(PredictionInput.id.in_(input_ids))
+            )
+            session.commit()
+
+
+def test_add_missing_indexes_upgrades_existing_table():
+    with test_engine.begin() as connection:
+        connection.execute(text(f"DROP INDEX {LEADERBOARD_INDEX}"))
+
+    assert add_missing_indexes(test_engine) == [LEADERBOARD_INDEX]
+    assert add_missing_indexes(test_engine) == []
+
+
+def test_drop_indexes_removes_replaced_indexes():
+    with test_engine.begin() as connection:
+        connection.execute(
+            text("CREATE INDEX ix_replaced ON prediction_outputs (probability)")
+        )
+
+    assert drop_indexes(test_engine, ("ix_replaced", "ix_absent")) == ["ix_replaced"]
+    assert drop_indexes(test_engine, ("ix_replaced",)) == []
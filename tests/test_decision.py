@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from app.ml.compact import VariantSpec, build_variant
+from app.ml.decision import early_exit_predict, leaf_bounds
+from app.ml.model_loader import model
+from app.ml.samples import synthetic_frame
+
+
+@pytest.fixture(scope="module")
+def X():
+    return synthetic_frame(200, seed=2)
+
+
+@pytest.fixture(scope="module", params=["sklearn", "compact"])
+def pipeline(request):
+    if request.param == "sklearn":
+        return model
+    return build_variant(model, VariantSpec("f32"))
+
+
+def test_decision_matches_exact_mode(pipeline, X):
+    proba, prediction, used = early_exit_predict(pipeline, X, threshold=0.5)
+
+    assert (prediction == pipeline.predict(X)).all()
+    n_trees = len(leaf_bounds(pipeline.steps[-1][1])[0])
+    assert (used >= 1).all() and (used <= n_trees).all()
+    # Les lignes évaluées entièrement ont la probabilité exacte
+    full = used == n_trees
+    np.testing.assert_allclose(
+        proba[full], pipeline.predict_proba(X)[full, 1], atol=1e-6
+    )
+
+
+def test_decision_stops_early_on_clear_cases(pipeline, X):
+    _, _, used = early_exit_predict(pipeline, X, threshold=0.5)
+    n_trees = len(leaf_bounds(pipeline.steps[-1][1])[0])
+    assert used.mean() < n_trees
+
+
+@pytest.mark.parametrize("threshold,expected", [(1.0, 0), (-0.1, 1)])
+def test_unreachable_threshold_needs_one_block(pipeline, X, threshold, expected):
+    """Un seuil hors de [0, 1[ est tranché dès le premier bloc d'arbres."""
+    _, prediction, used = early_exit_predict(pipeline, X, threshold=threshold)
+    assert (prediction == expected).all()
+    assert used.max() <= 32
+
+
+def test_leaf_bounds_are_probabilities(pipeline):
+    low, high = leaf_bounds(pipeline.steps[-1][1])
+    assert (0 <= low).all() and (low <= high).all() and (high <= 1).all()
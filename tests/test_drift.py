@@ -0,0 +1,193 @@
+import json
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+import app.ml.drift as drift
+from app.ml.drift import (
+    NUMERIC,
+    PSI_SIGNIFICANT,
+    DriftMonitor,
+    build_reference,
+    histogram,
+)
+from app.ml.samples import synthetic_frame
+from app.schemas import PredictionInputCreate
+from app.services import create_prediction_full_service
+
+
+@pytest.fixture(scope="module")
+def reference():
+    X = synthetic_frame(2000, seed=3)
+    proba = np.random.default_rng(3).beta(2, 5, len(X))
+    return build_reference(X, proba, "synthetic")
+
+
+@pytest.fixture
+def monitor(reference, tmp_path):
+    monitor = DriftMonitor(reference, tmp_path / "drift.bin")
+    yield monitor
+    monitor.close()
+
+
+def _observe_frame(monitor, X, proba):
+    for row, probability in zip(X.to_dict("records"), proba):
+        monitor.observe(row, probability)
+
+
+def _observe_in_process(reference, path, seed):
+    monitor = DriftMonitor(reference, path)
+    X = synthetic_frame(50, seed=seed)
+    _observe_frame(monitor, X, np.full(len(X), 0.5))
+    monitor.close()
+
+
+def test_histogram_bins_are_right_closed():
+    counts = histogram(np.array([0.0, 1.0, 1.5, 2.0, 3.0]), [1.0, 2.0])
+    assert counts.tolist() == [2, 2, 1]
+
+
+def test_welford_matches_numpy(monitor):
+    X = synthetic_frame(300, seed=4)
+    proba = np.linspace(0, 1, len(X))
+    _observe_frame(monitor, X, proba)
+
+    report = monitor.report()
+    age = report["features"]["age"]
+    assert report["observations"] == 300
+    assert age["mean"] == pytest.approx(X["age"].mean())
+    assert age["std"] == pytest.approx(X["age"].std(ddof=0))
+    assert age["min"] == X["age"].min() and age["max"] == X["age"].max()
+    assert report["probability"]["mean"] == pytest.approx(0.5)
+    counts = report["features"]["genre"]["counts"]
+    assert counts == X["genre"].value_counts().to_dict()
+
+
+def test_observations_are_merged_on_flush(monitor):
+    X = synthetic_frame(300, seed=6)
+    proba = np.linspace(0, 1, len(X))
+    # Trois lots fusionnés l'un après l'autre dans le fichier partagé
+    for part in np.array_split(np.arange(len(X)), 3):
+        _observe_frame(monitor, X.iloc[part], proba[part])
+        monitor.flush()
+        assert not monitor._pending.any()
+
+    report = monitor.report()
+    age = report["features"]["age"]
+    assert report["observations"] == 300
+    assert age["mean"] == pytest.approx(X["age"].mean())
+    assert age["std"] == pytest.approx(X["age"].std(ddof=0))
+    assert age["min"] == X["age"].min() and age["max"] == X["age"].max()
+    assert report["probability"]["std"] == pytest.approx(proba.std())
+
+
+def test_observe_does_not_touch_the_shared_file(monitor):
+    _observe_frame(monitor, synthetic_frame(5), np.full(5, 0.5))
+    assert not monitor._data.any()
+
+    monitor.start_flushing(0.01)
+    deadline = time.monotonic() + 5
+    while not monitor._data.any() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert monitor._data[monitor.slots["age"].offset] == 5
+
+
+def test_same_distribution_has_low_psi(monitor):
+    X = synthetic_frame(2000, seed=5)
+    _observe_frame(monitor, X, np.random.default_rng(5).beta(2, 5, len(X)))
+
+    report = monitor.report()
+    assert report["drifted_features"] == []
+    assert report["probability"]["psi"] < 0.1
+    assert all(report["features"][name]["psi"] < 0.1 for name in NUMERIC)
+
+
+def test_shifted_inputs_are_reported(monitor):
+    X = synthetic_frame(500, seed=6)
+    X["revenu_mensuel"] *= 3
+    X["heure_supplementaires"] = "Oui"
+    _observe_frame(monitor, X, np.full(len(X), 0.95))
+
+    report = monitor.report()
+    assert {"revenu_mensuel", "heure_supplementaires"} <= set(
+        report["drifted_features"]
+    )
+    assert report["probability"]["psi"] > PSI_SIGNIFICANT
+    assert report["features"]["revenu_mensuel"]["kl"] > 0
+
+
+def test_statistics_are_shared_between_processes(reference, tmp_path):
+    path = tmp_path / "drift.bin"
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_observe_in_process, args=(reference, path, seed))
+        for seed in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    monitor = DriftMonitor(reference, path)
+    assert monitor.report()["observations"] == 150
+    monitor.close()
+
+
+def test_new_reference_resets_statistics(reference, monitor):
+    _observe_frame(monitor, synthetic_frame(10), np.full(10, 0.2))
+    other = {**reference, "rows": reference["rows"] + 1}
+
+    reopened = DriftMonitor(other, monitor.path)
+    assert reopened.report()["observations"] == 0
+    reopened.close()
+
+
+def test_prediction_service_feeds_monitor(db, sample_input, monitor, monkeypatch):
+    monkeypatch.setattr(drift, "_monitor", monitor)
+    monkeypatch.setattr(drift, "_monitor_loaded", True)
+
+    create_prediction_full_service(db, PredictionInputCreate(**sample_input))
+    create_prediction_full_service(
+        db,
+        PredictionInputCreate(**{**sample_input, "matricule": None}),
+        mode="decision",
+    )
+
+    report = monitor.report()
+    assert report["observations"] == 2
+    # La probabilité estimée du mode décision n'est pas suivie
+    assert report["probability"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_drift_endpoint(async_client, monitor, monkeypatch):
+    monkeypatch.setattr("app.api.endpoints.get_drift_monitor", lambda: None)
+    resp = await async_client.get("/metrics/drift")
+    assert resp.status_code == 404
+
+    monkeypatch.setattr("app.api.endpoints.get_drift_monitor", lambda: monitor)
+    _observe_frame(monitor, synthetic_frame(20), np.full(20, 0.3))
+    resp = await async_client.get("/metrics/drift")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["observations"] == 20
+    assert body["reference"]["source"] == "synthetic"
+    assert set(body["features"]) == set(drift.COLUMN_SPECS)
+
+
+def test_reference_defaults_to_training_data(tmp_path, monkeypatch):
+    path = tmp_path / "drift_reference.json"
+    monkeypatch.setattr(drift, "DRIFT_REFERENCE_PATH", path)
+    training = tmp_path / "train.csv"
+    synthetic_frame(200, seed=4).to_csv(training, index=False)
+    monkeypatch.setattr(drift.settings, "DRIFT_TRAINING_DATA_PATH", str(training))
+
+    drift.main(["reference"])
+    assert json.loads(path.read_text())["source"] == str(training)
+
+    # Pas de repli silencieux sur le trafic enregistré
+    training.unlink()
+    with pytest.raises(SystemExit):
+        drift.main(["reference"])
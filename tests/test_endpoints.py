@@ -1,7 +1,10 @@
+import uuid
+
 import pytest
 from pydantic import ValidationError
 
 import app.api.endpoints as endpoints
+from app.core.config import settings
 from app.schemas import PredictionInputCreate
 
 
@@ -120,6 +123,28 @@ class TestHealthEndpoint:
         assert "timestamp" in data
 
 
+# =========================
+#       MONITORING
+# =========================
+class TestMonitoringEndpoints:
+    """Tests pour les endpoints de métriques."""
+
+    @pytest.mark.asyncio
+    async def test_pool_metrics(self, async_client):
+        resp = await async_client.get("/metrics/pool")
+        assert resp.status_code == 200
+        primary = resp.json()["primary"]
+        assert {"pool_size", "checked_out", "saturation", "wait_histogram"} <= set(
+            primary
+        )
+
+    @pytest.mark.asyncio
+    async def test_inference_metrics(self, async_client):
+        resp = await async_client.get("/metrics/inference")
+        assert resp.status_code == 200
+        assert {"depth", "max_depth", "rejected", "expired"} <= set(resp.json())
+
+
 # =========================
 #         ERD
 # =========================
@@ -329,6 +354,28 @@ class TestPredictionsEndpoint:
         resp = await async_client.delete("/predictions/999999")
         assert resp.status_code == 404
 
+    @pytest.mark.asyncio
+    async def test_bulk_delete_predictions(self, async_client, sample_input):
+        """
+        Vérifie que POST /predictions/delete supprime les entrées demandées
+        et renvoie les nombres de lignes supprimées.
+        """
+        await async_client.post("/predictions", json=sample_input)
+        await async_client.post(
+            "/predictions", json={**sample_input, "matricule": "M54321"}
+        )
+
+        resp = await async_client.post(
+            "/predictions/delete", json={"matricules": ["M12345", "M00000"]}
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {"inputs_deleted": 1, "outputs_deleted": 1, "batches": 1}
+        remaining = (await async_client.get("/predictions")).json()
+        assert [item["matricule"] for item in remaining] == ["M54321"]
+
+        resp = await async_client.post("/predictions/delete", json={})
+        assert resp.status_code == 422
+
     @pytest.mark.asyncio
     async def test_post_predictions_invalid_data(self, async_client, sample_input):
         """
@@ -349,6 +396,52 @@ class TestPredictionsEndpoint:
         resp = await async_client.post("/predictions", json=data)
         assert resp.status_code == 422
 
+    @pytest.mark.asyncio
+    async def test_idempotency_key_replays_response(self, async_client, sample_input):
+        """
+        Vérifie qu'une requête rejouée avec la même Idempotency-Key renvoie
+        la réponse d'origine sans créer de nouvelle entrée.
+        """
+        sample_input["matricule"] = None
+        headers = {"Idempotency-Key": f"test-{uuid.uuid4()}"}
+        resp1 = await async_client.post(
+            "/predictions", json=sample_input, headers=headers
+        )
+        resp2 = await async_client.post(
+            "/predictions", json=sample_input, headers=headers
+        )
+        assert resp1.status_code == resp2.status_code == 201
+        assert resp2.headers["Idempotent-Replayed"] == "true"
+        assert resp1.json() == resp2.json()
+
+        listing = await async_client.get("/predictions")
+        assert len(listing.json()) == 1
+
+    @pytest.mark.asyncio
+    async def test_idempotency_key_reused_with_other_payload(
+        self, async_client, sample_input
+    ):
+        """Vérifie qu'une clé réutilisée avec un autre contenu renvoie 422."""
+        headers = {"Idempotency-Key": f"test-{uuid.uuid4()}"}
+        await async_client.post("/predictions", json=sample_input, headers=headers)
+        other = {**sample_input, "age": 42}
+        resp = await async_client.post("/predictions", json=other, headers=headers)
+        assert resp.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_post_predictions_decision_mode(self, async_client, sample_input):
+        """Vérifie que le mode décision renvoie la même décision et les arbres utilisés."""
+        exact = await async_client.post("/predictions", json=sample_input)
+        sample_input["matricule"] = "M99999"
+        resp = await async_client.post(
+            "/predictions", params={"mode": "decision"}, json=sample_input
+        )
+        assert resp.status_code == 201
+        data = resp.json()
+        assert exact.json()["trees_used"] is None
+        assert 1 <= data["trees_used"] <= 200
+        assert data["output"]["prediction"] == exact.json()["output"]["prediction"]
+
     # --- TESTS UNITAIRES DE VALIDATION Pydantic ---
     @pytest.fixture(autouse=True)
     def _base_data(self, sample_input):
@@ -399,3 +492,134 @@ class TestPredictionsEndpoint:
         with pytest.raises(ValidationError) as excinfo:
             PredictionInputCreate(**self.data)
         assert expected_msg in str(excinfo.value)
+
+
+# =========================
+#      BATCH (COLONNES)
+# =========================
+class TestBatchEndpoint:
+    """Tests pour POST /predictions/batch (format colonnes)."""
+
+    @pytest.mark.asyncio
+    async def test_batch_scores_columns(self, async_client, sample_input):
+        """Vérifie qu'un lot de deux lignes renvoie deux résultats, dans l'ordre."""
+        other = {**sample_input, "age": 55, "heure_supplementaires": "Non"}
+        body = {name: [sample_input[name], other[name]] for name in sample_input}
+        resp = await async_client.post("/predictions/batch", json=body)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert len(data["prediction"]) == len(data["probability"]) == 2
+        assert data["threshold"] == 0.5
+
+        # Même résultat que la prédiction unitaire
+        single = await async_client.post("/predictions", json=sample_input)
+        output = single.json()["output"]
+        assert data["probability"][0] == pytest.approx(output["probability"])
+        assert data["prediction"][0] == output["prediction"]
+
+    @pytest.mark.asyncio
+    async def test_batch_decision_mode(self, async_client, sample_input):
+        body = {name: [value] * 3 for name, value in sample_input.items()}
+        exact = await async_client.post("/predictions/batch", json=body)
+        resp = await async_client.post(
+            "/predictions/batch", params={"mode": "decision"}, json=body
+        )
+        assert resp.status_code == 200
+        assert len(resp.json()["trees_used"]) == 3
+        assert resp.json()["prediction"] == exact.json()["prediction"]
+
+    @pytest.mark.asyncio
+    async def test_batch_does_not_persist(self, async_client, sample_input):
+        body = {name: [value] for name, value in sample_input.items()}
+        await async_client.post("/predictions/batch", json=body)
+        listing = await async_client.get("/predictions")
+        assert listing.json() == []
+
+    @pytest.mark.asyncio
+    async def test_batch_invalid_column(self, async_client, sample_input):
+        """Vérifie que les erreurs indiquent la colonne et les lignes fautives."""
+        body = {name: [value] * 3 for name, value in sample_input.items()}
+        body["genre"] = ["F", "X", "M"]
+        resp = await async_client.post("/predictions/batch", json=body)
+        assert resp.status_code == 422
+        [error] = resp.json()["detail"]
+        assert error["loc"] == ["body", "genre"]
+        assert error["rows"] == [1]
+
+
+# =========================
+#      SIMULATION (WHAT-IF)
+# =========================
+class TestWhatIfEndpoint:
+    """Tests pour POST /predictions/what-if."""
+
+    @pytest.mark.asyncio
+    async def test_what_if_matches_batch(self, async_client, sample_input):
+        """Vérifie que chaque point vaut le scoring du profil modifié."""
+        grid = {"revenu_mensuel": [2000, 8000], "heure_supplementaires": ["Oui", "Non"]}
+        resp = await async_client.post(
+            "/predictions/what-if", json={"base": sample_input, "grid": grid}
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["features"] == ["revenu_mensuel", "heure_supplementaires"]
+        assert data["points"] == {
+            "revenu_mensuel": [2000, 2000, 8000, 8000],
+            "heure_supplementaires": ["Oui", "Non", "Oui", "Non"],
+        }
+
+        rows = [sample_input] + [
+            {**sample_input, "revenu_mensuel": r, "heure_supplementaires": h}
+            for r, h in zip(*data["points"].values())
+        ]
+        body = {name: [row[name] for row in rows] for name in sample_input}
+        batch = (await async_client.post("/predictions/batch", json=body)).json()
+        assert data["base_probability"] == pytest.approx(batch["probability"][0])
+        assert data["probability"] == pytest.approx(batch["probability"][1:])
+        assert data["delta"] == pytest.approx(
+            [p - batch["probability"][0] for p in batch["probability"][1:]]
+        )
+
+        # Rien n'est enregistré
+        assert (await async_client.get("/predictions")).json() == []
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "grid",
+        [
+            {},
+            {"matricule": ["M1"]},
+            {"age": []},
+            {"age": [30], "genre": ["F"], "poste": ["Manager"]},
+        ],
+    )
+    async def test_what_if_invalid_grid(self, async_client, sample_input, grid):
+        resp = await async_client.post(
+            "/predictions/what-if", json={"base": sample_input, "grid": grid}
+        )
+        assert resp.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_what_if_invalid_values(
+        self, async_client, sample_input, monkeypatch
+    ):
+        """Vérifie les lignes fautives (numérotées dans la grille) et la limite."""
+        resp = await async_client.post(
+            "/predictions/what-if",
+            json={"base": sample_input, "grid": {"age": [30, 12, 40]}},
+        )
+        assert resp.status_code == 422
+        [error] = resp.json()["detail"]
+        assert error["loc"] == ["body", "age"]
+        assert error["rows"] == [1]
+
+        monkeypatch.setattr(settings, "WHATIF_MAX_POINTS", 4)
+        resp = await async_client.post(
+            "/predictions/what-if",
+            json={
+                "base": sample_input,
+                "grid": {"age": [30, 31], "genre": ["F", "M", "F"]},
+            },
+        )
+        assert resp.status_code == 422
+        assert "4 points" in resp.json()["detail"]
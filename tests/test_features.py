@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.ml.features import (
+    FeatureStore,
+    FeatureWriter,
+    feature_writer,
+    get_encoder,
+    iter_encoded,
+    open_features,
+    rows_columns,
+)
+from app.ml.model_loader import model, model_version
+from app.ml.samples import synthetic_frame
+from app.models import PredictionInput
+from app.schemas import PredictionInputCreate
+from tests.conftest import engine as test_engine
+
+NAMES = ["a", "b", "c"]
+
+
+def features(*values):
+    return np.array([[v, v + 0.5, -v] for v in values], dtype=np.float32)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FeatureStore(tmp_path / "store")
+    store.rebuild([(np.array([1, 2]), features(1, 2))], NAMES, "v1")
+    return store
+
+
+def test_encoder_matches_the_preprocessor():
+    encoder = get_encoder()
+    assert encoder.blocks is not None
+    X = synthetic_frame(500)
+    expected = np.asarray(model[:-1].transform(X), dtype=np.float32)
+    assert np.array_equal(encoder.transform(X), expected)
+    row = X.iloc[0].to_dict()
+    assert np.array_equal(encoder.transform(rows_columns([row])), expected[:1])
+    # Catégorie inconnue : ignorée comme par OneHotEncoder
+    unknown = rows_columns([{**row, "poste": "Inconnu"}])
+    assert np.array_equal(
+        encoder.transform(unknown),
+        model[:-1].transform(pd.DataFrame(unknown)).astype(np.float32),
+    )
+
+
+def test_append_delete_and_open(store):
+    store.append([3], features(3))
+    store.delete([1])
+
+    matrix = store.open()
+    assert matrix.ids.tolist() == [1, 2, 3]
+    assert np.array_equal(matrix.features, features(1, 2, 3))
+    assert matrix.alive.tolist() == [False, True, True]
+    assert matrix.rows_of([3, 1, 2, 9]).tolist() == [2, -1, 1, -1]
+    assert (matrix.names, matrix.model_version) == (NAMES, "v1")
+    # Fichiers .npy standard
+    assert np.array_equal(np.load(store.path / "features.npy"), features(1, 2, 3))
+    assert np.load(store.path / "deleted.npy").tolist() == [1]
+
+
+def test_store_is_not_written_before_first_build(tmp_path):
+    store = FeatureStore(tmp_path / "store")
+    store.append([1], features(1))
+    store.delete([1])
+    assert store.open() is None
+
+
+def test_rebuild_keeps_writes_made_meanwhile(store):
+    def batches():
+        yield np.array([1, 2]), features(1, 2)
+        # Écritures d'un worker pendant la lecture de la base
+        store.append([3], features(3))
+        store.delete([2])
+
+    assert store.rebuild(batches(), NAMES, "v2") == 3
+    matrix = store.open()
+    assert matrix.ids.tolist() == [1, 2, 3]
+    assert matrix.deleted.tolist() == [2]
+    assert matrix.model_version == "v2"
+    assert not (store.path / "rebuild").exists()
+
+
+def test_first_build_keeps_writes_made_meanwhile(tmp_path):
+    store = FeatureStore(tmp_path / "store")
+
+    def batches():
+        yield np.array([1, 2]), features(1, 2)
+        # Pas encore lisible, mais les écritures sont enregistrées
+        assert store.open() is None
+        store.append([3], features(3))
+        store.delete([1])
+
+    assert store.rebuild(batches(), NAMES, "v1") == 3
+    matrix = store.open()
+    assert matrix.ids.tolist() == [1, 2, 3]
+    assert np.array_equal(matrix.features, features(1, 2, 3))
+    assert matrix.alive.tolist() == [False, True, True]
+
+
+def test_writer_batches_operations_in_order(tmp_path, sample_input, monkeypatch):
+    monkeypatch.setattr(settings, "FEATURE_STORE_DIR", str(tmp_path / "store"))
+    encoder = get_encoder()
+    store = FeatureStore(tmp_path / "store")
+    store.rebuild([], encoder.names, model_version())
+    writes = []
+    monkeypatch.setattr(
+        FeatureStore, "append", lambda self, ids, f: writes.append(("append", ids))
+    )
+    monkeypatch.setattr(
+        FeatureStore, "delete", lambda self, ids: writes.append(("delete", ids))
+    )
+    writer = FeatureWriter(maxsize=10)
+    # Opérations déposées avant le démarrage du thread : écrites en un lot
+    writer.queue.put_nowait(("append", 1, sample_input))
+    writer.queue.put_nowait(("append", 2, sample_input))
+    writer.queue.put_nowait(("delete", [1]))
+    writer.put(("append", 3, sample_input))
+    writer.stop()
+
+    assert writes == [("append", [1, 2]), ("delete", [1]), ("append", [3])]
+
+
+def test_writer_drops_operations_when_full(monkeypatch):
+    writer = FeatureWriter(maxsize=1)
+    monkeypatch.setattr(writer, "_run", lambda: None)
+    writer.put(("delete", [1]))
+    writer.put(("delete", [2]))
+    assert writer.dropped == 1
+
+
+def test_rebuild_from_database(tmp_path, sample_input):
+    rows = [{**sample_input, "matricule": None, "age": age} for age in (25, 48)]
+    with Session(test_engine) as session:
+        inputs = [
+            PredictionInput(**PredictionInputCreate(**row).model_dump()) for row in rows
+        ]
+        session.add_all(inputs)
+        session.commit()
+        ids = [i.id for i in inputs]
+    try:
+        encoder = get_encoder()
+        store = FeatureStore(tmp_path / "store")
+        store.rebuild(iter_encoded(test_engine, encoder, 1), encoder.names, "v1")
+    finally:
+        with Session(test_engine) as session:
+            session.execute(delete(PredictionInput).where(PredictionInput.id.in_(ids)))
+            session.commit()
+
+    matrix = store.open()
+    stored = matrix.features[matrix.rows_of(ids)]
+    assert np.array_equal(stored, encoder.transform(pd.DataFrame(rows)))
+
+
+@pytest.mark.asyncio
+async def test_predictions_update_the_store(
+    async_client, sample_input, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "FEATURE_STORE_DIR", str(tmp_path / "store"))
+    encoder = get_encoder()
+    FeatureStore(tmp_path / "store").rebuild([], encoder.names, model_version())
+
+    created = (await async_client.post("/predictions", json=sample_input)).json()
+    prediction_input_id = created["input"]["id"]
+    feature_writer.flush()
+    matrix = open_features()
+    assert matrix.ids.tolist() == [prediction_input_id]
+    assert np.array_equal(
+        matrix.features, encoder.transform(pd.DataFrame([sample_input]))
+    )
+
+    await async_client.delete(f"/predictions/{prediction_input_id}")
+    feature_writer.flush()
+    assert open_features().rows_of([prediction_input_id]).tolist() == [-1]
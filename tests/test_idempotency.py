@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from app.core.idempotency import (
+    IdempotencyInProgress,
+    IdempotencyKeyReused,
+    IdempotencyStore,
+)
+
+
+@pytest.fixture
+def store():
+    return IdempotencyStore(ttl=60, max_entries=2, wait_timeout=1)
+
+
+def test_first_claim_executes_then_replays(store):
+    """La première requête s'exécute, les suivantes rejouent la réponse."""
+    claim = store.claim("k1", "fp")
+    assert claim.replayed is False
+    store.complete("k1", {"id": 1})
+
+    replay = store.claim("k1", "fp")
+    assert replay.replayed is True
+    assert replay.response == {"id": 1}
+
+
+def test_same_key_different_payload_is_rejected(store):
+    store.claim("k1", "fp")
+    store.complete("k1", {"id": 1})
+    with pytest.raises(IdempotencyKeyReused):
+        store.claim("k1", "autre")
+
+
+def test_concurrent_duplicate_waits_for_first(store):
+    """Un doublon concurrent attend la réponse au lieu de s'exécuter."""
+    store.claim("k1", "fp")
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(store.claim("k1", "fp")))
+    waiter.start()
+    time.sleep(0.05)
+    assert results == []  # toujours en attente
+    store.complete("k1", {"id": 7})
+    waiter.join(timeout=1)
+    assert results[0].replayed is True
+    assert results[0].response == {"id": 7}
+
+
+def test_release_lets_waiter_execute(store):
+    """Après un échec, le doublon en attente reprend la main."""
+    store.claim("k1", "fp")
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(store.claim("k1", "fp")))
+    waiter.start()
+    time.sleep(0.05)
+    store.release("k1")
+    waiter.join(timeout=1)
+    assert results[0].replayed is False
+
+
+def test_in_progress_timeout():
+    store = IdempotencyStore(ttl=60, max_entries=10, wait_timeout=0.01)
+    store.claim("k1", "fp")
+    with pytest.raises(IdempotencyInProgress):
+        store.claim("k1", "fp")
+
+
+def test_store_is_bounded_and_expires():
+    """Les réponses les plus anciennes sont évincées et expirent après le TTL."""
+    store = IdempotencyStore(ttl=60, max_entries=2, wait_timeout=1)
+    for key in ("a", "b", "c"):
+        store.claim(key, "fp")
+        store.complete(key, key)
+    assert len(store) == 2
+    assert store.claim("a", "fp").replayed is False
+
+    expiring = IdempotencyStore(ttl=0, max_entries=10, wait_timeout=1)
+    expiring.claim("a", "fp")
+    expiring.complete("a", "a")
+    assert expiring.claim("a", "fp").replayed is False
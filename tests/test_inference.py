@@ -0,0 +1,82 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.ml.inference import DeadlineExceeded, InferenceQueue, InferenceQueueFull
+from app.models import PredictionInput
+from app.schemas import PredictionInputCreate
+from app.services import create_prediction_full_service
+
+
+@pytest.fixture
+def blocked_queue():
+    """File à un worker, occupé tant que l'événement n'est pas levé."""
+    inference = InferenceQueue(maxsize=1, workers=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(2)
+
+    inference.submit(block)
+    started.wait(1)
+    yield inference
+    release.set()
+
+
+def test_run_returns_result():
+    inference = InferenceQueue(maxsize=2, workers=1)
+    assert inference.run(lambda x: x * 2, 21) == 42
+    assert inference.stats()["completed"] == 1
+
+
+def test_worker_exception_is_propagated():
+    inference = InferenceQueue(maxsize=2, workers=1)
+
+    def boom():
+        raise ValueError("modèle en erreur")
+
+    with pytest.raises(ValueError):
+        inference.run(boom)
+
+
+def test_full_queue_is_rejected(blocked_queue):
+    """Une fois la file pleine, la soumission échoue immédiatement."""
+    blocked_queue.submit(lambda: None)
+    with pytest.raises(InferenceQueueFull):
+        blocked_queue.submit(lambda: None)
+    assert blocked_queue.stats()["rejected"] == 1
+
+
+def test_expired_work_never_reaches_model(blocked_queue):
+    """Une tâche dont l'échéance passe pendant l'attente n'est pas exécutée."""
+    model = MagicMock()
+    with pytest.raises(DeadlineExceeded):
+        blocked_queue.run(model.predict_proba, deadline=time.monotonic() + 0.05)
+    with pytest.raises(DeadlineExceeded):
+        blocked_queue.submit(model.predict_proba, deadline=time.monotonic() - 1)
+    model.predict_proba.assert_not_called()
+
+
+def test_service_sheds_load_without_writing(db, sample_input):
+    """File pleine : 503 sans entrée orpheline en base."""
+    with patch(
+        "app.services.inference_queue.run", side_effect=InferenceQueueFull()
+    ), pytest.raises(HTTPException) as exc_info:
+        create_prediction_full_service(db, PredictionInputCreate(**sample_input))
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
+    assert db.query(PredictionInput).count() == 0
+
+
+def test_service_expired_deadline(db, sample_input):
+    with pytest.raises(HTTPException) as exc_info:
+        create_prediction_full_service(
+            db, PredictionInputCreate(**sample_input), deadline=time.monotonic() - 1
+        )
+    assert exc_info.value.status_code == 504
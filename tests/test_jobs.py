@@ -0,0 +1,227 @@
+import threading
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+import app.jobs as jobs
+from app.api.endpoints import api_router
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.security import verify_api_key
+from app.jobs import (
+    claim_file_job,
+    create_job,
+    get_job,
+    process_next_chunk,
+    resolve_input_file,
+)
+from app.ml.samples import example_frame
+from app.models import PredictionJob, PredictionJobChunk
+from app.services import score_batch_service
+from tests.conftest import engine as test_engine
+
+
+@pytest.fixture
+def session():
+    """Session qui valide réellement : les workers lisent la file sur leurs connexions."""
+    with Session(test_engine) as session:
+        yield session
+    with Session(test_engine) as cleanup:
+        cleanup.execute(delete(PredictionJob))
+        cleanup.commit()
+
+
+def _drain() -> list[str]:
+    outcomes = []
+    while (outcome := process_next_chunk(test_engine, "test")) != "empty":
+        outcomes.append(outcome)
+    return outcomes
+
+
+def test_job_is_split_and_scored(session):
+    X = example_frame(5)
+    job = create_job(session, X, chunk_size=2)
+    assert (job.status, job.total_rows, job.total_chunks) == ("running", 5, 3)
+
+    assert _drain() == ["done"] * 3
+
+    state = get_job(session, job.id)
+    expected = score_batch_service(X)
+    assert state.status == "succeeded"
+    assert (state.processed_rows, state.done_chunks, state.failed_rows) == (5, 3, 0)
+    assert state.results.prediction == expected.prediction
+    assert state.results.probability == pytest.approx(expected.probability)
+    assert state.finished_at is not None
+
+
+def test_results_are_paginated(session):
+    X = example_frame(5)
+    job = create_job(session, X, chunk_size=2)
+    _drain()
+
+    page = get_job(session, job.id, offset=1, limit=3).results
+    assert page.offset == 1
+    assert page.prediction == score_batch_service(X).prediction[1:4]
+
+
+def test_locked_chunk_is_skipped(session):
+    job = create_job(session, example_frame(4), chunk_size=2)
+    first, second = session.scalars(
+        select(PredictionJobChunk.id)
+        .where(PredictionJobChunk.job_id == job.id)
+        .order_by(PredictionJobChunk.id)
+    ).all()
+
+    # Un autre worker détient le premier bloc
+    with test_engine.connect() as other:
+        other.execute(
+            select(PredictionJobChunk)
+            .where(PredictionJobChunk.id == first)
+            .with_for_update()
+        )
+        assert process_next_chunk(test_engine, "test") == "done"
+        assert process_next_chunk(test_engine, "test") == "empty"
+        other.rollback()
+
+    statuses = dict(
+        session.execute(
+            select(PredictionJobChunk.id, PredictionJobChunk.status).where(
+                PredictionJobChunk.job_id == job.id
+            )
+        ).all()
+    )
+    assert statuses == {first: "pending", second: "done"}
+
+
+def test_chunk_fails_after_max_attempts(session, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(jobs, "score_batch_service", broken)
+    monkeypatch.setattr(settings, "JOBS_MAX_ATTEMPTS", 2)
+    job = create_job(session, example_frame(3), chunk_size=3)
+
+    assert _drain() == ["retry", "failed"]
+
+    state = get_job(session, job.id)
+    assert state.status == "failed"
+    assert state.failed_rows == 3
+    (failure,) = state.failures
+    assert (failure.attempts, failure.error) == (2, "RuntimeError: boom")
+    assert state.results.prediction == [None] * 3
+
+
+def test_full_inference_queue_releases_chunk(session, monkeypatch):
+    def saturated(*args, **kwargs):
+        raise HTTPException(status_code=503)
+
+    monkeypatch.setattr(jobs, "score_batch_service", saturated)
+    job = create_job(session, example_frame(2))
+
+    assert process_next_chunk(test_engine, "test") == "busy"
+    chunk = session.scalars(
+        select(PredictionJobChunk).where(PredictionJobChunk.job_id == job.id)
+    ).one()
+    assert (chunk.status, chunk.attempts) == ("pending", 0)
+
+
+def test_file_job_is_split_by_worker(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_INPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "JOBS_CHUNK_SIZE", 2)
+    example_frame(3).to_parquet(tmp_path / "lot.parquet")
+    pd.DataFrame({"age": [30]}).to_csv(tmp_path / "incomplet.csv", index=False)
+
+    good = create_job(session, source_file="lot.parquet")
+    bad = create_job(session, source_file="incomplet.csv")
+    assert good.status == "queued"
+
+    assert claim_file_job(test_engine)
+    assert claim_file_job(test_engine)
+    assert not claim_file_job(test_engine)
+    assert _drain() == ["done", "done"]
+
+    assert get_job(session, good.id).status == "succeeded"
+    failed = get_job(session, bad.id)
+    assert failed.status == "failed"
+    assert "Champ obligatoire" in failed.error
+
+
+def test_poison_file_job_is_marked_failed(session, tmp_path, monkeypatch):
+    def broken(path):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(settings, "JOBS_INPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs, "read_input_file", broken)
+    (tmp_path / "lot.csv").write_text("age\n30\n")
+    poison = create_job(session, source_file="lot.csv")
+    batch = create_job(session, example_frame(2))
+
+    assert claim_file_job(test_engine)
+    assert not claim_file_job(test_engine)
+    assert _drain() == ["done"]
+
+    failed = get_job(session, poison.id)
+    assert (failed.status, failed.error) == ("failed", "RuntimeError: boom")
+    assert get_job(session, batch.id).status == "succeeded"
+
+
+def test_worker_processes_chunks_when_claim_fails(monkeypatch):
+    stop = threading.Event()
+    calls = []
+
+    def broken(db_engine):
+        raise RuntimeError("boom")
+
+    def process(db_engine, worker):
+        calls.append(worker)
+        stop.set()
+        return "done"
+
+    monkeypatch.setattr(jobs, "claim_file_job", broken)
+    monkeypatch.setattr(jobs, "process_next_chunk", process)
+    jobs.run_worker(stop, test_engine, "test")
+
+    assert calls == ["test"]
+
+
+def test_input_file_must_stay_in_input_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_INPUT_DIR", str(tmp_path / "jobs"))
+    (tmp_path / "secret.csv").write_text("age\n30\n")
+
+    with pytest.raises(ValueError, match="hors de"):
+        resolve_input_file("../secret.csv")
+    with pytest.raises(ValueError, match="Format"):
+        resolve_input_file("lot.json")
+
+
+@pytest.mark.asyncio
+async def test_jobs_endpoints(session):
+    app = FastAPI()
+    app.include_router(api_router)
+    app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[verify_api_key] = lambda: "test-key"
+    X = example_frame(3)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        created = await client.post("/jobs", json=X.to_dict("list"))
+        assert created.status_code == 202
+        job_id = created.json()["id"]
+        assert created.headers["location"].endswith(f"/jobs/{job_id}")
+        assert created.json()["status"] == "running"
+
+        _drain()
+        done = await client.get(f"/jobs/{job_id}")
+        missing = await client.get("/jobs/0")
+        invalid = await client.post("/jobs", json={"age": [30]})
+        no_file = await client.post("/jobs?file=absent.csv")
+
+    assert done.json()["status"] == "succeeded"
+    assert done.json()["results"]["prediction"] == score_batch_service(X).prediction
+    assert missing.status_code == 404
+    assert invalid.status_code == 422
+    assert no_file.status_code == 422
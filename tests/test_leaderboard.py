@@ -0,0 +1,174 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql
+
+from app.leaderboard import Leaderboard, leaderboard, load_segment, segment_query
+from app.models import LEADERBOARD_INDEX
+from app.schemas import LeaderboardEntry
+from tests.conftest import engine
+
+
+def entry(prediction_input_id, probability, departement="Consulting"):
+    return LeaderboardEntry(
+        prediction_input_id=prediction_input_id,
+        departement=departement,
+        poste="Consultant",
+        probability=probability,
+        prediction=int(probability >= 0.5),
+    )
+
+
+class FakeTable:
+    """Sorties en base, lues comme par load_segment."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.loads = 0
+
+    def load(self, key, limit):
+        self.loads += 1
+        departement, _ = key
+        rows = [e for e in self.entries if departement in (None, e.departement.value)]
+        rows.sort(key=lambda e: (-e.probability, e.prediction_input_id))
+        return rows[:limit]
+
+
+def ids(entries):
+    return [e.prediction_input_id for e in entries]
+
+
+def test_writes_update_the_loaded_segments():
+    table = FakeTable(entry(i, i / 10) for i in range(1, 6))
+    board = Leaderboard(depth=3, ttl=60)
+    all_, consulting = (None, None), ("Consulting", None)
+
+    assert ids(board.top(all_, 2, table.load)) == [5, 4]
+    assert ids(board.top(consulting, 3, table.load)) == [5, 4, 3]
+
+    new = entry(6, 0.45)
+    table.entries.append(new)
+    board.add(new)
+    # Sous la dernière entrée gardée d'un segment tronqué : ignorée
+    board.add(entry(7, 0.05))
+    board.add(entry(8, 0.99, departement="Commercial"))
+    assert ids(board.top(all_, 3, table.load)) == [8, 5, 6]
+    assert ids(board.top(consulting, 3, table.load)) == [5, 6, 4]
+    assert table.loads == 2
+
+    board.discard([5])
+    table.entries = [e for e in table.entries if e.prediction_input_id != 5]
+    assert ids(board.top(consulting, 2, table.load)) == [6, 4]
+    assert table.loads == 2
+
+    # Plus assez d'entrées en mémoire pour un segment tronqué : reconstruction
+    board.discard([6, 4])
+    table.entries = [e for e in table.entries if e.prediction_input_id not in (6, 4)]
+    assert ids(board.top(consulting, 2, table.load)) == [3, 2]
+    assert table.loads == 3
+    assert board.stats()["rebuilds"] == 3
+
+
+def test_write_during_rebuild_is_not_lost():
+    board = Leaderboard(depth=10, ttl=60)
+    table = FakeTable([entry(1, 0.5)])
+    load = table.load
+
+    def racing_load(key, limit):
+        rows = load(key, limit)
+        # Écriture validée après la lecture de la base
+        table.entries.append(entry(2, 0.9))
+        board.add(entry(2, 0.9))
+        return rows
+
+    table.load = racing_load
+    assert ids(board.top((None, None), 5, table.load)) == [1]
+    # Segment non enregistré : relu au prochain accès
+    assert ids(board.top((None, None), 5, load)) == [2, 1]
+    assert ids(board.top((None, None), 5, load)) == [2, 1]
+    assert table.loads == 2
+
+
+def test_rebuild_uses_the_covering_index(db):
+    assert LEADERBOARD_INDEX in {
+        index["name"] for index in inspect(engine).get_indexes("prediction_outputs")
+    }
+    query = segment_query((None, None), 10).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    # Tables de test quasi vides : le parcours séquentiel serait choisi
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    db.execute(text("SET LOCAL enable_bitmapscan = off"))
+    plan = db.execute(text(f"EXPLAIN {query}")).scalars().all()
+    # Index couvrant : aucune lecture de prediction_outputs
+    assert any(
+        f"Index Only Scan using {LEADERBOARD_INDEX}" in line for line in plan
+    ), "\n".join(plan)
+
+
+@pytest.mark.asyncio
+async def test_top_endpoint_tracks_writes_and_deletes(async_client, db, sample_input):
+    profiles = [
+        {**sample_input, "matricule": "M901"},
+        {**sample_input, "matricule": "M902", "heure_supplementaires": "Non"},
+        {
+            **sample_input,
+            "matricule": "M903",
+            "departement": "Consulting",
+            "poste": "Consultant",
+        },
+    ]
+    rebuilds = leaderboard.stats()["rebuilds"]
+    resp = await async_client.get("/predictions/top", params={"k": 5})
+    assert resp.json() == []
+
+    created = [
+        (await async_client.post("/predictions", json=profile)).json()
+        for profile in profiles
+    ]
+    expected = sorted(
+        created, key=lambda r: (-r["output"]["probability"], r["input"]["id"])
+    )
+
+    resp = await async_client.get("/predictions/top", params={"k": 5})
+    assert resp.status_code == 200
+    assert [e["prediction_input_id"] for e in resp.json()] == [
+        r["input"]["id"] for r in expected
+    ]
+    assert resp.json() == [
+        e.model_dump(mode="json") for e in load_segment(db, (None, None), 5)
+    ]
+
+    resp = await async_client.get(
+        "/predictions/top", params={"departement": "Commercial"}
+    )
+    assert {e["matricule"] for e in resp.json()} == {"M901", "M902"}
+
+    await async_client.delete(f"/predictions/{created[0]['input']['id']}")
+    resp = await async_client.get(
+        "/predictions/top", params={"departement": "Commercial"}
+    )
+    assert [e["matricule"] for e in resp.json()] == ["M902"]
+    # Deux reconstructions (premier accès à chaque segment), le reste en mémoire
+    assert leaderboard.stats()["rebuilds"] == rebuilds + 2
+
+    resp = await async_client.get("/predictions/top", params={"poste": "Inconnu"})
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_estimated_probabilities_are_not_ranked(async_client, db, sample_input):
+    exact = await async_client.post("/predictions", json=sample_input)
+    estimated = await async_client.post(
+        "/predictions",
+        params={"mode": "decision"},
+        json={**sample_input, "matricule": "M904"},
+    )
+    output = estimated.json()["output"]
+    assert output["trees_used"] == estimated.json()["trees_used"]
+    assert exact.json()["output"]["trees_used"] is None
+
+    resp = await async_client.get("/predictions/top", params={"k": 5})
+    assert [e["prediction_input_id"] for e in resp.json()] == [
+        exact.json()["input"]["id"]
+    ]
+    assert len(load_segment(db, (None, None), 5)) == 1
@@ -0,0 +1,119 @@
+import io
+import json
+import logging
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+import app.core.logs as logs
+from app.core.config import settings
+from app.core.logs import (
+    JsonFormatter,
+    RequestLogMiddleware,
+    configure_logging,
+    should_log,
+    shutdown_logging,
+    stage,
+)
+
+
+@pytest.fixture
+def log_stream(monkeypatch):
+    """Journalisation asynchrone vers un flux en mémoire, état global restauré."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    monkeypatch.setattr(logs, "_listener", None)
+    monkeypatch.setattr(logs, "_queue_handler", None)
+    stream = io.StringIO()
+    configure_logging("INFO", "json", stream)
+    yield stream
+    shutdown_logging()
+    root.handlers, root.level = handlers, level
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLogMiddleware)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with stage("db"):
+            time.sleep(0.001)
+        if item_id == 0:
+            raise HTTPException(status_code=503)
+        return {"id": item_id}
+
+    return app
+
+
+async def _get(app, path, **kwargs):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path, **kwargs)
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.makeLogRecord(
+        {"name": "app", "levelname": "INFO", "msg": "bonjour %s", "args": ("toi",)}
+    )
+    record.route = "/v1/predictions"
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "bonjour toi"
+    assert entry["route"] == "/v1/predictions"
+    assert entry["level"] == "INFO"
+
+
+def test_records_are_written_by_listener_thread(log_stream):
+    logging.getLogger("app.test").info("écrit hors du thread appelant", extra={"n": 1})
+    shutdown_logging()
+
+    entry = json.loads(log_stream.getvalue().splitlines()[-1])
+    assert entry["message"] == "écrit hors du thread appelant"
+    assert entry["n"] == 1
+
+
+def test_full_queue_drops_records(log_stream, monkeypatch):
+    handler = logs._queue_handler
+    logs._listener.stop()
+    monkeypatch.setattr(handler, "queue", type(handler.queue)(maxsize=1))
+
+    for _ in range(3):
+        logging.getLogger("app.test").warning("trop")
+    assert handler.dropped == 2
+    logs._listener = None
+
+
+@pytest.mark.asyncio
+async def test_one_line_per_request(caplog):
+    caplog.set_level(logging.INFO, logger="app.requests")
+
+    resp = await _get(_app(), "/items/3", headers={"X-Request-ID": "abc"})
+
+    assert resp.headers["x-request-id"] == "abc"
+    (record,) = [r for r in caplog.records if r.name == "app.requests"]
+    assert record.request_id == "abc"
+    assert record.route == "/items/{item_id}"
+    assert record.status == 200
+    assert record.stages_ms["db"] >= 1
+    assert record.duration_ms >= record.stages_ms["db"]
+
+
+@pytest.mark.asyncio
+async def test_sampling_keeps_server_errors(caplog, monkeypatch):
+    caplog.set_level(logging.INFO, logger="app.requests")
+    monkeypatch.setattr(settings, "LOG_REQUEST_SAMPLE_RATES", {"/items/{item_id}": 0})
+
+    await _get(_app(), "/items/3")
+    await _get(_app(), "/items/0")
+
+    statuses = [r.status for r in caplog.records if r.name == "app.requests"]
+    assert statuses == [503]
+
+
+def test_slow_requests_are_always_logged(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_REQUEST_SAMPLE_RATE", 0)
+    assert not should_log("/v1/predictions", 200, 1)
+    assert should_log("/v1/predictions", 200, settings.LOG_SLOW_REQUEST_MS)
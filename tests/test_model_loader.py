@@ -66,3 +66,19 @@ def test_load_model_remote_fail(mock_hf, mock_req, mock_exists):
 
     mock_hf.assert_called_once()
     mock_req.assert_called_once()
+
+
+# === 5️⃣ VERSION : MODEL_VERSION, sinon empreinte du fichier local ===
+def test_model_version(monkeypatch, tmp_path):
+    model_file = tmp_path / "model.pkl"
+    model_file.write_bytes(b"MODEL")
+    monkeypatch.setattr(model_loader, "MODEL_PATH", model_file)
+    monkeypatch.setattr(model_loader.settings, "MODEL_VARIANT", "")
+    model_loader.model_version.cache_clear()
+
+    assert model_loader.model_version() == "c8b6c094bbbd"
+
+    monkeypatch.setattr(model_loader.settings, "MODEL_VERSION", "2025-10")
+    model_loader.model_version.cache_clear()
+    assert model_loader.model_version() == "2025-10"
+    model_loader.model_version.cache_clear()
@@ -0,0 +1,111 @@
+import threading
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from threadpoolctl import threadpool_info
+
+from app.ml.model_loader import model
+from app.ml.profiles import (
+    get_profile,
+    inference_profile,
+    model_for_profile,
+    native_thread_limit,
+)
+from app.ml.samples import example_frame
+
+
+def _classifier(pipeline):
+    return pipeline.steps[-1][1]
+
+
+def test_unknown_profile_raises():
+    with pytest.raises(ValueError):
+        get_profile("inexistant")
+
+
+def test_default_profile_is_latency():
+    assert get_profile(None).n_jobs == 1
+
+
+def test_profile_copy_does_not_mutate_shared_model():
+    original_n_jobs = _classifier(model).n_jobs
+
+    latency = model_for_profile(model, "latency")
+    throughput = model_for_profile(model, "throughput")
+
+    assert _classifier(latency).n_jobs == 1
+    assert _classifier(throughput).n_jobs == -1
+    assert _classifier(model).n_jobs == original_n_jobs
+    # Les arbres entraînés sont partagés, pas copiés
+    assert _classifier(latency).estimators_ is _classifier(model).estimators_
+
+
+def test_profile_copy_is_cached():
+    assert model_for_profile(model, "latency") is model_for_profile(model, "latency")
+
+
+def test_non_sklearn_model_is_returned_as_is():
+    mock = MagicMock()
+    assert model_for_profile(mock, "throughput") is mock
+
+
+def test_profiles_give_identical_predictions():
+    X = example_frame(8)
+    with inference_profile(model, "latency") as latency:
+        expected = latency.predict_proba(X)
+    with inference_profile(model, "throughput") as throughput:
+        np.testing.assert_allclose(throughput.predict_proba(X), expected)
+
+
+def test_native_thread_limit_is_restored_after_concurrent_calls():
+    before = [lib["num_threads"] for lib in threadpool_info()]
+    inside = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with native_thread_limit(1):
+            inside.set()
+            release.wait(2)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    inside.wait(1)
+    with native_thread_limit(1):
+        assert all(lib["num_threads"] == 1 for lib in threadpool_info())
+    # Le second appel est sorti, le premier est toujours limité
+    assert all(lib["num_threads"] == 1 for lib in threadpool_info())
+    release.set()
+    thread.join()
+
+    assert [lib["num_threads"] for lib in threadpool_info()] == before
+
+
+def test_other_limit_waits_for_limited_calls():
+    """Un appel sans limite n'est pas bridé par un appel `latency` en cours."""
+    before = [lib["num_threads"] for lib in threadpool_info()]
+    inside = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def hold():
+        with native_thread_limit(1):
+            inside.set()
+            release.wait(2)
+
+    def unlimited():
+        with native_thread_limit(None):
+            seen.append([lib["num_threads"] for lib in threadpool_info()])
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    inside.wait(1)
+    waiter = threading.Thread(target=unlimited)
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive() and not seen
+    release.set()
+    holder.join()
+    waiter.join(2)
+
+    assert seen == [before]
@@ -0,0 +1,145 @@
+import threading
+
+import joblib
+import pytest
+
+from app.ml.compact import VariantSpec, build_variant
+from app.ml.model_loader import model
+from app.ml.registry import ModelRegistry, UnknownModel, estimate_nbytes
+from app.ml.samples import example_frame, example_row
+
+
+@pytest.fixture(scope="module")
+def small_model():
+    return build_variant(model, VariantSpec("f32", n_trees=5, max_depth=3))
+
+
+@pytest.fixture
+def models_dir(tmp_path, small_model):
+    for name in ("consulting", "commercial", "rh"):
+        joblib.dump(small_model, tmp_path / f"{name}.pkl")
+    return tmp_path
+
+
+@pytest.fixture
+def registry(models_dir, small_model):
+    # Budget : deux petits modèles
+    return ModelRegistry(models_dir, 2 * estimate_nbytes(small_model, 0))
+
+
+def test_models_are_loaded_on_demand(registry):
+    assert registry.stats()["loaded"] == []
+
+    with registry.use("consulting") as entry:
+        proba = entry.model.predict_proba(example_frame())
+        assert entry.version.startswith("consulting-")
+    with registry.use("consulting"):
+        pass
+
+    stats = registry.stats()
+    assert proba.shape == (1, 2)
+    assert (stats["loads"], stats["misses"], stats["hits"]) == (1, 1, 1)
+    assert stats["available"] == ["commercial", "consulting", "rh"]
+
+
+def test_least_recently_used_idle_model_is_evicted(registry):
+    for name in ("consulting", "commercial", "consulting", "rh"):
+        with registry.use(name):
+            pass
+
+    stats = registry.stats()
+    assert [item["name"] for item in stats["loaded"]] == ["rh", "consulting"]
+    assert stats["evictions"] == 1
+    assert stats["loaded_bytes"] <= stats["budget_bytes"]
+
+
+def test_model_in_use_is_not_evicted(registry):
+    with registry.use("consulting"), registry.use("commercial"):
+        with registry.use("rh"):
+            # Budget dépassé : rien d'inactif à décharger
+            assert len(registry.stats()["loaded"]) == 3
+        # « rh » est libéré, c'est lui qui est inactif
+        assert {item["name"] for item in registry.stats()["loaded"]} == {
+            "consulting",
+            "commercial",
+        }
+
+
+def test_concurrent_requests_share_one_load(registry, monkeypatch):
+    original = joblib.load
+    started, release = threading.Event(), threading.Event()
+    loads = []
+
+    def slow_load(*args, **kwargs):
+        loads.append(1)
+        started.set()
+        release.wait(5)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr("app.ml.registry.joblib.load", slow_load)
+    results = []
+
+    def request():
+        with registry.use("rh") as entry:
+            results.append(entry)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(loads) == 1
+    assert len({id(entry) for entry in results}) == 1
+    assert registry.stats()["waits"] >= 1
+
+
+@pytest.mark.parametrize("name", ["inconnu", "../models/rh", ".hidden"])
+def test_unknown_model(registry, name):
+    with pytest.raises(UnknownModel):
+        registry.acquire(name)
+    assert registry.stats()["load_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_endpoints_select_named_model(async_client, registry, monkeypatch):
+    monkeypatch.setattr("app.services.model_registry", registry)
+    body = {name: [value] for name, value in example_row().items()}
+
+    resp = await async_client.post(
+        "/predictions/batch", json=body, headers={"X-Model": "rh"}
+    )
+    assert resp.status_code == 200
+    resp = await async_client.post("/models/commercial/predictions/batch", json=body)
+    assert resp.status_code == 200
+    assert {item["name"] for item in registry.stats()["loaded"]} == {
+        "rh",
+        "commercial",
+    }
+
+    resp = await async_client.post("/models/inconnu/predictions/batch", json=body)
+    assert resp.status_code == 404
+    resp = await async_client.post(
+        "/predictions/batch", json=body, headers={"X-Model": "../rh"}
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_prediction_records_named_model_version(
+    async_client, registry, sample_input, monkeypatch
+):
+    monkeypatch.setattr("app.services.model_registry", registry)
+
+    resp = await async_client.post(
+        "/models/consulting/predictions", json={**sample_input, "matricule": None}
+    )
+
+    assert resp.status_code == 201
+    assert resp.json()["output"]["model_version"].startswith("consulting-")
+    assert resp.json()["output"]["model_name"] == "consulting"
+    # Probabilités d'un autre modèle : hors du classement des risques
+    resp = await async_client.get("/predictions/top")
+    assert resp.json() == []
@@ -0,0 +1,211 @@
+import json
+import time
+
+import numpy as np
+import pytest
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.ml.backends import ProcessPoolBackend
+from app.ml.features import FeatureStore, get_encoder
+from app.ml.model_loader import model
+from app.ml.samples import records_frame
+from app.models import PredictionInput, PredictionOutput
+from app.rescore import (
+    FEATURES,
+    STALENESS_NOTICE,
+    Checkpoint,
+    Throttle,
+    load_inputs,
+    main,
+    rescore,
+)
+from app.schemas import PredictionInputCreate
+from tests.conftest import engine as test_engine
+
+
+@pytest.fixture(scope="module")
+def backend():
+    backend = ProcessPoolBackend(processes=1)
+    backend.start()
+    yield backend
+    backend.shutdown()
+
+
+@pytest.fixture
+def stored_inputs(sample_input):
+    """Six entrées validées ; les quatre premières ont une sortie « v1 »."""
+    ids = []
+    with Session(test_engine) as session:
+        for i in range(6):
+            data = PredictionInputCreate(
+                **{**sample_input, "matricule": None, "age": 30 + 5 * i}
+            )
+            db_input = PredictionInput(**data.model_dump())
+            session.add(db_input)
+            session.flush()
+            ids.append(db_input.id)
+            if i < 4:
+                session.add(
+                    PredictionOutput(
+                        prediction_input_id=db_input.id,
+                        prediction=0,
+                        probability=0.0,
+                        threshold=0.5,
+                        model_version="v1",
+                    )
+                )
+        session.commit()
+    yield ids
+    with Session(test_engine) as session:
+        session.execute(delete(PredictionInput).where(PredictionInput.id.in_(ids)))
+        session.commit()
+
+
+def _outputs(ids):
+    with Session(test_engine) as session:
+        return session.scalars(
+            select(PredictionOutput)
+            .where(PredictionOutput.prediction_input_id.in_(ids))
+            .order_by(PredictionOutput.prediction_input_id)
+        ).all()
+
+
+def _run(backend, tmp_path, **kwargs):
+    return rescore(
+        backend,
+        tmp_path / "checkpoint.json",
+        chunk_size=2,
+        max_rows_per_second=0,
+        source_engine=test_engine,
+        target_engine=test_engine,
+        version="v2",
+        **kwargs,
+    )
+
+
+def test_rescore_updates_and_creates_outputs(backend, stored_inputs, tmp_path):
+    result = _run(backend, tmp_path)
+
+    assert (result.rows, result.updated, result.inserted) == (6, 4, 2)
+    outputs = _outputs(stored_inputs)
+    assert len(outputs) == 6
+    assert {output.model_version for output in outputs} == {"v2"}
+
+    with Session(test_engine) as session:
+        inputs = session.scalars(
+            select(PredictionInput)
+            .where(PredictionInput.id.in_(stored_inputs))
+            .order_by(PredictionInput.id)
+        ).all()
+        X = records_frame(
+            [[getattr(row, name) for name in FEATURES] for row in inputs], FEATURES
+        )
+    np.testing.assert_allclose(
+        [output.probability for output in outputs],
+        model.predict_proba(X)[:, 1],
+        atol=1e-12,
+    )
+
+    checkpoint = json.loads((tmp_path / "checkpoint.json").read_text())
+    assert checkpoint["last_id"] == stored_inputs[-1]
+    assert checkpoint["model_version"] == "v2"
+
+    # Une seconde passe ne trouve plus rien à recalculer
+    assert _run(backend, tmp_path, restart=True).rows == 0
+
+
+def test_rescore_reads_encoded_features_from_the_store(
+    backend, stored_inputs, tmp_path
+):
+    encoder = get_encoder()
+    store = FeatureStore(tmp_path / "store")
+    # Les deux dernières entrées manquent au magasin : leur bloc est lu en base
+    X = load_inputs(test_engine, np.array(stored_inputs[:4]))
+    store.rebuild(
+        [(np.array(stored_inputs[:4]), encoder.transform(X))], encoder.names, "v1"
+    )
+
+    result = _run(backend, tmp_path, features=store.open())
+
+    assert (result.rows, result.from_store) == (6, 4)
+    expected = model.predict_proba(load_inputs(test_engine, np.array(stored_inputs)))
+    np.testing.assert_allclose(
+        [output.probability for output in _outputs(stored_inputs)],
+        expected[:, 1],
+        atol=1e-12,
+    )
+
+
+def test_rescore_resumes_from_checkpoint(backend, stored_inputs, tmp_path):
+    Checkpoint("v2", last_id=stored_inputs[2], rows=3).save(
+        tmp_path / "checkpoint.json"
+    )
+
+    result = _run(backend, tmp_path)
+
+    assert result.rows == 3
+    versions = [output.model_version for output in _outputs(stored_inputs)]
+    assert versions[:3] == ["v1", "v1", "v1"]
+    assert versions[3:] == ["v2", "v2", "v2"]
+
+
+def test_rescore_replaces_estimated_probabilities(backend, stored_inputs, tmp_path):
+    with Session(test_engine) as session:
+        session.execute(
+            update(PredictionOutput)
+            .where(PredictionOutput.prediction_input_id.in_(stored_inputs))
+            .values(model_version="v2")
+        )
+        # Probabilité estimée par le mode décision, avec la version courante
+        session.execute(
+            update(PredictionOutput)
+            .where(PredictionOutput.prediction_input_id == stored_inputs[0])
+            .values(trees_used=40)
+        )
+        session.commit()
+
+    result = _run(backend, tmp_path)
+
+    # La sortie estimée et les deux entrées sans sortie
+    assert (result.rows, result.updated, result.inserted) == (3, 1, 2)
+    assert [output.trees_used for output in _outputs(stored_inputs)] == [None] * 6
+
+
+def test_rescore_skips_named_model_outputs(backend, stored_inputs, tmp_path):
+    with Session(test_engine) as session:
+        session.execute(
+            update(PredictionOutput)
+            .where(PredictionOutput.prediction_input_id.in_(stored_inputs[:2]))
+            .values(model_name="rh", model_version="rh-0123456789ab")
+        )
+        session.commit()
+
+    result = _run(backend, tmp_path)
+
+    assert (result.rows, result.updated, result.inserted) == (4, 2, 2)
+    versions = [output.model_version for output in _outputs(stored_inputs)]
+    assert versions == ["rh-0123456789ab"] * 2 + ["v2"] * 4
+
+
+def test_checkpoint_of_other_version_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    Checkpoint("v1", last_id=42).save(path)
+
+    assert Checkpoint.load(path, "v1").last_id == 42
+    assert Checkpoint.load(path, "v2").last_id == 0
+
+
+def test_throttle_caps_rate():
+    throttle = Throttle(rows_per_second=200)
+    started = time.monotonic()
+    for _ in range(4):
+        throttle.wait(10)
+    assert time.monotonic() - started >= 0.19
+
+
+def test_run_help_documents_cache_staleness(capsys):
+    with pytest.raises(SystemExit):
+        main(["run", "--help"])
+    # argparse rejustifie l'épilogue
+    assert STALENESS_NOTICE in " ".join(capsys.readouterr().out.split())
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+import app.api.endpoints as endpoints
+from app.core import security
+from app.core.config import ApiKeyPolicy
+from app.core.database import get_db
+from app.core.idempotency import IdempotencyStore
+from app.core.security import KeyLimiter
+from app.schemas import PredictionInputCreate
+
+
+def test_token_bucket_allows_burst_then_rejects():
+    """Le bucket accepte `burst` requêtes puis indique le délai d'attente."""
+    limiter = KeyLimiter(ApiKeyPolicy(name="k", rate_per_second=2, burst=2))
+    assert limiter.acquire_request() is None
+    assert limiter.acquire_request() is None
+    retry_after = limiter.acquire_request()
+    assert 0 < retry_after <= 0.5
+    assert limiter.usage()["allowed"] == 2
+    assert limiter.usage()["rejected_rate"] == 1
+
+
+def test_concurrency_slots():
+    limiter = KeyLimiter(ApiKeyPolicy(name="k", max_concurrency=1))
+    assert limiter.acquire_slot() is True
+    assert limiter.acquire_slot() is False
+    limiter.release_slot()
+    assert limiter.acquire_slot() is True
+    assert limiter.usage()["rejected_concurrency"] == 1
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    """App sans override d'authentification, avec deux clés aux limites distinctes."""
+    monkeypatch.setattr(
+        security,
+        "limiters",
+        {
+            "batch-key": KeyLimiter(
+                ApiKeyPolicy(name="batch", rate_per_second=0.001, burst=1)
+            ),
+            "busy-key": KeyLimiter(ApiKeyPolicy(name="busy", max_concurrency=0)),
+        },
+    )
+    app = FastAPI()
+    app.include_router(endpoints.api_router)
+
+    def fail_get_db():
+        raise AssertionError("La base ne doit pas être sollicitée")
+
+    app.dependency_overrides[get_db] = fail_get_db
+    return app
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_request_gets_429(limited_app, sample_input):
+    """Au-delà du débit, 429 + Retry-After, sans toucher ni la base ni le modèle."""
+    transport = ASGITransport(app=limited_app)
+    headers = {"X-API-Key": "batch-key"}
+    async with AsyncClient(
+        transport=transport, base_url="http://testserver", headers=headers
+    ) as client:
+        assert (await client.get("/metrics/api-keys")).status_code == 200
+        with patch("app.services.model") as mock_model:
+            resp = await client.post("/predictions", json=sample_input)
+        assert resp.status_code == 429
+        assert int(resp.headers["Retry-After"]) >= 1
+        mock_model.predict_proba.assert_not_called()
+
+    usage = {item["name"]: item for item in security.get_usage()}
+    assert usage["batch"]["rejected_rate"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_gets_429(limited_app, sample_input):
+    transport = ASGITransport(app=limited_app)
+    async with AsyncClient(
+        transport=transport,
+        base_url="http://testserver",
+        headers={"X-API-Key": "busy-key"},
+    ) as client:
+        resp = await client.post("/predictions", json=sample_input)
+    assert resp.status_code == 429
+    assert "concurrent" in resp.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_idempotent_duplicate_waits_without_slot_or_session(
+    limited_app, sample_input, monkeypatch
+):
+    """Un doublon en attente n'occupe ni créneau de concurrence ni session."""
+    limiter = KeyLimiter(ApiKeyPolicy(name="retry", max_concurrency=1))
+    security.limiters["retry-key"] = limiter
+    store = IdempotencyStore(ttl=60, max_entries=10, wait_timeout=0.5)
+    monkeypatch.setattr(endpoints, "idempotency_store", store)
+    sessions = []
+
+    def tracking_get_db():
+        sessions.append(1)
+        yield None
+
+    limited_app.dependency_overrides[get_db] = tracking_get_db
+    payload = PredictionInputCreate(**sample_input).model_dump_json()
+    # Requête d'origine toujours en cours
+    store.claim(
+        "retry-key:retry-1",
+        hashlib.sha256(f"None:exact:{payload}".encode()).hexdigest(),
+    )
+
+    transport = ASGITransport(app=limited_app)
+    async with AsyncClient(
+        transport=transport,
+        base_url="http://testserver",
+        headers={"X-API-Key": "retry-key", "Idempotency-Key": "retry-1"},
+    ) as client:
+        pending = asyncio.create_task(client.post("/predictions", json=sample_input))
+        await asyncio.sleep(0.2)
+        assert not pending.done()
+        assert limiter.usage()["in_flight"] == 0
+        resp = await pending
+
+    assert resp.status_code == 409
+    assert sessions == []
+    assert limiter.usage()["rejected_concurrency"] == 0
@@ -1,15 +1,22 @@
+from datetime import UTC, datetime, timedelta
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 from fastapi import HTTPException
 
 from app.models import PredictionInput, PredictionOutput
-from app.schemas import PredictionInputCreate, PredictionOutputCreate
+from app.schemas import (
+    BulkDeleteRequest,
+    PredictionInputCreate,
+    PredictionOutputCreate,
+)
 from app.services import (
     create_prediction_full_service,
     create_prediction_input,
     create_prediction_output,
     delete_prediction_input,
+    delete_prediction_inputs,
     get_prediction_input_by_id,
     get_prediction_inputs,
     get_prediction_outputs,
@@ -34,8 +41,8 @@ def payload_output():
 def mock_model():
     """Mock du modèle ML pour isoler le service."""
     with patch("app.services.model") as mock:
-        mock.predict.return_value = [1]
         mock.predict_proba.return_value = [[0.3, 0.7]]
+        mock.classes_ = np.array([0, 1])
         yield mock
 
 
@@ -140,6 +147,71 @@ def test_delete_prediction_input(db, payload_input):
     assert success_not_found is False
 
 
+def test_delete_prediction_input_cascades_to_output(db, payload_input):
+    """La sortie est supprimée par la cascade de la base, sans être chargée."""
+    result = create_prediction_full_service(db, payload_input)
+
+    assert delete_prediction_input(db, result.input.id) is True
+    assert db.query(PredictionOutput).count() == 0
+
+
+@pytest.fixture
+def stored_predictions(db, sample_input):
+    """Trois prédictions complètes (entrée + sortie), matricules M1 à M3."""
+    return [
+        create_prediction_full_service(
+            db, PredictionInputCreate(**{**sample_input, "matricule": f"M{i}"})
+        ).input.id
+        for i in range(1, 4)
+    ]
+
+
+@pytest.mark.parametrize(
+    "criteria, batch_size, expected",
+    [
+        ({"matricules": ["M1", "M3", "M9"]}, 1000, (2, 2, 1)),
+        ({"matricules": ["M1", "M2", "M3"]}, 2, (3, 3, 2)),
+        ({"created_to": datetime(2000, 1, 1, tzinfo=UTC)}, 2, (0, 0, 1)),
+    ],
+)
+def test_delete_prediction_inputs_by_criteria(
+    db, stored_predictions, criteria, batch_size, expected
+):
+    result = delete_prediction_inputs(
+        db, BulkDeleteRequest(**criteria), batch_size=batch_size
+    )
+
+    assert (result.inputs_deleted, result.outputs_deleted, result.batches) == expected
+    assert db.query(PredictionInput).count() == 3 - expected[0]
+    assert db.query(PredictionOutput).count() == 3 - expected[1]
+
+
+def test_delete_prediction_inputs_by_ids_and_period(db, stored_predictions):
+    now = datetime.now(UTC)
+    result = delete_prediction_inputs(
+        db,
+        BulkDeleteRequest(
+            ids=stored_predictions[:2],
+            created_from=now - timedelta(days=1),
+            created_to=now + timedelta(days=1),
+        ),
+        batch_size=1,
+    )
+    assert (result.inputs_deleted, result.batches) == (2, 2)
+
+    # Période seule : lots successifs jusqu'à épuisement
+    result = delete_prediction_inputs(
+        db, BulkDeleteRequest(created_from=now - timedelta(days=1)), batch_size=1
+    )
+    assert (result.inputs_deleted, result.batches) == (1, 2)
+    assert db.query(PredictionInput).count() == 0
+
+
+def test_bulk_delete_requires_criteria():
+    with pytest.raises(ValueError):
+        BulkDeleteRequest()
+
+
 def test_create_prediction_output(db, sample_input):
     """Vérifie la création d’un output isolé."""
     input_payload = PredictionInputCreate(**sample_input)
@@ -190,9 +262,9 @@ def test_create_prediction_full_service(db, payload_input, mock_model):
     assert result.output.prediction in [0, 1]
     assert 0 <= result.output.probability <= 1
 
-    # Vérifie que le modèle a été appelé
-    mock_model.predict.assert_called_once()
+    # Vérifie que le modèle a été appelé (un seul passage sur la forêt)
     mock_model.predict_proba.assert_called_once()
+    mock_model.predict.assert_not_called()
 
     # --- Vérifie la persistance dans la DB ---
     assert db.query(PredictionInput).count() == 1
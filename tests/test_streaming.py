@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import app.streaming as streaming
+from app.api.endpoints import api_router
+from app.core.config import settings
+from app.core.security import API_KEY, limiters
+from app.schemas import PredictionInputCreate
+from app.services import score_batch_service
+
+HEADERS = {"X-API-Key": API_KEY}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(api_router)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_results_are_tagged_and_ordered(client, sample_input):
+    other = {**sample_input, "age": 25, "revenu_mensuel": 1500}
+    with client.websocket_connect("/ws/predictions", headers=HEADERS) as ws:
+        ws.send_json({"id": "a", "input": sample_input})
+        ws.send_json({"id": 2, "input": {**sample_input, "age": 12}})
+        ws.send_json({"id": "c", "input": other})
+        ws.send_text("pas du json")
+        results = [ws.receive_json() for _ in range(4)]
+
+    frame = pd.DataFrame(
+        [
+            PredictionInputCreate(**row).model_dump(mode="json", exclude={"matricule"})
+            for row in (sample_input, other)
+        ]
+    )
+    expected = score_batch_service(frame)
+    assert [result["id"] for result in results] == ["a", 2, "c", None]
+    assert results[0]["prediction"] == expected.prediction[0]
+    assert results[0]["probability"] == pytest.approx(expected.probability[0])
+    assert results[2]["probability"] == pytest.approx(expected.probability[1])
+    assert results[1]["error"]["status"] == 422
+    assert results[1]["error"]["detail"][0]["loc"] == ["input", "age"]
+    assert results[3]["error"]["status"] == 400
+
+
+def test_invalid_key_is_rejected(client):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(
+            "/ws/predictions", headers={"X-API-Key": "mauvaise"}
+        ):
+            pass
+    assert exc.value.code == 1008
+
+
+def test_api_key_query_parameter(client, sample_input):
+    with client.websocket_connect(f"/ws/predictions?api_key={API_KEY}") as ws:
+        ws.send_json({"id": 1, "input": sample_input})
+        assert "prediction" in ws.receive_json()
+
+
+def test_connection_holds_an_inference_slot(client):
+    limiter = limiters[API_KEY]
+    with client.websocket_connect("/ws/predictions", headers=HEADERS):
+        assert limiter.in_flight == 1
+    time.sleep(0.05)
+    assert limiter.in_flight == 0
+
+
+def test_pending_messages_are_micro_batched(client, sample_input, monkeypatch):
+    release = threading.Event()
+    sizes = []
+    parsed = 0
+    parse_message = streaming.parse_message
+
+    def counting_parse(data):
+        nonlocal parsed
+        parsed += 1
+        return parse_message(data)
+
+    def blocked(X, *args):
+        sizes.append(len(X))
+        release.wait(5)
+        return score_batch_service(X, *args)
+
+    monkeypatch.setattr(streaming, "parse_message", counting_parse)
+    monkeypatch.setattr(streaming, "score_batch_service", blocked)
+    monkeypatch.setattr(settings, "WS_MAX_PENDING", 3)
+    monkeypatch.setattr(settings, "WS_MAX_BATCH", 4)
+
+    with client.websocket_connect("/ws/predictions", headers=HEADERS) as ws:
+        for i in range(10):
+            ws.send_json({"id": i, "input": sample_input})
+        time.sleep(0.2)
+        # Premier lot en cours de scoring, puis file pleine : lecture suspendue
+        assert sizes == [1]
+        assert parsed == 1 + 3 + 1
+        release.set()
+        results = [ws.receive_json() for _ in range(10)]
+
+    assert [result["id"] for result in results] == list(range(10))
+    assert sum(sizes) == 10
+    assert max(sizes) <= 4 and len(sizes) < 10
+
+
+class FloodingSocket:
+    """Client qui envoie sans fin et ne lit plus les résultats."""
+
+    def __init__(self, message):
+        self.message = message
+
+    async def receive(self):
+        await asyncio.sleep(0)
+        return {"type": "websocket.receive", "text": self.message}
+
+    async def send_text(self, text):
+        # Le temps que la lecture remplisse la file et attende une place
+        await asyncio.sleep(0.05)
+        raise WebSocketDisconnect()
+
+
+@pytest.mark.asyncio
+async def test_receiver_ends_with_a_full_queue(monkeypatch):
+    """Déconnexion pendant que la lecture attend une place : aucune tâche ne reste."""
+    monkeypatch.setattr(settings, "WS_MAX_PENDING", 1)
+    before = asyncio.all_tasks()
+
+    await asyncio.wait_for(
+        streaming.serve_prediction_stream(FloodingSocket('{"id": 1, "input": {}}')),
+        timeout=2,
+    )
+
+    await asyncio.sleep(0.05)
+    assert not [task for task in asyncio.all_tasks() - before if not task.done()]
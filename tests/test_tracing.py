@@ -0,0 +1,149 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+import app.core.tracing as tracing
+from app.api.endpoints import api_router
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.security import verify_api_key
+from app.core.tracing import (
+    STATUS_ERROR,
+    Span,
+    TracingMiddleware,
+    _SpanScope,
+    configure_tracing,
+    parse_traceparent,
+    shutdown_tracing,
+    span,
+    traced,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def export_path(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACING_EXPORT_PATH", str(path))
+    monkeypatch.setattr(settings, "TRACING_FLUSH_SECONDS", 0.05)
+    configure_tracing()
+    yield path
+    shutdown_tracing()
+
+
+def _exported_spans(path) -> list[dict]:
+    shutdown_tracing()
+    if not path.exists():
+        return []
+    return [
+        span
+        for line in path.read_text().splitlines()
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+
+
+@pytest.fixture
+def traced_client(db):
+    app = FastAPI()
+    app.include_router(api_router)
+    app.add_middleware(TracingMiddleware)
+
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[verify_api_key] = lambda: "test-key"
+    transport = ASGITransport(app=app)
+    return AsyncClient(transport=transport, base_url="http://testserver")
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (f"00-{TRACE_ID}-{PARENT_ID}-01", (TRACE_ID, PARENT_ID, True)),
+        (f"00-{TRACE_ID}-{PARENT_ID}-00", (TRACE_ID, PARENT_ID, False)),
+        (f"00-{'0' * 32}-{PARENT_ID}-01", None),
+        (f"01-{TRACE_ID}-{PARENT_ID}-01", None),
+        ("n'importe quoi", None),
+        (None, None),
+    ],
+)
+def test_parse_traceparent(header, expected):
+    assert parse_traceparent(header) == expected
+
+
+def test_span_is_noop_outside_a_trace(export_path):
+    with span("orphelin") as current:
+        assert current is None
+    assert _exported_spans(export_path) == []
+
+
+def test_traced_records_errors(export_path):
+    @traced()
+    def fails():
+        raise ValueError("boom")
+
+    root = Span("racine", TRACE_ID, PARENT_ID, None)
+    with pytest.raises(ValueError), _SpanScope(root):
+        fails()
+
+    child, parent = _exported_spans(export_path)
+    assert child["name"].endswith("fails")
+    assert child["parentSpanId"] == PARENT_ID
+    assert child["status"]["code"] == STATUS_ERROR
+    assert parent["status"]["code"] == STATUS_ERROR
+
+
+@pytest.mark.asyncio
+async def test_prediction_stages_are_traced(export_path, traced_client, sample_input):
+    async with traced_client as client:
+        resp = await client.post(
+            "/predictions",
+            json=sample_input,
+            headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+        )
+    assert resp.status_code == 201
+
+    spans = _exported_spans(export_path)
+    by_name = {span["name"]: span for span in spans}
+    root = by_name["POST /predictions"]
+    assert root["parentSpanId"] == PARENT_ID
+    assert resp.headers["traceresponse"] == f"00-{TRACE_ID}-{root['spanId']}-01"
+    assert {
+        "matricule_check",
+        "prepare_features",
+        "inference",
+        "insert_input",
+        "insert_output",
+        "build_response",
+        # Décodage et encodage faits par FastAPI autour du handler
+        "validation",
+        "serialization",
+        "render",
+    } <= set(by_name)
+    assert {span["traceId"] for span in spans} == {TRACE_ID}
+    children = [span for span in spans if span is not root]
+    assert {span["parentSpanId"] for span in children} == {root["spanId"]}
+    assert int(root["endTimeUnixNano"]) >= int(by_name["inference"]["endTimeUnixNano"])
+
+
+@pytest.mark.asyncio
+async def test_unsampled_parent_is_not_traced(export_path, traced_client):
+    async with traced_client as client:
+        resp = await client.get(
+            "/health", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"}
+        )
+    assert "traceresponse" not in resp.headers
+    assert _exported_spans(export_path) == []
+
+
+def test_tracing_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(tracing, "_exporter", None)
+    assert configure_tracing() is None
@@ -3,15 +3,19 @@ from unittest.mock import MagicMock, patch
 
 import gradio as gr
 
+from app.schemas import WhatIfResponse
 from app.ui import (
     CLEAN_LABELS,
     PERSONAL_INFO,
     PROFESSIONAL_INFO,
     SATISFACTION_METRICS,
     build_interface,
+    default_grid,
     get_version,
+    parse_grid_values,
     predict_from_ui,
     predict_wrapper,
+    what_if_wrapper,
 )
 
 # Désactiver les analytics Gradio pendant les tests
@@ -190,3 +194,39 @@ def test_predict_from_ui_matricule_handling(sample_input):
         called_args = mock_service.call_args[0][1]
         assert called_args.matricule is None
         assert result == (0.8, "🚪 Quittera l'entreprise")
+
+
+def test_default_grid():
+    """Vérifie les grilles générées : modalités, ou base ±50 % bornée."""
+    assert default_grid("heure_supplementaires", "Oui") == ["Oui", "Non"]
+    assert default_grid("revenu_mensuel", 4000) == list(range(2000, 6001, 400))
+    assert default_grid("age", 60) == [30, 36, 42, 48, 54, 60, 66, 70]
+    assert min(default_grid("mobilite_interne_ratio", 0.8)) == 0.4
+    assert max(default_grid("mobilite_interne_ratio", 0.8)) == 1.0
+    assert parse_grid_values("age", "30, 40.0", 35) == [30, 40]
+
+
+@patch("app.ui.what_if_service")
+def test_what_if_wrapper(mock_service, sample_input):
+    """Vérifie que l'onglet Simulation passe le profil saisi et la grille au service."""
+    mock_service.return_value = WhatIfResponse(
+        features=["age", "genre"],
+        base_probability=0.2,
+        base_prediction=0,
+        threshold=0.5,
+        points={"age": [30, 30], "genre": ["F", "M"]},
+        probability=[0.1, 0.3],
+        prediction=[0, 0],
+        delta=[-0.1, 0.1],
+    )
+    all_features = PERSONAL_INFO + PROFESSIONAL_INFO + SATISFACTION_METRICS
+    args = [sample_input.get(feature) for feature in all_features]
+
+    status, plot, table = what_if_wrapper("age", "30", "genre", "F, M", *args)
+
+    [request] = mock_service.call_args.args
+    assert request.grid == {"age": [30], "genre": ["F", "M"]}
+    assert request.base.revenu_mensuel == sample_input["revenu_mensuel"]
+    assert "20.0%" in status
+    assert plot["serie"].tolist() == ["F", "M"]
+    assert table["delta"].tolist() == [-0.1, 0.1]
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+import app.warmup as warmup
+from app.core.config import settings
+from app.warmup import WarmupState, run_until_ready, start_warmup, warm_up
+
+
+def test_warm_up_runs_every_step():
+    state = warm_up(WarmupState())
+
+    assert state.ready
+    assert state.attempts == 1
+    assert state.duration_seconds > 0
+    expected = {"backend", "predict_1", "decision_1", "db_primary"}
+    expected |= {f"batch_{size}" for size in settings.WARMUP_BATCH_SIZES if size > 1}
+    assert expected <= set(state.steps)
+
+
+def test_warm_up_is_retried_until_success(monkeypatch):
+    calls = []
+    original = warmup._open_connections
+
+    def flaky(db_engine, count):
+        calls.append(count)
+        if len(calls) == 1:
+            raise ConnectionError("base injoignable")
+        original(db_engine, count)
+
+    monkeypatch.setattr(warmup, "_open_connections", flaky)
+    monkeypatch.setattr(settings, "WARMUP_RETRY_SECONDS", 0.01)
+    state = WarmupState()
+
+    run_until_ready(threading.Event(), state)
+
+    assert state.ready
+    assert state.attempts == 2
+    assert state.error is None
+
+
+def test_stopped_warm_up_stays_not_ready(monkeypatch):
+    monkeypatch.setattr(
+        warmup, "get_backend", lambda: (_ for _ in ()).throw(RuntimeError("boom"))
+    )
+    stop = threading.Event()
+    stop.set()
+    state = WarmupState()
+
+    run_until_ready(stop, state)
+
+    assert not state.ready
+    assert state.attempts == 0
+
+
+def test_disabled_warm_up_is_ready_immediately(monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", False)
+    state = WarmupState()
+    start_warmup(state)
+    assert state.ready and state.duration_seconds is None
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint(async_client, monkeypatch):
+    state = WarmupState()
+    monkeypatch.setattr("app.api.endpoints.warmup_state", state)
+
+    resp = await async_client.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["ready"] is False
+
+    warm_up(state)
+    resp = await async_client.get("/ready")
+    assert resp.status_code == 200
+    assert resp.json()["warmup_seconds"] == state.duration_seconds
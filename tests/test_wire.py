@@ -0,0 +1,72 @@
+import msgpack
+import pytest
+
+from app.core.wire import MSGPACK, accepts_msgpack
+
+MSGPACK_HEADERS = {"Content-Type": MSGPACK, "Accept": MSGPACK}
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (MSGPACK, True),
+        ("application/x-msgpack", True),
+        (f"application/json, {MSGPACK};q=0.5", False),
+        (f"application/json;q=0.5, {MSGPACK}", True),
+        (f"{MSGPACK};q=0", False),
+        ("*/*", False),
+        (None, False),
+    ],
+)
+def test_accepts_msgpack(accept, expected):
+    assert accepts_msgpack(accept) is expected
+
+
+@pytest.mark.asyncio
+async def test_prediction_in_msgpack(async_client, sample_input):
+    response = await async_client.post(
+        "/predictions",
+        content=msgpack.packb({**sample_input, "matricule": None}),
+        headers=MSGPACK_HEADERS,
+    )
+    assert response.status_code == 201
+    assert response.headers["content-type"] == MSGPACK
+
+    result = msgpack.unpackb(response.content)
+    assert result["input"]["age"] == sample_input["age"]
+    assert isinstance(result["input"]["created_at"], str)
+    assert 0 <= result["output"]["probability"] <= 1
+
+
+@pytest.mark.asyncio
+async def test_msgpack_body_uses_schema_validation(async_client, sample_input):
+    response = await async_client.post(
+        "/predictions",
+        content=msgpack.packb({**sample_input, "age": 12}),
+        headers={"Content-Type": MSGPACK},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "age"]
+
+
+@pytest.mark.asyncio
+async def test_batch_msgpack_matches_json(async_client, sample_input):
+    columns = {name: [value] * 3 for name, value in sample_input.items()}
+    as_json = await async_client.post("/predictions/batch", json=columns)
+    as_msgpack = await async_client.post(
+        "/predictions/batch", content=msgpack.packb(columns), headers=MSGPACK_HEADERS
+    )
+    invalid = await async_client.post(
+        "/predictions/batch", content=b"\xc1", headers=MSGPACK_HEADERS
+    )
+
+    assert as_msgpack.status_code == 200
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json()
+    assert invalid.status_code == 422
+    assert "MessagePack invalide" in invalid.json()["detail"][0]["msg"]
+
+
+@pytest.mark.asyncio
+async def test_json_remains_the_default(async_client):
+    response = await async_client.get("/health", headers={"Accept": "*/*"})
+    assert response.headers["content-type"] == "application/json"